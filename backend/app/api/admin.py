@@ -0,0 +1,136 @@
+import logging
+import secrets
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Header, Query
+from app.config import settings
+from app.tools.document_ocr.job_queue import ocr_job_queue
+from app.tools.document_ocr.ocr_engine import ocr_engine
+from app.tools.document_ocr.ocr_pool import ocr_pool
+from app.tools.document_ocr.pass_scheduler import pass_scheduler
+from app.tools.document_ocr.result_cache import ocr_result_cache
+from app.tools.rag.embedding_executor import embedding_executor
+from app.tools.rag.knowledge_base import knowledge_base
+from app.tools.rag.query_encoder import query_encoder
+from app.tools.rag.semantic_cache import semantic_cache
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+# Corpus documents used as queries when an index report is given none
+REPORT_SAMPLE_QUERIES = 50
+
+
+def _check_admin_key(x_admin_key: Optional[str]):
+    """Require X-Admin-Key; every admin endpoint is refused until ADMIN_API_KEY is set"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin API disabled: ADMIN_API_KEY is not configured")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key.encode(), settings.ADMIN_API_KEY.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin key")
+
+
+def _report_queries(store, queries: Optional[List[str]]) -> List[str]:
+    """The given queries, or an even sample of the live documents"""
+    if not store.documents:
+        raise HTTPException(status_code=409, detail="Knowledge base is empty")
+    if queries:
+        return queries
+
+    step = max(1, len(store.documents) // REPORT_SAMPLE_QUERIES)
+    return [doc["content"] for doc in store.documents[::step][:REPORT_SAMPLE_QUERIES]]
+
+
+@router.post("/knowledge-base/ingest", status_code=202)
+async def ingest_knowledge_base(x_admin_key: Optional[str] = Header(None)):
+    """
+    Rebuild the knowledge base from KNOWLEDGE_BASE_DIR in the background
+
+    The new snapshot is published atomically when ready; queries keep using
+    the current version until then.
+    """
+    _check_admin_key(x_admin_key)
+
+    if not knowledge_base.start_rebuild(settings.KNOWLEDGE_BASE_DIR):
+        raise HTTPException(status_code=409, detail="A knowledge base rebuild is already running")
+
+    return knowledge_base.status()
+
+
+@router.get("/knowledge-base/status")
+async def knowledge_base_status(x_admin_key: Optional[str] = Header(None)):
+    """Live version, retained versions and rebuild state"""
+    _check_admin_key(x_admin_key)
+    return knowledge_base.status()
+
+
+@router.post("/knowledge-base/rollback")
+async def rollback_knowledge_base(version: Optional[int] = None, x_admin_key: Optional[str] = Header(None)):
+    """Re-publish a retained snapshot (default: the previous version)"""
+    _check_admin_key(x_admin_key)
+
+    try:
+        snapshot = knowledge_base.rollback(version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    return snapshot.to_dict()
+
+
+@router.get("/rag/metrics")
+async def rag_metrics(x_admin_key: Optional[str] = Header(None)):
+    """Retrieval-path cache and batching metrics"""
+    _check_admin_key(x_admin_key)
+    return {
+        "knowledge_base_version": knowledge_base.version,
+        "query_encoder": query_encoder.stats(),
+        "semantic_cache": semantic_cache.stats(),
+        "embedding_executor": embedding_executor.stats()
+    }
+
+
+@router.get("/rag/ann-report")
+async def rag_ann_report(
+    query: Optional[List[str]] = Query(None),
+    top_k: int = Query(10, ge=1, le=100),
+    x_admin_key: Optional[str] = Header(None)
+):
+    """
+    Recall@k and per-query latency of the FAISS index vs exact search over
+    the live knowledge base (queries default to a sample of its documents)
+    """
+    _check_admin_key(x_admin_key)
+    store = knowledge_base.current
+    queries = _report_queries(store, query)
+    return await embedding_executor.run(store.ann_report, queries, top_k)
+
+
+@router.get("/rag/quantization-report")
+async def rag_quantization_report(
+    query: Optional[List[str]] = Query(None),
+    top_k: int = Query(10, ge=1, le=100),
+    x_admin_key: Optional[str] = Header(None)
+):
+    """
+    Recall@k, memory and latency of the int8 and binary first passes vs
+    float32 over the live knowledge base, to choose EMBEDDING_QUANTIZATION
+    """
+    _check_admin_key(x_admin_key)
+    store = knowledge_base.current
+    queries = _report_queries(store, query)
+    return await embedding_executor.run(store.quantization_report, queries, top_k)
+
+
+@router.get("/ocr/metrics")
+async def ocr_metrics(x_admin_key: Optional[str] = Header(None)):
+    """
+    OCR worker pool and job queue depth / utilisation (autoscaling
+    signals), region-of-interest hit rate, pass statistics and result cache
+    """
+    _check_admin_key(x_admin_key)
+    return {
+        "ocr_pool": ocr_pool.stats(),
+        "ocr_jobs": await ocr_job_queue.stats(),
+        "ocr_roi": ocr_engine.roi_stats(),
+        "ocr_passes": pass_scheduler.stats(),
+        "ocr_result_cache": ocr_result_cache.stats()
+    }
@@ -2,6 +2,7 @@ import logging
 from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
 from typing import Optional
+from app.config import settings
 from app.core.session import session_manager
 from app.guardrails.input_guardrail import input_guardrail
 from app.graph.router import semantic_router, IntentType
@@ -13,6 +14,14 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+# Knowledge questions asked mid-application are first answered from the
+# policy category relevant to the current state
+STATE_KNOWLEDGE_FILTERS = {
+    "NEED_DOCS": {"category": "documents"},
+    "DOC_UPLOAD": {"category": "documents"},
+    "OCR_CONFIRM": {"category": "documents"},
+}
+
 
 class ChatRequest(BaseModel):
     session_id: Optional[str] = None
@@ -79,8 +88,11 @@ async def send_message(request: ChatRequest = Body(...)):
                 }
         
         elif intent == IntentType.KNOWLEDGE_QUERY:
-            # Handle knowledge query via RAG
-            rag_result = await rag_engine.query(sanitized_message)
+            # Handle knowledge query via RAG, scoped to the current state first
+            filters = STATE_KNOWLEDGE_FILTERS.get(session.current_state.value)
+            rag_result = await rag_engine.query(sanitized_message, filters=filters)
+            if filters and rag_result["confidence"] < settings.STATE_FILTER_MIN_CONFIDENCE:
+                rag_result = await rag_engine.query(sanitized_message)
             structured_result = {
                 "response": rag_result["answer"],
                 "state_changed": False,
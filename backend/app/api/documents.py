@@ -1,11 +1,22 @@
+import asyncio
+import json
 import logging
 import os
 from datetime import datetime
-from fastapi import APIRouter, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
-from app.core.session import session_manager
+from typing import Any, Awaitable, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Request, Response, UploadFile, File, Form
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from app.core.session import SessionData, session_manager
 from app.config import settings
+from app.core.upload_limit import MULTIPART_OVERHEAD_BYTES
+from app.tools.document_ocr.job_queue import ocr_job_queue
 from app.tools.document_ocr.ocr_engine import ocr_engine
+from app.tools.document_ocr.ocr_pool import OCRQueueFull, OCRUnavailable
+from app.tools.document_ocr.result_cache import ocr_result_cache
+from app.tools.document_ocr.upload_spool import (
+    SpooledUpload, UnsupportedUpload, UploadTooLarge, max_upload_bytes, spool_upload
+)
 
 logger = logging.getLogger(__name__)
 
@@ -13,58 +24,105 @@ router = APIRouter(prefix="/api/documents", tags=["documents"])
 
 SUPPORTED_DOC_TYPES = {"salary_slip", "pan_card", "aadhaar"}
 
+# One file per doc type in a batch upload
+MAX_BATCH_DOCUMENTS = len(SUPPORTED_DOC_TYPES)
 
-@router.post("/upload")
-async def upload_document(session_id: str, doc_type: str, file: UploadFile = File(...)):
+# How often a waiting upload checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.5
+
+# Longest gap between job-status checks on an SSE stream
+JOB_EVENTS_POLL_SECONDS = 1.0
+
+
+def upload_body_limit(path: str) -> Optional[int]:
+    """Request-body cap enforced while streaming (UploadSizeLimitMiddleware)"""
+    if path in (f"{router.prefix}/upload", f"{router.prefix}/jobs"):
+        return max_upload_bytes() + MULTIPART_OVERHEAD_BYTES
+    if path == f"{router.prefix}/batch":
+        return MAX_BATCH_DOCUMENTS * max_upload_bytes() + MULTIPART_OVERHEAD_BYTES
+    return None
+
+
+async def _run_ocr(request: Request, job: Awaitable[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Upload a document and run OCR extraction.
+    Await an OCR job, mapping pool backpressure to HTTP errors and
+    cancelling the job if the client goes away while it waits
     """
-    if doc_type not in SUPPORTED_DOC_TYPES:
-        raise HTTPException(status_code=400, detail="Invalid doc_type")
+    task = asyncio.ensure_future(job)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                logger.info("Client disconnected, OCR job cancelled")
+                # Nobody is listening; 499 is only for the access log
+                raise HTTPException(status_code=499, detail="Client closed request")
+    except OCRQueueFull:
+        raise HTTPException(
+            status_code=429,
+            detail="Document processing is busy. Please retry shortly.",
+            headers={"Retry-After": "5"}
+        )
+    except OCRUnavailable:
+        raise HTTPException(status_code=503, detail="Document processing is unavailable")
+    finally:
+        if not task.done():
+            task.cancel()
 
-    session = await session_manager.get_session(session_id)
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
 
+def _validate_upload(file: UploadFile) -> str:
+    """Check the file name; returns the lower-cased extension"""
     if not file.filename:
         raise HTTPException(status_code=400, detail="Missing file")
 
     ext = os.path.splitext(file.filename)[1].lower()
     if ext not in settings.SUPPORTED_IMAGE_FORMATS:
         raise HTTPException(status_code=400, detail="Unsupported file type")
+    return ext
 
-    file_bytes = await file.read()
-    max_size_bytes = int(settings.MAX_FILE_SIZE_MB * 1024 * 1024)
-    if len(file_bytes) > max_size_bytes:
+
+async def _spool(file: UploadFile, ext: str) -> SpooledUpload:
+    """
+    Stream to a temp file: size and magic bytes are checked chunk by chunk,
+    and OCR workers read the file by path
+    """
+    try:
+        return await spool_upload(file, ext)
+    except UploadTooLarge:
         raise HTTPException(status_code=413, detail="File too large")
+    except UnsupportedUpload as e:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {e}")
 
-    if ext == ".pdf":
-        result = await ocr_engine.process_pdf(file_bytes, doc_type)
-    else:
-        result = await ocr_engine.process_image(file_bytes, doc_type)
 
-    status = result.get("status", "ERROR")
-    confidence = result.get("confidence", 0.0)
-    extracted = result.get("extracted_data", {})
+async def _ocr_file(upload: SpooledUpload, doc_type: str) -> Dict[str, Any]:
+    if upload.ext == ".pdf":
+        return await ocr_engine.process_pdf(upload.path, doc_type)
+    return await ocr_engine.process_image(upload.path, doc_type)
 
+
+def _record_result(session: SessionData, doc_type: str, filename: str, result: Dict[str, Any]):
+    """Write an OCR result into the session's documents / ocr_data slots"""
     documents = session.get_slot("documents") or {}
     documents[doc_type] = {
-        "filename": file.filename,
-        "status": status,
-        "confidence": confidence,
+        "filename": filename,
+        "status": result.get("status", "ERROR"),
+        "confidence": result.get("confidence", 0.0),
         "uploaded_at": datetime.utcnow().isoformat()
     }
     session.update_slot("documents", documents)
 
+    extracted = result.get("extracted_data", {})
     if extracted:
         ocr_data = session.get_slot("ocr_data") or {}
         ocr_data[doc_type] = extracted
         session.update_slot("ocr_data", ocr_data)
 
-    await session_manager.update_session(session)
 
-    # If user is already in document upload stage, keep state as-is.
-    # Otherwise, allow the flow to reach document upload naturally via chat.
+def _upload_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Client-facing view of an OCR result"""
+    status = result.get("status", "ERROR")
 
     if status == "LOW_CONFIDENCE":
         message = "Document unclear. Please re-upload a sharper image."
@@ -77,12 +135,246 @@ async def upload_document(session_id: str, doc_type: str, file: UploadFile = Fil
 
     return {
         "status": status,
-        "confidence": confidence,
-        "extracted_data": extracted,
+        "confidence": result.get("confidence", 0.0),
+        "extracted_data": result.get("extracted_data", {}),
         "message": message
     }
 
 
+@router.post("/upload")
+async def upload_document(
+    request: Request,
+    response: Response,
+    session_id: str,
+    doc_type: str,
+    file: UploadFile = File(...)
+):
+    """
+    Upload a document and run OCR extraction.
+    
+    Byte-identical re-uploads are answered from the OCR result cache;
+    X-OCR-Cache reports HIT or MISS.
+    """
+    if doc_type not in SUPPORTED_DOC_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid doc_type")
+
+    session = await session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    ext = _validate_upload(file)
+
+    with await _spool(file, ext) as upload:
+        cache_key = ocr_result_cache.key_from_digest(upload.sha256, doc_type)
+        result = ocr_result_cache.get(cache_key)
+        response.headers["X-OCR-Cache"] = "HIT" if result is not None else "MISS"
+        response.headers["X-OCR-Cache-Hit-Rate"] = f"{ocr_result_cache.stats()['hit_rate']:.3f}"
+
+        if result is None:
+            result = await _run_ocr(request, _ocr_file(upload, doc_type))
+            ocr_result_cache.put(cache_key, result)
+
+    _record_result(session, doc_type, file.filename, result)
+    await session_manager.update_session(session)
+
+    # If user is already in document upload stage, keep state as-is.
+    # Otherwise, allow the flow to reach document upload naturally via chat.
+
+    return _upload_response(result)
+
+
+async def _ocr_batch_item(doc_type: str, filename: str, upload: SpooledUpload) -> Dict[str, Any]:
+    """
+    OCR one batch document; returns its NDJSON line plus the raw result
+    under "_result" (None when the pool refused the job, so nothing is
+    written to the session and the client may retry that file)
+    """
+    line: Dict[str, Any] = {"type": "document", "doc_type": doc_type, "filename": filename}
+    cache_key = ocr_result_cache.key_from_digest(upload.sha256, doc_type)
+    result = ocr_result_cache.get(cache_key)
+    line["cache"] = "HIT" if result is not None else "MISS"
+
+    if result is None:
+        try:
+            result = await _ocr_file(upload, doc_type)
+        except OCRQueueFull:
+            return {**line, "status": "ERROR", "retry": True,
+                    "message": "Document processing is busy. Please retry shortly.", "_result": None}
+        except OCRUnavailable:
+            return {**line, "status": "ERROR", "retry": True,
+                    "message": "Document processing is unavailable", "_result": None}
+        ocr_result_cache.put(cache_key, result)
+
+    return {**line, **_upload_response(result), "_result": result}
+
+
+@router.post("/batch")
+async def upload_documents_batch(
+    request: Request,
+    session_id: str,
+    files: List[UploadFile] = File(...),
+    doc_types: List[str] = Form(...)
+):
+    """
+    Upload several documents in one request and OCR them concurrently.
+
+    ``doc_types[i]`` names the type of ``files[i]``. The response is NDJSON:
+    one "document" line per file as soon as its OCR finishes (in completion
+    order), then a "complete" line once all results are written to the
+    session in a single update.
+    """
+    if len(files) != len(doc_types):
+        raise HTTPException(status_code=400, detail="Each file needs a doc_type")
+    if len(files) > MAX_BATCH_DOCUMENTS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_DOCUMENTS} documents per batch")
+    if any(doc_type not in SUPPORTED_DOC_TYPES for doc_type in doc_types):
+        raise HTTPException(status_code=400, detail="Invalid doc_type")
+    if len(set(doc_types)) != len(doc_types):
+        raise HTTPException(status_code=400, detail="Duplicate doc_type")
+
+    session = await session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    # Spool everything up front so a bad file fails the request before any OCR
+    uploads: List[SpooledUpload] = []
+
+    def cleanup():
+        for upload in uploads:
+            upload.cleanup()
+
+    try:
+        for file in files:
+            uploads.append(await _spool(file, _validate_upload(file)))
+    except BaseException:
+        cleanup()
+        raise
+
+    items = list(zip(doc_types, [file.filename for file in files], uploads))
+
+    async def results():
+        tasks = [asyncio.ensure_future(_ocr_batch_item(*item)) for item in items]
+        completed = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                line = await next_done
+                result = line.pop("_result")
+                if result is not None:
+                    completed.append((line["doc_type"], line["filename"], result))
+                yield json.dumps(line) + "\n"
+
+            current = await session_manager.get_session(session_id)
+            if current and completed:
+                for doc_type, filename, result in completed:
+                    _record_result(current, doc_type, filename, result)
+                await session_manager.update_session(current)
+            yield json.dumps({
+                "type": "complete",
+                "documents": len(items),
+                "stored": len(completed) if current else 0
+            }) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            cleanup()
+
+    # The generator's finally never runs if streaming never starts (client
+    # gone first); the background task removes the spool files either way.
+    try:
+        return StreamingResponse(
+            results(),
+            media_type="application/x-ndjson",
+            background=BackgroundTask(cleanup)
+        )
+    except BaseException:
+        cleanup()
+        raise
+
+
+async def complete_ocr_job(job: Dict[str, Any], result: Dict[str, Any]):
+    """OCR job queue completion handler: store the result in the session"""
+    session = await session_manager.get_session(job["session_id"])
+    if not session:
+        raise ValueError(f"Session {job['session_id']} not found")
+
+    _record_result(session, job["doc_type"], job["filename"], result)
+    await session_manager.update_session(session)
+
+
+def _job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    view = dict(job)
+    if "result" in view:
+        view["result"] = _upload_response(view["result"])
+    view["status_url"] = f"{router.prefix}/jobs/{job['job_id']}"
+    view["events_url"] = f"{router.prefix}/jobs/{job['job_id']}/events"
+    return view
+
+
+@router.post("/jobs", status_code=202)
+async def create_ocr_job(session_id: str, doc_type: str, file: UploadFile = File(...)):
+    """
+    Queue a document for OCR and return a job id immediately
+
+    Poll GET /jobs/{job_id} or subscribe to GET /jobs/{job_id}/events
+    (server-sent events); the result is written into the session when the
+    job finishes.
+    """
+    if doc_type not in SUPPORTED_DOC_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid doc_type")
+
+    session = await session_manager.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+
+    ext = _validate_upload(file)
+    upload = await _spool(file, ext)
+    try:
+        job = await ocr_job_queue.enqueue(
+            session_id, doc_type, file.filename, upload.path, upload.ext, upload.sha256
+        )
+    except Exception:
+        upload.cleanup()
+        raise
+
+    return _job_view(job)
+
+
+@router.get("/jobs/{job_id}")
+async def get_ocr_job(job_id: str):
+    """Current status of an OCR job (and its result once finished)"""
+    job = await ocr_job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_view(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_ocr_job(request: Request, job_id: str):
+    """Server-sent events: one "status" event per state change, ending when the job finishes"""
+    job = await ocr_job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        last_status = None
+        while True:
+            job = await ocr_job_queue.get(job_id)
+            if job is None:
+                return
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: status\ndata: {json.dumps(_job_view(job))}\n\n"
+            if job["status"] in ("done", "failed") or await request.is_disconnected():
+                return
+            await ocr_job_queue.wait_for_change(JOB_EVENTS_POLL_SECONDS)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/download/{session_id}")
 async def download_decision_document(session_id: str):
     """
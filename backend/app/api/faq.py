@@ -1,6 +1,10 @@
+import json
 import logging
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from app.config import settings
 from app.tools.rag.rag_engine import rag_engine
 
 logger = logging.getLogger(__name__)
@@ -10,6 +14,8 @@ router = APIRouter(prefix="/api/faq", tags=["faq"])
 
 class FAQRequest(BaseModel):
     question: str
+    # Optional metadata filter, e.g. {"category": ["eligibility", "interest_rates"]}
+    filters: Optional[Dict[str, Any]] = None
 
 
 class FAQResponse(BaseModel):
@@ -18,6 +24,14 @@ class FAQResponse(BaseModel):
     confidence: float
 
 
+class FAQBatchRequest(BaseModel):
+    questions: List[str]
+    top_k: int = 3
+    filters: Optional[Dict[str, Any]] = None
+    # None = stream NDJSON only when the batch exceeds FAQ_BATCH_STREAM_THRESHOLD
+    stream: Optional[bool] = None
+
+
 @router.post("/ask", response_model=FAQResponse)
 async def ask_question(request: FAQRequest):
     """
@@ -26,7 +40,7 @@ async def ask_question(request: FAQRequest):
     Answers loan policy questions without session context
     """
     try:
-        result = await rag_engine.query(request.question, top_k=3)
+        result = await rag_engine.query(request.question, top_k=3, filters=request.filters)
         
         return FAQResponse(
             answer=result["answer"],
@@ -37,3 +51,72 @@ async def ask_question(request: FAQRequest):
     except Exception as e:
         logger.error(f"Error in FAQ query: {e}")
         raise HTTPException(status_code=500, detail="Failed to process question")
+
+
+@router.post("/ask-batch")
+async def ask_questions_batch(request: FAQBatchRequest):
+    """
+    Batch FAQ endpoint
+    
+    Encodes all questions in one batch and scores them against the knowledge
+    base with one matrix multiplication per chunk. Large batches stream one
+    NDJSON line per question as chunks complete.
+    """
+    if len(request.questions) > settings.FAQ_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.FAQ_BATCH_MAX_QUESTIONS} questions per batch"
+        )
+    if not 1 <= request.top_k <= 20:
+        raise HTTPException(status_code=400, detail="top_k must be between 1 and 20")
+    
+    stream = request.stream
+    if stream is None:
+        stream = len(request.questions) > settings.FAQ_BATCH_STREAM_THRESHOLD
+    
+    if not stream:
+        try:
+            results = await rag_engine.query_batch(request.questions, top_k=request.top_k, filters=request.filters)
+        except Exception as e:
+            logger.error(f"Error in FAQ batch query: {e}")
+            raise HTTPException(status_code=500, detail="Failed to process questions")
+        
+        return {
+            "results": [
+                {"index": i, "question": q, **_faq_payload(r)}
+                for i, (q, r) in enumerate(zip(request.questions, results))
+            ]
+        }
+    
+    async def ndjson_lines():
+        chunk_size = settings.FAQ_BATCH_CHUNK_SIZE
+        for start in range(0, len(request.questions), chunk_size):
+            chunk = request.questions[start:start + chunk_size]
+            try:
+                results = await rag_engine.query_batch(chunk, top_k=request.top_k, filters=request.filters)
+            except Exception as e:
+                logger.error(f"Error in FAQ batch query: {e}")
+                for offset, question in enumerate(chunk):
+                    yield json.dumps({
+                        "index": start + offset,
+                        "question": question,
+                        "error": "Failed to process question"
+                    }) + "\n"
+                continue
+            
+            for offset, (question, result) in enumerate(zip(chunk, results)):
+                yield json.dumps({
+                    "index": start + offset,
+                    "question": question,
+                    **_faq_payload(result)
+                }, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
+
+
+def _faq_payload(result: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "answer": result["answer"],
+        "sources": result["sources"],
+        "confidence": result["confidence"]
+    }
@@ -37,8 +37,85 @@ class Settings(BaseSettings):
     # OCR Configuration - Windows Auto-detection
     OCR_CONFIDENCE_THRESHOLD: float = 0.6
     TESSERACT_CMD: Optional[str] = None
+    OCR_WORKERS: int = 2  # preforked OCR processes (0 = run on a thread)
+    OCR_THREAD_LIMIT: int = 1  # OMP_THREAD_LIMIT inside each worker
+    OCR_MAX_QUEUE: int = 8  # jobs allowed to wait before uploads get 429
+    OCR_ENGINE: str = "auto"  # auto | tesserocr | pytesseract
+    OCR_PARALLEL_PASSES: int = 1  # >1 spreads one image's passes across workers (more slots per upload)
+    OCR_CACHE_SIZE: int = 256  # OCR results kept in memory, keyed by file hash
+    OCR_CACHE_DIR: Optional[str] = None  # e.g. ./ocr_cache for a persistent tier
+    OCR_PDF_TEXT_PAGES: int = 3  # PDF pages read for a text layer
+    OCR_PDF_MAX_PAGES: int = 3  # scanned-PDF pages considered for OCR
+    OCR_PDF_DPI_STEPS: list = [150, 300]  # rasterization DPI, escalated only on failure
+    OCR_IMAGE_MAX_EDGE: int = 2000  # uploaded photos are decoded/downscaled to this long edge
+    OCR_ROI_ENABLED: bool = True  # read PAN/Aadhaar template regions before full-image passes
+    OCR_JOB_DB: str = "./ocr_jobs/jobs.sqlite3"  # persistent async OCR job queue
+    OCR_JOB_DIR: str = "./ocr_jobs/files"  # uploads waiting in the job queue
+    OCR_JOB_CONSUMERS: int = 2
+    OCR_JOB_RETENTION_HOURS: int = 24  # finished jobs kept for status polling
+    OCR_JOB_LEASE_SECONDS: int = 120  # a running job is re-queued once its worker stops renewing this
     SUPPORTED_IMAGE_FORMATS: list = [".jpg", ".jpeg", ".png", ".pdf"]
     MAX_FILE_SIZE_MB: int = 10
+    UPLOAD_CHUNK_SIZE: int = 64 * 1024  # bytes read per chunk while streaming uploads
+    UPLOAD_TMP_DIR: Optional[str] = None  # spooled uploads (default: system temp)
+    
+    # Embeddings
+    EMBEDDING_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_CACHE_DIR: str = "./embedding_cache"
+    QUERY_CACHE_SIZE: int = 1024  # query embeddings kept in the LRU
+    QUERY_BATCH_WINDOW_MS: float = 3.0
+    QUERY_BATCH_MAX: int = 32
+    EMBEDDING_WORKERS: int = 2  # dedicated encode threads
+    EMBEDDING_MAX_QUEUE: int = 64
+    EMBEDDING_TORCH_THREADS: int = 0  # 0 = torch default
+    EMBEDDING_BACKEND: str = "torch"  # torch | onnx
+    EMBEDDING_ONNX_DIR: str = "./onnx_models/all-MiniLM-L6-v2"
+    EMBEDDING_ONNX_QUANTIZED: bool = True  # int8 dynamic-quantized graph
+    
+    # Knowledge Base Ingestion
+    KNOWLEDGE_BASE_DIR: str = "./knowledge_base"
+    KB_CHUNK_SIZE: int = 200  # words per chunk
+    KB_CHUNK_OVERLAP: int = 40
+    KB_INGEST_BATCH_SIZE: int = 256
+    KB_SNAPSHOT_HISTORY: int = 3  # versions kept for rollback
+    ADMIN_API_KEY: Optional[str] = None
+    
+    # Semantic Answer Cache
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_SIZE: int = 2048
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92  # cosine similarity of questions
+    SEMANTIC_CACHE_TTL: int = 3600
+    
+    # Metadata fields with value -> bitmap indexes (others are filtered by scan)
+    METADATA_INDEX_FIELDS: list = ["category", "source"]
+    STATE_FILTER_MIN_CONFIDENCE: float = 0.45  # below this, retry a state-scoped query unfiltered
+    
+    # Batch FAQ
+    FAQ_BATCH_MAX_QUESTIONS: int = 1000
+    FAQ_BATCH_STREAM_THRESHOLD: int = 50  # stream NDJSON above this many questions
+    FAQ_BATCH_CHUNK_SIZE: int = 64
+    
+    # Hybrid Retrieval (BM25 + dense, reciprocal-rank fusion)
+    HYBRID_SEARCH: bool = True
+    HYBRID_RRF_K: int = 60
+    HYBRID_FUSION_DEPTH: int = 20  # results taken from each ranker
+    HYBRID_PRUNE_MIN_DOCS: int = 20000  # prune dense scoring via the inverted index above this
+    
+    # Embedding Quantization - "none", "int8" or "binary" first pass + float32 rescoring
+    EMBEDDING_QUANTIZATION: str = "none"
+    QUANTIZATION_RESCORE_FACTOR: int = 4
+    
+    # Vector Index - "exact" (NumPy matrix) or "faiss" (ANN)
+    VECTOR_INDEX_BACKEND: str = "exact"
+    FAISS_INDEX_TYPE: str = "auto"  # auto | flat | ivf | hnsw
+    FAISS_INDEX_PATH: str = "./vector_index/policy.faiss"
+    FAISS_HNSW_MIN_DOCS: int = 5000
+    FAISS_IVF_MIN_DOCS: int = 200000
+    FAISS_HNSW_M: int = 32
+    FAISS_HNSW_EF_CONSTRUCTION: int = 200
+    FAISS_HNSW_EF_SEARCH: int = 64
+    FAISS_IVF_NPROBE: int = 16
     
     # PDF Generation
     OUTPUT_PDF_DIR: str = "./generated_documents"
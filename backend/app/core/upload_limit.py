@@ -0,0 +1,83 @@
+import logging
+from typing import Callable, Optional
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Room for multipart boundaries, part headers and query-free form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class _BodyTooLarge(HTTPException):
+    """Raised from receive(); FastAPI re-raises HTTPExceptions from body parsing"""
+
+    def __init__(self):
+        super().__init__(status_code=413, detail="File too large")
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized request bodies while they stream in
+
+    A declared Content-Length over the limit is refused before any body is
+    read; otherwise bytes are counted as they arrive and the request is cut
+    off with 413 the moment the limit is crossed, so the multipart parser
+    never spools an oversized upload to disk. ``limit_for(path)`` returns
+    the byte limit for a path, or None for no limit.
+    """
+
+    def __init__(self, app: ASGIApp, limit_for: Callable[[str], Optional[int]]):
+        self.app = app
+        self.limit_for = limit_for
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limit_for(scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    break
+                if declared > limit:
+                    await self._reject(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise _BodyTooLarge()
+            return message
+
+        async def tracking_send(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except _BodyTooLarge:
+            logger.info(f"Upload to {scope['path']} cut off at {received} bytes (limit {limit})")
+            if not response_started:
+                await self._reject(scope, receive, send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send):
+        response = JSONResponse({"detail": "File too large"}, status_code=413, headers={"Connection": "close"})
+        await response(scope, receive, send)
@@ -3,8 +3,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.config import settings
-from app.api import chat, faq, consent, underwriting, documents
+from app.core.upload_limit import UploadSizeLimitMiddleware
+from app.api import chat, faq, consent, underwriting, documents, admin
 from app.tools.rag.rag_engine import rag_engine
+from app.tools.rag.embedding_executor import embedding_executor
+from app.tools.document_ocr.ocr_pool import ocr_pool
+from app.tools.document_ocr.job_queue import ocr_job_queue
 
 # Configure logging
 logging.basicConfig(
@@ -25,10 +29,16 @@ async def lifespan(app: FastAPI):
     await rag_engine.initialize()
     logger.info("RAG engine initialized")
     
+    await ocr_pool.start()
+    await ocr_job_queue.start(documents.complete_ocr_job)
+    
     yield
     
     # Shutdown
     logger.info("Shutting down TIA-Sales Personal Loan Agent")
+    await ocr_job_queue.stop()
+    embedding_executor.shutdown()
+    ocr_pool.shutdown()
 
 
 app = FastAPI(
@@ -46,12 +56,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Cut oversized uploads off while they stream in
+app.add_middleware(UploadSizeLimitMiddleware, limit_for=documents.upload_body_limit)
+
 # Include routers
 app.include_router(chat.router)
 app.include_router(faq.router)
 app.include_router(consent.router)
 app.include_router(underwriting.router)
 app.include_router(documents.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -0,0 +1,184 @@
+import re
+from typing import Any, Dict, Iterator, List, Match, Optional, Pattern, Tuple, Type
+
+
+class FieldExtractor:
+    """
+    Structured fields from the OCR / PDF text of one document type
+
+    Subclasses set ``doc_type`` and ``required_fields`` (the fields that
+    make a document complete, so remaining OCR passes and pages are
+    skipped), implement ``extract`` with patterns compiled at import, and
+    are registered with ``@register_extractor``.
+    """
+
+    doc_type: str = ""
+    required_fields: Tuple[str, ...] = ()
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def is_complete(self, data: Dict[str, Any]) -> bool:
+        return bool(self.required_fields) and all(data.get(field) for field in self.required_fields)
+
+
+_EXTRACTORS: Dict[str, FieldExtractor] = {}
+
+
+def register_extractor(cls: Type[FieldExtractor]) -> Type[FieldExtractor]:
+    """Class decorator: make ``cls`` the extractor for its doc_type"""
+    if not cls.doc_type:
+        raise ValueError(f"{cls.__name__} has no doc_type")
+    _EXTRACTORS[cls.doc_type] = cls()
+    return cls
+
+
+def get_extractor(doc_type: str) -> Optional[FieldExtractor]:
+    return _EXTRACTORS.get(doc_type)
+
+
+def extract_fields(text: str, doc_type: str) -> Dict[str, Any]:
+    """Extract structured data based on document type"""
+    extractor = _EXTRACTORS.get(doc_type)
+    return extractor.extract(text) if extractor else {}
+
+
+def has_required_fields(doc_type: str, extracted_data: Dict[str, Any]) -> bool:
+    extractor = _EXTRACTORS.get(doc_type)
+    return extractor.is_complete(extracted_data) if extractor else False
+
+
+def _first_group(patterns: List[Pattern], text: str) -> Optional[str]:
+    """Group 1 of the first pattern (in priority order) that matches"""
+    for pattern in patterns:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+
+@register_extractor
+class SalarySlipExtractor(FieldExtractor):
+    doc_type = "salary_slip"
+    required_fields = ("monthly_salary",)
+
+    SALARY_PATTERNS = [
+        re.compile(r'(?:gross|net|basic)\s*(?:salary|pay)?\s*:?\s*₹?\s*([\d,]+)', re.IGNORECASE),
+        re.compile(r'₹\s*([\d,]+)', re.IGNORECASE),
+    ]
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        data = {}
+        salary = _first_group(self.SALARY_PATTERNS, text)
+        if salary:
+            data["monthly_salary"] = salary.replace(',', '')
+        return data
+
+
+@register_extractor
+class PanCardExtractor(FieldExtractor):
+    doc_type = "pan_card"
+    required_fields = ("pan_number",)
+
+    PAN_PATTERN = re.compile(r'\b([A-Z]{5}\d{4}[A-Z])\b')
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        data = {}
+        match = self.PAN_PATTERN.search(text)
+        if match:
+            data["pan_number"] = match.group(1)
+        return data
+
+
+@register_extractor
+class AadhaarExtractor(FieldExtractor):
+    doc_type = "aadhaar"
+    required_fields = ("aadhaar_number", "name")
+
+    # OCR may insert spaces, dashes, or misread separators
+    AADHAAR_PATTERNS = [
+        re.compile(r'(\d{4}\s?\d{4}\s?\d{4})'),                          # 6826 4584 5686
+        re.compile(r'(\d{4}[\s\-\.]{0,2}\d{4}[\s\-\.]{0,2}\d{4})'),      # with separators
+        re.compile(r'(\d{12})'),                                          # continuous 12 digits
+    ]
+    NON_DIGIT = re.compile(r'\D')
+
+    # English name on the line(s) before DOB/Date of Birth/जन्म. Searching
+    # only up to the last DOB label finds what `name\s*\n.*?DOB` (DOTALL)
+    # did, without rescanning the rest of the text from every candidate.
+    NAME_LINE = re.compile(r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})\s*\n', re.IGNORECASE)
+    DOB_LABEL = re.compile(r'DOB|Date\s*of\s*Birth|जन्म', re.IGNORECASE)
+    NAME_PATTERNS = [
+        # S/O, D/O, W/O, C/O patterns (back of card)
+        re.compile(r'(?:S/?O|D/?O|W/?O|C/?O)\s*[:\-]?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})', re.IGNORECASE),
+        # Name: or name label
+        re.compile(r'(?:name|नाम)\s*[:\-]?\s*([A-Za-z ]{3,40})', re.IGNORECASE),
+        # Standalone line of 2-4 capitalized words (likely a name)
+        re.compile(r'(?:^|\n)\s*([A-Z][a-z]{2,}\s+[A-Z][a-z]{2,}(?:\s+[A-Z][a-z]{2,})?)\s*(?:\n|$)', re.IGNORECASE),
+    ]
+    HAS_DIGIT = re.compile(r'\d')
+    NAME_BOILERPLATE = {"government", "india", "authority", "unique",
+                        "identification", "aadhaar", "male", "female",
+                        "proof", "identity", "address", "date", "birth"}
+
+    DOB_PATTERNS = [
+        re.compile(r'(?:DOB|Date\s*of\s*Birth|जन्म\s*तिथि)\s*[:/\-]?\s*(\d{2}[/\-\.]\d{2}[/\-\.]\d{4})', re.IGNORECASE),
+        re.compile(r'(\d{2}/\d{2}/\d{4})', re.IGNORECASE),
+    ]
+    GENDER_PATTERN = re.compile(r'\b(MALE|FEMALE|male|female|पुरुष|महिला)\b')
+    GENDER_NAMES = {'पुरुष': 'MALE', 'महिला': 'FEMALE'}
+
+    def extract(self, text: str) -> Dict[str, Any]:
+        data = {}
+
+        aadhaar_number = self._aadhaar_number(text)
+        if aadhaar_number:
+            data["aadhaar_number"] = aadhaar_number
+
+        name = self._name(text)
+        if name:
+            data["name"] = name
+
+        dob = _first_group(self.DOB_PATTERNS, text)
+        if dob:
+            data["dob"] = dob.strip()
+
+        gender_match = self.GENDER_PATTERN.search(text)
+        if gender_match:
+            gender = gender_match.group(1).upper()
+            data["gender"] = self.GENDER_NAMES.get(gender, gender)
+        return data
+
+    def _aadhaar_number(self, text: str) -> Optional[str]:
+        for pattern in self.AADHAAR_PATTERNS:
+            for candidate in pattern.findall(text):
+                digits = self.NON_DIGIT.sub('', candidate)
+                # Valid Aadhaar: 12 digits, first digit != 0 or 1
+                if len(digits) == 12 and digits[0] not in ('0', '1'):
+                    return candidate.strip()
+        return None
+
+    def _name_matches(self, text: str) -> Iterator[Optional[Match]]:
+        """First match of each name pattern, in priority order"""
+        last_label = None
+        for last_label in self.DOB_LABEL.finditer(text):
+            pass
+        if last_label is not None:
+            yield self.NAME_LINE.search(text, 0, last_label.start())
+        for pattern in self.NAME_PATTERNS:
+            yield pattern.search(text)
+
+    def _name(self, text: str) -> Optional[str]:
+        for match in self._name_matches(text):
+            if match is None:
+                continue
+            name = match.group(1).strip()
+            # Filter out garbage: must have at least 2 words, no digits,
+            # no common Aadhaar boilerplate words
+            words = name.lower().split()
+            if (len(name) > 4
+                and len(words) >= 2
+                and not self.HAS_DIGIT.search(name)
+                and not any(w in self.NAME_BOILERPLATE for w in words)):
+                return name
+        return None
@@ -0,0 +1,413 @@
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+from uuid import uuid4
+from app.config import settings
+from app.tools.document_ocr.ocr_engine import ocr_engine
+from app.tools.document_ocr.ocr_pool import OCRQueueFull, OCRUnavailable
+from app.tools.document_ocr.result_cache import ocr_result_cache
+
+logger = logging.getLogger(__name__)
+
+# Seconds a consumer waits for a wake-up before polling the table again
+IDLE_POLL_SECONDS = 2.0
+
+# Back-off when the OCR pool itself is saturated
+POOL_BUSY_BACKOFF_SECONDS = 1.0
+
+# Seconds between maintenance runs: re-queue jobs whose lease expired and
+# delete finished jobs older than OCR_JOB_RETENTION_HOURS
+MAINTENANCE_INTERVAL_SECONDS = 60.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_jobs (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    doc_type TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    path TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    owner TEXT,
+    lease_expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS ocr_jobs_queue ON ocr_jobs (status, created_at);
+"""
+
+# Columns added after the first release, for databases created before them
+MIGRATED_COLUMNS = [("owner", "TEXT"), ("lease_expires_at", "REAL")]
+
+CompletionHandler = Callable[[Dict[str, Any], Dict[str, Any]], Awaitable[None]]
+
+
+class OCRJobQueue:
+    """
+    Persistent OCR job queue on SQLite
+
+    Uploads are enqueued with their spooled file moved under OCR_JOB_DIR, so
+    queued work survives a restart. OCR_JOB_CONSUMERS tasks claim jobs
+    oldest-first and run them through the OCR pool; the completion handler
+    writes the result into the session. Several processes may share the
+    database: a claimed job is leased to its worker, which renews the lease
+    while the job runs, and only jobs whose lease expired (their worker
+    died) are re-queued. Finished jobs (and their results) are deleted once
+    older than OCR_JOB_RETENTION_HOURS. Both checks run at start and
+    periodically while consumers run.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, job_dir: Optional[str] = None):
+        self.db_path = db_path or settings.OCR_JOB_DB
+        self.job_dir = job_dir or settings.OCR_JOB_DIR
+        self.consumers = settings.OCR_JOB_CONSUMERS
+        self.lease_seconds = settings.OCR_JOB_LEASE_SECONDS
+        # Lease owner: unique per process start, across hosts sharing the DB
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid4().hex[:8]}"
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._changed: Optional[asyncio.Condition] = None
+        self._on_complete: Optional[CompletionHandler] = None
+        self._busy = 0
+        self._last_maintenance: Optional[float] = None
+
+    async def start(self, on_complete: CompletionHandler):
+        """Create the schema, re-queue abandoned jobs and start consumers"""
+        self._on_complete = on_complete
+        self._wakeup = asyncio.Event()
+        self._changed = asyncio.Condition()
+        os.makedirs(self.job_dir, exist_ok=True)
+        await asyncio.to_thread(self._init_schema)
+        await self._maintain_if_due()
+        self._tasks = [asyncio.create_task(self._consume(i)) for i in range(self.consumers)]
+        self._wakeup.set()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, session_id: str, doc_type: str, filename: str, path: str, ext: str, sha256: str) -> Dict[str, Any]:
+        """Queue an upload; takes ownership of the file at ``path``"""
+        job_id = str(uuid4())
+        job_path = os.path.join(self.job_dir, f"{job_id}{ext}")
+        # Spooled uploads may live on another filesystem (system temp)
+        await asyncio.to_thread(shutil.move, path, job_path)
+        job = {
+            "id": job_id,
+            "session_id": session_id,
+            "doc_type": doc_type,
+            "filename": filename,
+            "path": job_path,
+            "ext": ext,
+            "sha256": sha256,
+            "status": "queued",
+            "created_at": time.time()
+        }
+        try:
+            await asyncio.to_thread(self._insert, job)
+        except BaseException:
+            # No row will ever point at the file
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(job_path)
+            raise
+        if self._wakeup is not None:
+            self._wakeup.set()
+        await self._notify()
+        return self._public(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await asyncio.to_thread(self._fetch, job_id)
+        return self._public(job) if job else None
+
+    async def wait_for_change(self, timeout: float):
+        """Block until any job changes state in this process (or timeout)"""
+        if self._changed is None:
+            await asyncio.sleep(timeout)
+            return
+        async with self._changed:
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = await asyncio.to_thread(self._counts)
+        return {
+            "queue_depth": counts.get("queued", 0),
+            "running": counts.get("running", 0),
+            "done": counts.get("done", 0),
+            "failed": counts.get("failed", 0),
+            "consumers": self.consumers,
+            "busy_consumers": self._busy,
+            "consumer_utilization": self._busy / self.consumers if self.consumers else 0.0,
+            "oldest_queued_age_s": counts.get("oldest_queued_age_s", 0.0)
+        }
+
+    async def _consume(self, index: int):
+        while True:
+            await self._maintain_if_due()
+            job = await asyncio.to_thread(self._claim)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), IDLE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._busy += 1
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"OCR job {job['id']} consumer error: {e}")
+            finally:
+                self._busy -= 1
+
+    async def _run(self, job: Dict[str, Any]):
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"]))
+        try:
+            await self._process(job)
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        """Renew the job's lease while it runs so no other worker re-queues it"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                renewed = await asyncio.to_thread(self._renew, job_id)
+            except sqlite3.Error as e:
+                logger.warning(f"OCR job {job_id}: could not renew lease: {e}")
+                continue
+            if not renewed:
+                logger.warning(f"OCR job {job_id}: lease lost to another worker")
+                return
+
+    async def _process(self, job: Dict[str, Any]):
+        await self._notify()
+        cache_key = ocr_result_cache.key_from_digest(job["sha256"], job["doc_type"])
+        result = ocr_result_cache.get(cache_key)
+        try:
+            if result is None:
+                if job["ext"] == ".pdf":
+                    result = await ocr_engine.process_pdf(job["path"], job["doc_type"])
+                else:
+                    result = await ocr_engine.process_image(job["path"], job["doc_type"])
+                ocr_result_cache.put(cache_key, result)
+        except (OCRQueueFull, OCRUnavailable) as e:
+            # Not the document's fault: put it back and let the pool drain
+            logger.warning(f"OCR job {job['id']} deferred: {e}")
+            await asyncio.to_thread(self._requeue, job["id"])
+            await asyncio.sleep(POOL_BUSY_BACKOFF_SECONDS)
+            return
+        except Exception as e:
+            logger.error(f"OCR job {job['id']} failed: {e}")
+            result = {"status": "ERROR", "error": str(e)}
+
+        if not await asyncio.to_thread(self._renew, job["id"]):
+            # Our lease expired and another worker owns the job (and its file)
+            logger.warning(f"OCR job {job['id']}: lease lost, leaving the result to its new owner")
+            return
+
+        error = None
+        try:
+            await self._on_complete(job, result)
+        except Exception as e:
+            error = f"Could not store result: {e}"
+            logger.error(f"OCR job {job['id']}: {error}")
+
+        await asyncio.to_thread(self._finish, job["id"], result, error)
+        try:
+            os.unlink(job["path"])
+        except FileNotFoundError:
+            pass
+        await self._notify()
+
+    async def _maintain_if_due(self):
+        now = time.monotonic()
+        if self._last_maintenance is not None and now - self._last_maintenance < MAINTENANCE_INTERVAL_SECONDS:
+            return
+        self._last_maintenance = now
+        try:
+            requeued = await asyncio.to_thread(self._requeue_expired)
+            purged = await asyncio.to_thread(self._purge)
+        except sqlite3.Error as e:
+            logger.warning(f"OCR job queue maintenance failed: {e}")
+            return
+        if requeued:
+            logger.info(f"Re-queued {requeued} OCR jobs whose worker stopped renewing its lease")
+            self._wakeup.set()
+        if purged:
+            logger.info(f"Purged {purged} finished OCR jobs")
+
+    async def _notify(self):
+        if self._changed is not None:
+            async with self._changed:
+                self._changed.notify_all()
+
+    def _public(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Job as returned by the API (no file path)"""
+        public = {
+            "job_id": job["id"],
+            "session_id": job["session_id"],
+            "doc_type": job["doc_type"],
+            "filename": job["filename"],
+            "status": job["status"],
+            "created_at": job["created_at"],
+            "started_at": job.get("started_at"),
+            "finished_at": job.get("finished_at")
+        }
+        if job.get("result"):
+            public["result"] = job["result"]
+        if job.get("error"):
+            public["error"] = job["error"]
+        return public
+
+    # SQLite helpers (run on a thread; one short-lived connection each)
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        # Autocommit; _claim opens its own write transaction
+        conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _init_schema(self):
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Under the write lock, so concurrent starts add each column once
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                columns = {row["name"] for row in conn.execute("PRAGMA table_info(ocr_jobs)")}
+                for name, sql_type in MIGRATED_COLUMNS:
+                    if name not in columns:
+                        conn.execute(f"ALTER TABLE ocr_jobs ADD COLUMN {name} {sql_type}")
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _requeue_expired(self) -> int:
+        """Re-queue running jobs whose owner stopped renewing the lease"""
+        with self._connect() as conn:
+            # NULL: left running by a version without leases
+            return conn.execute(
+                "UPDATE ocr_jobs SET status = 'queued', started_at = NULL, owner = NULL, lease_expires_at = NULL "
+                "WHERE status = 'running' AND (lease_expires_at IS NULL OR lease_expires_at < ?)",
+                (time.time(),)
+            ).rowcount
+
+    def _purge(self) -> int:
+        cutoff = time.time() - settings.OCR_JOB_RETENTION_HOURS * 3600
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM ocr_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (cutoff,)
+            ).rowcount
+
+    def _insert(self, job: Dict[str, Any]):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO ocr_jobs (id, session_id, doc_type, filename, path, ext, sha256, status, created_at) "
+                "VALUES (:id, :session_id, :doc_type, :filename, :path, :ext, :sha256, :status, :created_at)",
+                job
+            )
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job to running"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT * FROM ocr_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                started_at = time.time()
+                conn.execute(
+                    "UPDATE ocr_jobs SET status = 'running', started_at = ?, owner = ?, lease_expires_at = ? "
+                    "WHERE id = ?",
+                    (started_at, self.worker_id, started_at + self.lease_seconds, row["id"])
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        job = dict(row)
+        job["status"] = "running"
+        job["started_at"] = started_at
+        job["owner"] = self.worker_id
+        job["lease_expires_at"] = started_at + self.lease_seconds
+        return job
+
+    def _renew(self, job_id: str) -> bool:
+        """Extend this worker's lease; False once another worker owns the job"""
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE ocr_jobs SET lease_expires_at = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, job_id, self.worker_id)
+            ).rowcount == 1
+
+    def _requeue(self, job_id: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE ocr_jobs SET status = 'queued', started_at = NULL, owner = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND owner = ?",
+                (job_id, self.worker_id)
+            )
+
+    def _finish(self, job_id: str, result: Dict[str, Any], error: Optional[str]):
+        status = "failed" if error or result.get("status") == "ERROR" else "done"
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE ocr_jobs SET status = ?, result = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                "WHERE id = ? AND owner = ?",
+                (status, json.dumps(result, ensure_ascii=False), error or result.get("error"), time.time(),
+                 job_id, self.worker_id)
+            )
+
+    def _fetch(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM ocr_jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        if job["result"]:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def _counts(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            counts: Dict[str, Any] = {
+                row["status"]: row["n"]
+                for row in conn.execute("SELECT status, COUNT(*) AS n FROM ocr_jobs GROUP BY status")
+            }
+            oldest = conn.execute(
+                "SELECT MIN(created_at) FROM ocr_jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+        counts["oldest_queued_age_s"] = time.time() - oldest if oldest else 0.0
+        return counts
+
+
+ocr_job_queue = OCRJobQueue()
@@ -0,0 +1,138 @@
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# ID-1 card (PAN, Aadhaar): 85.6 x 54 mm
+ID1_ASPECT = 85.6 / 54.0
+
+# Width the located card is warped to before cropping
+CARD_WIDTH = 1400
+
+# Card detection runs on a copy no larger than this
+DETECT_MAX_EDGE = 800
+
+# A detected quadrilateral must cover this share of the photo to count as the card
+MIN_CARD_AREA = 0.2
+
+# Field regions as fractions of the upright card (x0, y0, x1, y1), with the
+# page-segmentation mode each crop is read with (6 = block, 7 = single line).
+# Region texts are joined in order, so the extraction regexes see the same
+# line sequence as on the card. Salary slips have no fixed layout and are
+# always OCRed in full.
+LAYOUT_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "pan_card": {
+        "aspect": ID1_ASPECT,
+        "regions": [
+            ("pan_number", (0.02, 0.18, 0.75, 0.45), 6),  # 2018+ layout: under the card title
+            ("pan_number", (0.02, 0.55, 0.75, 0.82), 6),  # older layout: above the signature
+        ],
+    },
+    "aadhaar": {
+        "aspect": ID1_ASPECT,
+        "regions": [
+            ("details", (0.26, 0.20, 0.98, 0.68), 6),  # name, DOB, gender (right of the photo)
+            ("aadhaar_number", (0.15, 0.70, 0.85, 0.92), 7),
+        ],
+    },
+}
+
+# (field, crop, psm)
+Region = Tuple[str, Image.Image, int]
+
+
+def has_layout_template(doc_type: str) -> bool:
+    return doc_type in LAYOUT_TEMPLATES
+
+
+@lru_cache(maxsize=1)
+def _cv2():
+    try:
+        import cv2
+        return cv2
+    except Exception as e:
+        logger.warning(f"OpenCV unavailable, card detection disabled: {e}")
+        return None
+
+
+def _order_corners(points: np.ndarray) -> np.ndarray:
+    """Top-left, top-right, bottom-right, bottom-left"""
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array([
+        points[np.argmin(sums)],
+        points[np.argmin(diffs)],
+        points[np.argmax(sums)],
+        points[np.argmax(diffs)],
+    ], dtype=np.float32)
+
+
+def _find_card(gray: np.ndarray) -> Optional[np.ndarray]:
+    """Corners of the largest quadrilateral outline in the photo, or None"""
+    cv2 = _cv2()
+    if cv2 is None:
+        return None
+
+    height, width = gray.shape
+    scale = min(1.0, DETECT_MAX_EDGE / max(height, width))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale < 1.0 else gray
+    edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    min_area = MIN_CARD_AREA * small.shape[0] * small.shape[1]
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < min_area:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4:
+            return _order_corners(approx.reshape(4, 2).astype(np.float32) / scale)
+    return None
+
+
+def _upright_card(gray: np.ndarray, aspect: float) -> np.ndarray:
+    """The card cut out and deskewed (or the whole image), in landscape"""
+    cv2 = _cv2()
+    corners = _find_card(gray)
+    if corners is not None:
+        top = np.linalg.norm(corners[1] - corners[0])
+        side = np.linalg.norm(corners[3] - corners[0])
+        portrait = side > top
+        width, height = (CARD_WIDTH, int(CARD_WIDTH / aspect))
+        if portrait:
+            width, height = height, width
+        target = np.array([[0, 0], [width - 1, 0], [width - 1, height - 1], [0, height - 1]], dtype=np.float32)
+        matrix = cv2.getPerspectiveTransform(corners, target)
+        gray = cv2.warpPerspective(gray, matrix, (width, height), flags=cv2.INTER_LINEAR)
+
+    if gray.shape[0] > gray.shape[1]:
+        gray = np.ascontiguousarray(np.rot90(gray, k=-1))
+    return gray
+
+
+def layout_regions(image: Image.Image, doc_type: str) -> List[List[Region]]:
+    """
+    Template crops of a card photo, one list per orientation to try
+
+    The card is located (largest quadrilateral outline), perspective
+    corrected and turned to landscape; as upside-down cannot be told from
+    the outline, the 180-degree rotation is the second candidate. Empty
+    when ``doc_type`` has no template.
+    """
+    template = LAYOUT_TEMPLATES.get(doc_type)
+    if template is None:
+        return []
+
+    card = _upright_card(np.asarray(image.convert("L")), template["aspect"])
+    candidates = []
+    for upright in (card, np.ascontiguousarray(card[::-1, ::-1])):
+        height, width = upright.shape
+        regions = []
+        for field, (x0, y0, x1, y1), psm in template["regions"]:
+            crop = upright[int(y0 * height):int(y1 * height), int(x0 * width):int(x1 * width)]
+            regions.append((field, Image.fromarray(crop), psm))
+        candidates.append(regions)
+    return candidates
@@ -1,13 +1,74 @@
+import asyncio
+import hashlib
 import logging
+import os
+import threading
+import numpy as np
 import pytesseract
+from collections import OrderedDict
 from PIL import Image, ImageOps, ImageFilter
 from io import BytesIO
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 from pdfminer.high_level import extract_text as pdf_extract_text
+from pdfminer.layout import LAParams
+from PyPDF2 import PdfReader
 from app.config import settings
+from app.tools.document_ocr.layout import has_layout_template, layout_regions
+from app.tools.document_ocr.ocr_pool import OCRQueueFull, OCRUnavailable, ocr_pool
+from app.tools.document_ocr.extractors import extract_fields, has_required_fields
+from app.tools.document_ocr.pass_scheduler import OCR_PASSES, pass_label, pass_scheduler
+from app.tools.document_ocr.tesseract_api import installed_languages, tesseract_pool
 
 logger = logging.getLogger(__name__)
 
+# A document handed to the OCR workers: a file path (spooled upload) or bytes
+DocumentSource = Union[str, bytes]
+
+
+def _open_source(source: DocumentSource):
+    """Path as-is (read straight from disk), bytes wrapped without copying"""
+    return source if isinstance(source, str) else BytesIO(source)
+
+
+# Images are upscaled to at least this long edge before OCR
+MIN_OCR_LONG_EDGE = 1400
+
+# Preprocessed base images kept per worker, so further passes over the same
+# upload skip decode, autocontrast and median filter
+BASE_IMAGE_CACHE_SIZE = 2
+
+# Binarization threshold (0-255)
+BINARIZE_THRESHOLD = 140
+
+
+def _source_key(source: DocumentSource) -> Tuple:
+    if isinstance(source, str):
+        stat = os.stat(source)
+        return (source, stat.st_mtime_ns, stat.st_size)
+    return (hashlib.blake2b(source, digest_size=16).digest(),)
+
+
+# No boxes_flow: skip pdfminer's text-box reordering, the slow part of
+# layout analysis; line grouping (all the regexes need) is kept
+PDF_LAPARAMS = LAParams(boxes_flow=None)
+
+
+def _page_has_fonts(page) -> bool:
+    """Whether a PDF page (or a form XObject on it) references any font"""
+    resources = page.get("/Resources")
+    if resources is None:
+        return False
+    resources = resources.get_object()
+    if resources.get("/Font"):
+        return True
+    xobjects = resources.get("/XObject")
+    if xobjects:
+        for xobject in xobjects.get_object().values():
+            xobject = xobject.get_object()
+            if xobject.get("/Subtype") == "/Form" and _page_has_fonts(xobject):
+                return True
+    return False
+
 
 class OCREngine:
     """OCR processing engine using Tesseract"""
@@ -16,13 +77,23 @@ class OCREngine:
         if settings.TESSERACT_CMD:
             pytesseract.pytesseract.tesseract_cmd = settings.TESSERACT_CMD
         self.confidence_threshold = settings.OCR_CONFIDENCE_THRESHOLD
+        self._base_images: "OrderedDict[Tuple, Image.Image]" = OrderedDict()
+        # OCR_WORKERS=0 runs passes on several threads of this process
+        self._base_images_lock = threading.Lock()
+        self.roi_hits = 0
+        self.roi_misses = 0
     
-    async def process_image(self, image_bytes: bytes, doc_type: str) -> Dict[str, Any]:
+    async def process_image(self, source: DocumentSource, doc_type: str) -> Dict[str, Any]:
         """
         Process image and extract text with confidence scores
         
+        Cards with a layout template are first read region by region
+        (roi_ocr_sync); full-image OCR passes run only when that misses,
+        in the OCR process pool, best-first for this doc type. Raises
+        OCRQueueFull / OCRUnavailable when the pool cannot take the job.
+        
         Args:
-            image_bytes: Image file bytes
+            source: Image file path (preferred) or bytes
             doc_type: Type of document (salary_slip, pan_card, aadhaar)
             
         Returns:
@@ -34,9 +105,16 @@ class OCREngine:
             }
         """
         try:
-            image = Image.open(BytesIO(image_bytes))
-            return self._ocr_image(image, doc_type)
-        
+            result = None
+            if settings.OCR_ROI_ENABLED and has_layout_template(doc_type):
+                result = await ocr_pool.run(_roi_ocr_job, source, doc_type)
+                if result is not None:
+                    self.roi_hits += 1
+                    return result
+                self.roi_misses += 1
+            result = await self._run_passes(source, doc_type)
+        except (OCRQueueFull, OCRUnavailable):
+            raise
         except Exception as e:
             logger.error(f"OCR processing error: {e}")
             return {
@@ -46,13 +124,17 @@ class OCREngine:
                 "status": "ERROR",
                 "error": str(e)
             }
+        
+        self._record_passes(doc_type, result)
+        return result
     
-    async def process_pdf(self, pdf_bytes: bytes, doc_type: str) -> Dict[str, Any]:
+    async def process_pdf(self, source: DocumentSource, doc_type: str) -> Dict[str, Any]:
         """Process PDF document — try pdfminer first, then OCR fallback."""
         try:
-            # Try pdfminer text extraction first
-            text = pdf_extract_text(BytesIO(pdf_bytes))
-            extracted_data = self._extract_structured_data(text.strip(), doc_type) if text.strip() else {}
+            # Triage (page count, text layer), then pdfminer on the first pages
+            triage = await ocr_pool.run(_pdf_triage_job, source)
+            text = triage["text"]
+            extracted_data = extract_fields(text.strip(), doc_type) if text.strip() else {}
 
             # If pdfminer gave good text WITH structured data, use it
             if text.strip() and extracted_data:
@@ -66,8 +148,12 @@ class OCREngine:
                 }
 
             # Otherwise, always try OCR on the PDF images
-            logger.info("pdfminer gave insufficient data, falling back to image OCR")
-            ocr_result = await self._ocr_pdf_images(pdf_bytes, doc_type)
+            if triage["has_text_layer"]:
+                logger.info("pdfminer gave insufficient data, falling back to image OCR")
+            else:
+                logger.info("Scanned PDF (no text layer), going straight to image OCR")
+            ocr_result = await self._ocr_pdf_images(source, doc_type, triage["page_count"])
+            self._record_passes(doc_type, ocr_result)
 
             # If OCR gave better results, use those
             ocr_extracted = ocr_result.get("extracted_data", {})
@@ -79,15 +165,20 @@ class OCREngine:
                 merged = {**extracted_data, **ocr_extracted}
                 confidence = max(0.9 if text.strip() else 0.0, ocr_result.get("confidence", 0.0))
                 status = "SUCCESS" if merged else ("SUCCESS" if confidence >= self.confidence_threshold else "LOW_CONFIDENCE")
-                return {
+                result = {
                     "text": text,
                     "confidence": confidence,
                     "extracted_data": merged,
                     "status": status
                 }
+                if ocr_result.get("engine_error"):
+                    result["engine_error"] = ocr_result["engine_error"]
+                return result
 
             return ocr_result
 
+        except (OCRQueueFull, OCRUnavailable):
+            raise
         except Exception as e:
             logger.error(f"PDF processing error: {e}")
             return {
@@ -98,281 +189,507 @@ class OCREngine:
                 "error": str(e)
             }
     
-    def _extract_structured_data(self, text: str, doc_type: str) -> Dict[str, Any]:
-        """Extract structured data based on document type"""
-        import re
-        
-        data = {}
-        
-        if doc_type == "salary_slip":
-            # Extract salary information
-            salary_patterns = [
-                r'(?:gross|net|basic)\s*(?:salary|pay)?\s*:?\s*₹?\s*([\d,]+)',
-                r'₹\s*([\d,]+)',
-            ]
-            for pattern in salary_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    data["monthly_salary"] = match.group(1).replace(',', '')
-                    break
+    async def _run_passes(self, source: DocumentSource, doc_type: str) -> Dict[str, Any]:
+        """
+        Run OCR passes in learned order until the doc type's required
+        fields are extracted
+
+        By default (OCR_PARALLEL_PASSES=1) the passes run back to back in a
+        single worker job: one pool slot, one decode, and the early stop
+        happens inside the worker. With OCR_PARALLEL_PASSES > 1 passes are
+        spread across the pool; after a win, queued passes are dropped but
+        passes already running keep their slot until they finish.
+        """
+        queue = pass_scheduler.order(doc_type)
+        parallel = max(1, settings.OCR_PARALLEL_PASSES)
+        if parallel == 1:
+            return await ocr_pool.run(_ocr_image_job, source, doc_type, queue)
+        running: Dict[asyncio.Future, Tuple[bool, int]] = {}
+        results: List[Dict[str, Any]] = []
+        passes_run: List[str] = []
+        error: Optional[Exception] = None
         
-        elif doc_type == "pan_card":
-            # Extract PAN number
-            pan_pattern = r'\b([A-Z]{5}\d{4}[A-Z])\b'
-            match = re.search(pan_pattern, text)
-            if match:
-                data["pan_number"] = match.group(1)
+        try:
+            while queue or running:
+                while queue and len(running) < parallel:
+                    ocr_pass = queue.pop(0)
+                    task = asyncio.ensure_future(ocr_pool.run(_ocr_pass_job, source, doc_type, ocr_pass))
+                    running[task] = ocr_pass
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ocr_pass = running.pop(task)
+                    try:
+                        result = task.result()
+                    except (OCRQueueFull, OCRUnavailable):
+                        # Pool is saturated: make do with passes already in flight
+                        queue = []
+                        if not results and not running:
+                            raise
+                        continue
+                    except Exception as e:
+                        # Undecodable image: every other pass would fail the same way
+                        error = e
+                        queue = []
+                        continue
+                    
+                    passes_run.append(pass_label(ocr_pass))
+                    if result is None:
+                        continue
+                    results.append(result)
+                    if has_required_fields(doc_type, result["extracted_data"]):
+                        # Done: passes still queued or running are cancelled below
+                        return self._best_result(results, passes_run)
+        finally:
+            for task in running:
+                task.cancel()
         
-        elif doc_type == "aadhaar":
-            # Extract Aadhaar number — try multiple patterns (OCR may insert
-            # spaces, dashes, or misread separators)
-            aadhaar_patterns = [
-                r'(\d{4}\s?\d{4}\s?\d{4})',          # 6826 4584 5686
-                r'(\d{4}[\s\-\.]{0,2}\d{4}[\s\-\.]{0,2}\d{4})',  # with separators
-                r'(\d{12})',                          # continuous 12 digits
-            ]
-            for pattern in aadhaar_patterns:
-                matches = re.findall(pattern, text)
-                for m in matches:
-                    digits = re.sub(r'\D', '', m)
-                    # Valid Aadhaar: 12 digits, first digit != 0 or 1
-                    if len(digits) == 12 and digits[0] not in ('0', '1'):
-                        data["aadhaar_number"] = m.strip()
-                        break
-                if "aadhaar_number" in data:
-                    break
-
-            # Try to extract name from Aadhaar card
-            # Common patterns on Indian Aadhaar cards
-            name_patterns = [
-                # English name just before DOB/Date of Birth/जन्म
-                r'([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})\s*\n.*?(?:DOB|Date\s*of\s*Birth|जन्म)',
-                # S/O, D/O, W/O, C/O patterns (back of card)
-                r'(?:S/?O|D/?O|W/?O|C/?O)\s*[:\-]?\s*([A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,3})',
-                # Name: or name label
-                r'(?:name|नाम)\s*[:\-]?\s*([A-Za-z ]{3,40})',
-                # Standalone line of 2-4 capitalized words (likely a name)
-                r'(?:^|\n)\s*([A-Z][a-z]{2,}\s+[A-Z][a-z]{2,}(?:\s+[A-Z][a-z]{2,})?)\s*(?:\n|$)',
-            ]
-            for pattern in name_patterns:
-                match = re.search(pattern, text, re.IGNORECASE | re.DOTALL)
-                if match:
-                    name = match.group(1).strip()
-                    # Filter out garbage: must have at least 2 words, no digits,
-                    # no common Aadhaar boilerplate words
-                    boilerplate = {"government", "india", "authority", "unique",
-                                   "identification", "aadhaar", "male", "female",
-                                   "proof", "identity", "address", "date", "birth"}
-                    words = name.lower().split()
-                    if (len(name) > 4
-                        and len(words) >= 2
-                        and not re.search(r'\d', name)
-                        and not any(w in boilerplate for w in words)):
-                        data["name"] = name
-                        break
+        if not results and error is not None:
+            raise error
+        return self._best_result(results, passes_run)
+    
+    def _record_passes(self, doc_type: str, result: Dict[str, Any]):
+        """Feed which passes ran, and which one won, back to the scheduler"""
+        passes_run = result.pop("passes_run", None)
+        if not passes_run:
+            return
+        winner = result.get("ocr_pass") if has_required_fields(doc_type, result.get("extracted_data", {})) else None
+        pass_scheduler.record(doc_type, passes_run, winner)
+    
+    def ocr_image_sync(self, source: DocumentSource, doc_type: str, passes: List[Tuple[bool, int]]) -> Dict[str, Any]:
+        """Run ``passes`` in order over an encoded image, stopping at the first win (runs inside an OCR worker)"""
+        return self._ocr_passes(self._base_image_for(source), doc_type, passes)
 
-            # Extract DOB
-            dob_patterns = [
-                r'(?:DOB|Date\s*of\s*Birth|जन्म\s*तिथि)\s*[:/\-]?\s*(\d{2}[/\-\.]\d{2}[/\-\.]\d{4})',
-                r'(\d{2}/\d{2}/\d{4})',
-            ]
-            for pattern in dob_patterns:
-                match = re.search(pattern, text, re.IGNORECASE)
-                if match:
-                    data["dob"] = match.group(1).strip()
-                    break
-
-            # Extract gender
-            gender_match = re.search(r'\b(MALE|FEMALE|male|female|पुरुष|महिला)\b', text)
-            if gender_match:
-                g = gender_match.group(1).upper()
-                if g in ('पुरुष',):
-                    g = 'MALE'
-                elif g in ('महिला',):
-                    g = 'FEMALE'
-                data["gender"] = g
-        
-        return data
+    def ocr_pass_sync(self, source: DocumentSource, doc_type: str, ocr_pass: Tuple[bool, int]) -> Optional[Dict[str, Any]]:
+        """One OCR pass over an encoded image (runs inside an OCR worker)"""
+        return self._ocr_pass(self._base_image_for(source), doc_type, ocr_pass)
 
-    def _preprocess_image(self, image: Image.Image, binarize: bool = False) -> Image.Image:
-        """Light preprocessing to improve OCR accuracy."""
+    def roi_ocr_sync(self, source: DocumentSource, doc_type: str) -> Optional[Dict[str, Any]]:
+        """
+        OCR only the template regions of a card (runs inside an OCR worker).
+        None when no orientation yields the required fields.
+        """
+        try:
+            base = self._base_image_for(source)
+            lang = self._lang_for_doc(doc_type)
+            for regions in layout_regions(base, doc_type):
+                texts = []
+                confidences: List[float] = []
+                for field, crop, psm in regions:
+                    text, region_confidences = tesseract_pool.recognize(crop, lang, psm)
+                    texts.append(text.strip())
+                    confidences.extend(region_confidences)
+
+                full_text = "\n".join(t for t in texts if t)
+                extracted_data = extract_fields(full_text, doc_type)
+                if not confidences or not has_required_fields(doc_type, extracted_data):
+                    continue
+
+                avg_confidence = sum(confidences) / len(confidences) / 100.0
+                logger.info(f"ROI OCR extracted ({doc_type}): {extracted_data}")
+                return {
+                    "text": full_text,
+                    # Same boost as a full pass that found structured data
+                    "confidence": max(avg_confidence, self.confidence_threshold),
+                    "extracted_data": extracted_data,
+                    "status": "SUCCESS",
+                    "ocr_pass": "roi"
+                }
+        except Exception as e:
+            logger.warning(f"ROI OCR failed for {doc_type}, using full-image passes: {e}")
+        return None
+
+    def roi_stats(self) -> Dict[str, Any]:
+        attempts = self.roi_hits + self.roi_misses
+        return {
+            "enabled": settings.OCR_ROI_ENABLED,
+            "hits": self.roi_hits,
+            "misses": self.roi_misses,
+            "hit_rate": self.roi_hits / attempts if attempts else 0.0
+        }
+
+    def _base_image_for(self, source: DocumentSource) -> Image.Image:
+        """Decoded, preprocessed base image of ``source``, memoized per worker"""
+        key = _source_key(source)
+        with self._base_images_lock:
+            base = self._base_images.get(key)
+            if base is not None:
+                self._base_images.move_to_end(key)
+                return base
+
+        # Decoded outside the lock; a concurrent miss on the same file just
+        # does the work twice
+        base = self._base_image(self._load_image(source))
+        with self._base_images_lock:
+            self._base_images[key] = base
+            self._base_images.move_to_end(key)
+            while len(self._base_images) > BASE_IMAGE_CACHE_SIZE:
+                self._base_images.popitem(last=False)
+        return base
+
+    def _load_image(self, source: DocumentSource) -> Image.Image:
+        """
+        Decode an uploaded image at no more than OCR_IMAGE_MAX_EDGE on the
+        long edge: JPEGs are decoded straight to a reduced-size grayscale
+        draft (DCT scaling), anything still larger is downscaled
+        """
+        max_edge = settings.OCR_IMAGE_MAX_EDGE
+        image = Image.open(_open_source(source))
+        width, height = image.size
+        if image.format == "JPEG" and max(width, height) > max_edge:
+            scale = max_edge / max(width, height)
+            # draft() never goes below the requested size
+            image.draft("L", (int(width * scale), int(height * scale)))
+
+        image = image.convert("L")
+        if max(image.size) > max_edge:
+            image.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=2.0)
+        return image
+    
+    def triage_pdf_sync(self, source: DocumentSource) -> Dict[str, Any]:
+        """
+        Cheap PyPDF2 look at page count and text layer; pdfminer then reads
+        only the first OCR_PDF_TEXT_PAGES pages, and only when there is a
+        text layer (runs inside an OCR worker)
+        """
+        page_count = None
+        has_text_layer = True  # unknown: let pdfminer decide
+        try:
+            reader = PdfReader(_open_source(source))
+            if reader.is_encrypted:
+                reader.decrypt("")
+            page_count = len(reader.pages)
+            has_text_layer = any(
+                _page_has_fonts(reader.pages[i])
+                for i in range(min(page_count, settings.OCR_PDF_TEXT_PAGES))
+            )
+        except Exception as e:
+            logger.warning(f"PDF triage failed, trying pdfminer: {e}")
+
+        text = ""
+        if has_text_layer:
+            text = pdf_extract_text(
+                _open_source(source),
+                maxpages=settings.OCR_PDF_TEXT_PAGES,
+                laparams=PDF_LAPARAMS
+            )
+        return {
+            "page_count": page_count,
+            "has_text_layer": has_text_layer,
+            "text": text
+        }
+
+    def ocr_pdf_page_sync(
+        self,
+        source: DocumentSource,
+        doc_type: str,
+        page_number: int,
+        dpi: int,
+        passes: Optional[List[Tuple[bool, int]]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Rasterize a single PDF page in grayscale and OCR it (runs inside an
+        OCR worker). None when the page does not exist.
+        """
+        try:
+            from pdf2image import convert_from_bytes, convert_from_path
+        except Exception as e:
+            logger.error(f"pdf2image unavailable: {e}")
+            return None
+
+        convert = convert_from_path if isinstance(source, str) else convert_from_bytes
+        pages = convert(
+            source,
+            dpi=dpi,
+            first_page=page_number,
+            last_page=page_number,
+            grayscale=True
+        )
+        if not pages:
+            return None
+
+        # The page is used at its rasterized DPI, not capped like photos
+        result = self._ocr_image(pages[0], doc_type, passes)
+        result["page"] = page_number
+        result["dpi"] = dpi
+        return result
+
+    def _base_image(self, image: Image.Image) -> Image.Image:
+        """Preprocessing shared by every pass: grayscale, autocontrast, denoise, upscale small images."""
         image = image.convert("L")
         image = ImageOps.autocontrast(image)
         image = image.filter(ImageFilter.MedianFilter(size=3))
 
         width, height = image.size
-        if max(width, height) < 1400:
-            scale = 1400 / max(width, height)
+        if max(width, height) < MIN_OCR_LONG_EDGE:
+            scale = MIN_OCR_LONG_EDGE / max(width, height)
             image = image.resize((int(width * scale), int(height * scale)), Image.LANCZOS)
-
-        if binarize:
-            image = image.point(lambda p: 255 if p > 140 else 0)
         return image
 
+    def _binarize(self, image: Image.Image) -> Image.Image:
+        pixels = np.asarray(image)
+        return Image.fromarray(np.where(pixels > BINARIZE_THRESHOLD, 255, 0).astype(np.uint8))
+
     def _lang_for_doc(self, doc_type: str) -> str:
         """Return Tesseract language string based on document type."""
-        if doc_type == "aadhaar":
-            # Aadhaar cards have Hindi + English
-            try:
-                # Check if hin is available
-                import subprocess
-                langs = subprocess.check_output(['tesseract', '--list-langs'],
-                                                stderr=subprocess.STDOUT).decode()
-                if 'hin' in langs:
-                    return 'eng+hin'
-            except Exception:
-                pass
+        # Aadhaar cards have Hindi + English
+        if doc_type == "aadhaar" and "hin" in installed_languages():
+            return 'eng+hin'
         return 'eng'
 
-    def _ocr_image(self, image: Image.Image, doc_type: str) -> Dict[str, Any]:
-        """Run OCR with multiple passes for best extraction."""
+    def _ocr_pass(self, base: Image.Image, doc_type: str, ocr_pass: Tuple[bool, int]) -> Optional[Dict[str, Any]]:
+        """
+        One recognition pass over a base image (see _base_image); None when
+        no text was found. A pass where the engine itself failed returns an
+        empty result carrying "engine_error", so the failure is not mistaken
+        for a blank document.
+        """
+        binarize, psm = ocr_pass
         lang = self._lang_for_doc(doc_type)
-        best_result = None
+        processed = self._binarize(base) if binarize else base
 
-        # Try different preprocessing + PSM combos
-        attempts = [
-            (False, '--psm 3'),   # Auto layout, no binarization
-            (False, '--psm 6'),   # Uniform block, no binarization
-            (True,  '--psm 3'),   # Auto layout, binarized
-            (True,  '--psm 6'),   # Uniform block, binarized
-        ]
-
-        for binarize, psm in attempts:
-            processed = self._preprocess_image(image, binarize=binarize)
-            tess_config = f'{psm} -l {lang}'
-
-            try:
-                ocr_data = pytesseract.image_to_data(
-                    processed,
-                    output_type=pytesseract.Output.DICT,
-                    config=tess_config
-                )
-            except Exception as e:
-                logger.warning(f"OCR data attempt failed ({tess_config}): {e}")
-                continue
-
-            confidences = [
-                int(conf) for conf in ocr_data.get('conf', [])
-                if conf != '-1'
-            ]
+        try:
+            # Text and word confidences from a single recognition pass
+            full_text, confidences = tesseract_pool.recognize(processed, lang, psm)
+        except Exception as e:
+            logger.warning(f"OCR attempt failed (psm {psm}, lang={lang}): {e}")
+            return {
+                "text": "",
+                "confidence": 0.0,
+                "extracted_data": {},
+                "ocr_pass": pass_label(ocr_pass),
+                "engine_error": str(e)
+            }
 
-            if not confidences:
-                continue
+        if not confidences:
+            return None
 
-            avg_confidence = sum(confidences) / len(confidences) / 100.0
+        avg_confidence = sum(confidences) / len(confidences) / 100.0
+        extracted_data = extract_fields(full_text, doc_type)
 
-            try:
-                full_text = pytesseract.image_to_string(processed, config=tess_config)
-            except Exception:
-                full_text = " ".join(
-                    t for t, c in zip(ocr_data.get('text', []), ocr_data.get('conf', []))
-                    if c != '-1' and t.strip()
-                )
+        result = {
+            "text": full_text,
+            "confidence": avg_confidence,
+            "extracted_data": extracted_data,
+            "ocr_pass": pass_label(ocr_pass)
+        }
 
-            extracted_data = self._extract_structured_data(full_text, doc_type)
+        # If we found structured data, boost confidence
+        if extracted_data:
+            result["confidence"] = max(avg_confidence, self.confidence_threshold)
+            logger.info(f"OCR extracted (binarize={binarize}, psm {psm}, lang={lang}): {extracted_data}")
+        return result
 
+    def _best_result(self, results: List[Dict[str, Any]], passes_run: List[str]) -> Dict[str, Any]:
+        """
+        Most fields extracted wins, then highest confidence. Flagged with
+        "engine_error" when every pass that ran failed in the engine.
+        """
+        errors = [r["engine_error"] for r in results if r.get("engine_error")]
+        results = [r for r in results if not r.get("engine_error")]
+        if not results:
             result = {
-                "text": full_text,
-                "confidence": avg_confidence,
-                "extracted_data": extracted_data,
-            }
-
-            # If we found structured data, boost and return immediately
-            if extracted_data:
-                result["confidence"] = max(avg_confidence, self.confidence_threshold)
-                result["status"] = "SUCCESS"
-                logger.info(f"OCR extracted (binarize={binarize}, {psm}, lang={lang}): {extracted_data}")
-                # If we got both aadhaar_number AND name, this is a great result
-                if doc_type == "aadhaar" and "aadhaar_number" in extracted_data and "name" in extracted_data:
-                    return result
-                # Otherwise keep as best but try other combos for more fields
-                if best_result is None or len(extracted_data) > len(best_result.get("extracted_data", {})):
-                    best_result = result
-                continue
-
-            # Keep the best attempt by confidence
-            if best_result is None or avg_confidence > best_result["confidence"]:
-                best_result = result
-
-        if best_result is None:
-            return {
                 "text": "",
                 "confidence": 0.0,
                 "extracted_data": {},
-                "status": "NO_TEXT_DETECTED"
+                "status": "NO_TEXT_DETECTED",
+                "passes_run": passes_run
             }
+            if errors and len(errors) == len(passes_run):
+                result["engine_error"] = errors[0]
+            return result
 
-        avg_confidence = best_result["confidence"]
-        if avg_confidence >= self.confidence_threshold:
+        best_result = dict(max(results, key=lambda r: (len(r["extracted_data"]), r["confidence"])))
+        if best_result["confidence"] >= self.confidence_threshold:
             best_result["status"] = "SUCCESS"
         else:
             best_result["status"] = "LOW_CONFIDENCE"
+        best_result["passes_run"] = passes_run
         return best_result
 
-    async def _ocr_pdf_images(self, pdf_bytes: bytes, doc_type: str) -> Dict[str, Any]:
-        """OCR scanned PDFs by converting pages to images."""
-        try:
-            from pdf2image import convert_from_bytes
-        except Exception as e:
-            logger.error(f"pdf2image unavailable: {e}")
-            return {
-                "text": "",
-                "confidence": 0.0,
-                "extracted_data": {},
-                "status": "NO_TEXT_DETECTED"
-            }
+    def _ocr_image(
+        self,
+        image: Image.Image,
+        doc_type: str,
+        passes: Optional[List[Tuple[bool, int]]] = None
+    ) -> Dict[str, Any]:
+        """Run OCR passes in order until the required fields are extracted."""
+        return self._ocr_passes(self._base_image(image), doc_type, passes)
+
+    def _ocr_passes(
+        self,
+        base: Image.Image,
+        doc_type: str,
+        passes: Optional[List[Tuple[bool, int]]] = None
+    ) -> Dict[str, Any]:
+        results = []
+        passes_run = []
+        for ocr_pass in passes or OCR_PASSES:
+            result = self._ocr_pass(base, doc_type, ocr_pass)
+            passes_run.append(pass_label(ocr_pass))
+            if result is None:
+                continue
+            results.append(result)
+            if has_required_fields(doc_type, result["extracted_data"]):
+                break
+        return self._best_result(results, passes_run)
+
+    async def _ocr_pdf_images(
+        self,
+        source: DocumentSource,
+        doc_type: str,
+        page_count: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        OCR scanned PDFs page by page across the OCR pool
 
-        try:
-            pages = convert_from_bytes(pdf_bytes, dpi=300, first_page=1, last_page=3)
-            if not pages:
+        Pages are rasterized one at a time in the workers, first at the lowest
+        of OCR_PDF_DPI_STEPS; the next DPI is tried only if the required
+        fields are still missing. Stops as soon as they are found.
+        """
+        passes = pass_scheduler.order(doc_type)
+        max_pages = settings.OCR_PDF_MAX_PAGES
+        if page_count is not None:
+            max_pages = min(max_pages, page_count)
+        page_results: Dict[int, Dict[str, Any]] = {}
+        missing_pages: set = set()
+        passes_run: List[str] = []
+        error: Optional[Exception] = None
+
+        for dpi in settings.OCR_PDF_DPI_STEPS:
+            page_numbers = [
+                n for n in range(1, max_pages + 1)
+                if n not in missing_pages
+            ]
+            running = {
+                asyncio.ensure_future(
+                    ocr_pool.run(_ocr_pdf_page_job, source, doc_type, n, dpi, passes)
+                ): n
+                for n in page_numbers
+            }
+            try:
+                while running:
+                    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        page_number = running.pop(task)
+                        try:
+                            result = task.result()
+                        except (OCRQueueFull, OCRUnavailable):
+                            if not page_results and not running:
+                                raise
+                            continue
+                        except Exception as e:
+                            logger.error(f"PDF page {page_number} OCR error: {e}")
+                            error = e
+                            continue
+
+                        if result is None:
+                            missing_pages.add(page_number)
+                            continue
+                        passes_run.extend(result.pop("passes_run", []))
+                        previous = page_results.get(page_number)
+                        if previous is None or len(result["extracted_data"]) >= len(previous["extracted_data"]):
+                            page_results[page_number] = result
+
+                    if has_required_fields(doc_type, self._merge_page_data(page_results)):
+                        break
+            finally:
+                for task in running:
+                    task.cancel()
+
+            if has_required_fields(doc_type, self._merge_page_data(page_results)):
+                break
+            if len(missing_pages) >= max_pages:
+                break
+            if error is not None and not page_results:
+                # Rasterization itself is failing; a higher DPI will not help
+                break
+
+        if not page_results:
+            if error is not None:
                 return {
                     "text": "",
                     "confidence": 0.0,
                     "extracted_data": {},
-                    "status": "NO_TEXT_DETECTED"
+                    "status": "ERROR",
+                    "error": str(error)
                 }
-
-            combined_text = []
-            best_conf = 0.0
-            merged_extracted = {}
-            for page in pages:
-                result = self._ocr_image(page, doc_type)
-                combined_text.append(result.get("text", ""))
-                best_conf = max(best_conf, result.get("confidence", 0.0))
-                # Merge per-page extracted data (keep first found for each key)
-                for k, v in result.get("extracted_data", {}).items():
-                    if k not in merged_extracted:
-                        merged_extracted[k] = v
-
-            full_text = "\n".join([t for t in combined_text if t])
-            # Also try extraction on the full combined text
-            combined_extracted = self._extract_structured_data(full_text, doc_type)
-            # Merge: per-page results take precedence, then combined
-            extracted_data = {**combined_extracted, **merged_extracted}
-
-            if extracted_data and best_conf < self.confidence_threshold:
-                best_conf = max(best_conf, self.confidence_threshold)
-                status = "SUCCESS"
-            elif full_text.strip():
-                status = "SUCCESS" if best_conf >= self.confidence_threshold else "LOW_CONFIDENCE"
-            else:
-                status = "NO_TEXT_DETECTED"
-
-            return {
-                "text": full_text,
-                "confidence": best_conf,
-                "extracted_data": extracted_data,
-                "status": status
-            }
-        except Exception as e:
-            logger.error(f"PDF image OCR error: {e}")
             return {
                 "text": "",
                 "confidence": 0.0,
                 "extracted_data": {},
-                "status": "ERROR",
-                "error": str(e)
+                "status": "NO_TEXT_DETECTED",
+                "passes_run": passes_run
             }
 
+        ordered = [page_results[n] for n in sorted(page_results)]
+        engine_errors = [r["engine_error"] for r in ordered if r.get("engine_error")]
+        full_text = "\n".join([r.get("text", "") for r in ordered if r.get("text")])
+        best_conf = max(r.get("confidence", 0.0) for r in ordered)
+        merged_extracted = self._merge_page_data(page_results)
+        winner = next(
+            (r.get("ocr_pass") for r in ordered if has_required_fields(doc_type, r.get("extracted_data", {}))),
+            None
+        )
+
+        # Also try extraction on the full combined text
+        combined_extracted = extract_fields(full_text, doc_type)
+        # Merge: per-page results take precedence, then combined
+        extracted_data = {**combined_extracted, **merged_extracted}
+
+        if extracted_data and best_conf < self.confidence_threshold:
+            best_conf = max(best_conf, self.confidence_threshold)
+            status = "SUCCESS"
+        elif full_text.strip():
+            status = "SUCCESS" if best_conf >= self.confidence_threshold else "LOW_CONFIDENCE"
+        else:
+            status = "NO_TEXT_DETECTED"
+
+        return {
+            "text": full_text,
+            "confidence": best_conf,
+            "extracted_data": extracted_data,
+            "status": status,
+            "ocr_pass": winner,
+            "passes_run": passes_run,
+            # Every page failed in the engine: the result says nothing about the file
+            **({"engine_error": engine_errors[0]} if len(engine_errors) == len(ordered) else {})
+        }
+
+    def _merge_page_data(self, page_results: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+        """Per-page extracted data in page order (first found wins for each key)"""
+        merged: Dict[str, Any] = {}
+        for page_number in sorted(page_results):
+            for k, v in page_results[page_number].get("extracted_data", {}).items():
+                if k not in merged:
+                    merged[k] = v
+        return merged
+
 
 ocr_engine = OCREngine()
+
+
+def _ocr_image_job(source: DocumentSource, doc_type: str, passes: List[Tuple[bool, int]]) -> Dict[str, Any]:
+    return ocr_engine.ocr_image_sync(source, doc_type, passes)
+
+
+def _ocr_pass_job(source: DocumentSource, doc_type: str, ocr_pass: Tuple[bool, int]) -> Optional[Dict[str, Any]]:
+    return ocr_engine.ocr_pass_sync(source, doc_type, ocr_pass)
+
+
+def _roi_ocr_job(source: DocumentSource, doc_type: str) -> Optional[Dict[str, Any]]:
+    return ocr_engine.roi_ocr_sync(source, doc_type)
+
+
+def _pdf_triage_job(source: DocumentSource) -> Dict[str, Any]:
+    return ocr_engine.triage_pdf_sync(source)
+
+
+def _ocr_pdf_page_job(
+    source: DocumentSource,
+    doc_type: str,
+    page_number: int,
+    dpi: int,
+    passes: Optional[List[Tuple[bool, int]]] = None
+) -> Optional[Dict[str, Any]]:
+    return ocr_engine.ocr_pdf_page_sync(source, doc_type, page_number, dpi, passes)
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class OCRQueueFull(Exception):
+    """Every OCR worker is busy and the wait queue is full (retry later)"""
+
+
+class OCRUnavailable(Exception):
+    """The OCR worker pool is shut down or was lost"""
+
+
+def _init_worker(thread_limit: int, tesseract_cmd: Optional[str]):
+    """Per-process setup, run once when a worker starts"""
+    # Tesseract (and the OpenMP inside it) inherits this; one thread per
+    # worker keeps N workers from fighting over the same cores
+    if thread_limit > 0:
+        os.environ["OMP_THREAD_LIMIT"] = str(thread_limit)
+    # Ctrl-C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if tesseract_cmd:
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+
+def _warm() -> int:
+    """Pay the OCR import and language-probe cost before the first request"""
+    import app.tools.document_ocr.ocr_engine  # noqa: F401
+    from app.tools.document_ocr.tesseract_api import installed_languages
+    installed_languages()
+    return os.getpid()
+
+
+def _timed_call(fn: Callable[..., Any], args: Tuple[Any, ...]) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class OCRPool:
+    """
+    Dedicated process pool for CPU-bound OCR
+
+    Workers are forked once at startup (``start``) so a request never pays
+    process start-up. At most OCR_WORKERS jobs run and OCR_MAX_QUEUE more
+    wait; beyond that ``run`` raises OCRQueueFull instead of queueing
+    unbounded work. A job holds its slot until it actually finishes in the
+    worker, even if the request awaiting it was cancelled. OCR_WORKERS=0
+    runs jobs on a small thread pool instead (dev boxes).
+    """
+
+    # Threads used when OCR_WORKERS=0
+    THREAD_MODE_WORKERS = 2
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = settings.OCR_WORKERS if max_workers is None else max_workers
+        self.max_queue = settings.OCR_MAX_QUEUE if max_queue is None else max_queue
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._started_at = time.monotonic()
+
+        self.pending = 0
+        self.max_pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.restarts = 0
+        self._wait_s = 0.0
+        self._run_s = 0.0
+
+    @property
+    def workers(self) -> int:
+        """Jobs that can run at once (processes, or threads when OCR_WORKERS=0)"""
+        return self.max_workers if self.max_workers > 0 else self.THREAD_MODE_WORKERS
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    async def start(self):
+        """Fork every worker now and import the OCR stack in each"""
+        if self.max_workers <= 0 or self._closed:
+            return
+        pool = self._ensure_pool()
+        loop = asyncio.get_running_loop()
+        # Concurrent submits make the executor spawn all workers at once
+        pids = await asyncio.gather(*[
+            loop.run_in_executor(pool, _warm) for _ in range(self.max_workers)
+        ])
+        self._started_at = time.monotonic()
+        logger.info(f"OCR pool ready: {len(set(pids))} workers, queue {self.max_queue}")
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run ``fn(*args)`` in an OCR worker
+
+        ``fn`` must be a module-level function (it is pickled by name).
+        Cancelling the awaiting task drops the job if it has not started;
+        a job already running keeps its slot until it finishes.
+        """
+        if self._closed:
+            raise OCRUnavailable("OCR pool is shut down")
+
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise OCRQueueFull(f"{self.pending} OCR jobs already queued")
+            self.pending += 1
+            self.max_pending = max(self.max_pending, self.pending)
+
+        enqueued = time.perf_counter()
+        try:
+            pool = self._ensure_pool()
+            future = pool.submit(_timed_call, fn, args)
+        except BaseException:
+            self._release()
+            raise
+        # Runs on completion, failure or successful cancel, in whatever
+        # thread finishes the future
+        future.add_done_callback(lambda done: self._finished(done, enqueued))
+
+        try:
+            result, _ = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Only frees the slot (via the callback) if the job had not started
+            future.cancel()
+            with self._lock:
+                self.cancelled += 1
+            raise
+        except BrokenProcessPool as e:
+            # A worker died (e.g. tesseract crashed); replace the pool so the
+            # next request gets fresh workers
+            self._restart(pool)
+            raise OCRUnavailable(f"OCR worker lost: {e}")
+        return result
+
+    def _release(self):
+        with self._lock:
+            self.pending -= 1
+
+    def _finished(self, future: Future, enqueued: float):
+        with self._lock:
+            self.pending -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self.failed += 1
+                return
+            _, run_s = future.result()
+            self.completed += 1
+            self._run_s += run_s
+            self._wait_s += max(0.0, time.perf_counter() - enqueued - run_s)
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        uptime = max(1e-9, time.monotonic() - self._started_at)
+        workers = self.workers
+        return {
+            "workers": self.max_workers,
+            "queue_capacity": self.max_queue,
+            # Jobs submitted but not finished, including the ones running
+            "queue_depth": self.pending,
+            "busy_workers": min(self.pending, workers),
+            "max_queue_depth": self.max_pending,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "restarts": self.restarts,
+            "avg_wait_ms": self._wait_s * 1000 / finished if finished else 0.0,
+            "avg_run_ms": self._run_s * 1000 / self.completed if self.completed else 0.0,
+            # Share of worker time spent running OCR since start
+            "utilization": min(1.0, self._run_s / (uptime * workers))
+        }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _ensure_pool(self) -> Executor:
+        with self._lock:
+            if self._pool is None and self.max_workers <= 0:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+            elif self._pool is None:
+                # spawn, not fork: the API process holds threads and torch state
+                # that must not be cloned into OCR workers
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(settings.OCR_THREAD_LIMIT, settings.TESSERACT_CMD)
+                )
+            return self._pool
+
+    def _restart(self, broken: Executor):
+        """Replace ``broken`` (the executor a failed job ran on) unless already replaced"""
+        with self._lock:
+            # Every job on a broken pool fails at once; only the first caller
+            # restarts, so later ones cannot shut down its healthy replacement
+            if self._pool is not broken:
+                return
+            self._pool = None
+            self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("OCR pool restarted after a worker failure")
+
+
+ocr_pool = OCRPool()
@@ -0,0 +1,83 @@
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (binarize, page-segmentation mode), in the order used before any history
+OCR_PASSES: List[Tuple[bool, int]] = [
+    (False, 3),   # Auto layout, no binarization
+    (False, 6),   # Uniform block, no binarization
+    (True,  3),   # Auto layout, binarized
+    (True,  6),   # Uniform block, binarized
+]
+
+
+def pass_label(ocr_pass: Tuple[bool, int]) -> str:
+    binarize, psm = ocr_pass
+    return f"{'binary' if binarize else 'gray'}-psm{psm}"
+
+
+class PassScheduler:
+    """
+    Learns which OCR pass wins for each document type
+
+    A pass "wins" when it is the one that extracted the document's required
+    fields. Passes are ordered by their smoothed win rate
+    ((wins + 1) / (runs + 2)), so an untried pass starts at 0.5 and the
+    default order breaks ties.
+    """
+
+    def __init__(self, passes: Optional[List[Tuple[bool, int]]] = None):
+        self.passes = list(passes or OCR_PASSES)
+        self._runs: Dict[Tuple[str, str], int] = {}
+        self._wins: Dict[Tuple[str, str], int] = {}
+        self._documents: Dict[str, int] = {}
+        self._passes_run: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def order(self, doc_type: str) -> List[Tuple[bool, int]]:
+        """Passes for ``doc_type``, most likely to succeed first"""
+        with self._lock:
+            rates = {p: self._win_rate(doc_type, pass_label(p)) for p in self.passes}
+        # sorted() is stable, so equal rates keep the default order
+        return sorted(self.passes, key=lambda p: -rates[p])
+
+    def record(self, doc_type: str, passes_run: Iterable[str], winner: Optional[str]):
+        """Record one document: the passes that finished and the winning one"""
+        passes_run = list(passes_run)
+        with self._lock:
+            self._documents[doc_type] = self._documents.get(doc_type, 0) + 1
+            self._passes_run[doc_type] = self._passes_run.get(doc_type, 0) + len(passes_run)
+            for label in passes_run:
+                key = (doc_type, label)
+                self._runs[key] = self._runs.get(key, 0) + 1
+            if winner:
+                key = (doc_type, winner)
+                self._wins[key] = self._wins.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            report: Dict[str, Any] = {}
+            for doc_type, documents in self._documents.items():
+                report[doc_type] = {
+                    "documents": documents,
+                    "avg_passes": self._passes_run[doc_type] / documents,
+                    "passes": {
+                        pass_label(p): {
+                            "runs": self._runs.get((doc_type, pass_label(p)), 0),
+                            "wins": self._wins.get((doc_type, pass_label(p)), 0),
+                            "win_rate": self._win_rate(doc_type, pass_label(p))
+                        }
+                        for p in self.passes
+                    }
+                }
+            return report
+
+    def _win_rate(self, doc_type: str, label: str) -> float:
+        runs = self._runs.get((doc_type, label), 0)
+        wins = self._wins.get((doc_type, label), 0)
+        return (wins + 1) / (runs + 2)
+
+
+pass_scheduler = PassScheduler()
@@ -0,0 +1,138 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.config import settings
+from app.tools.document_ocr.tesseract_api import tesseract_pool
+
+logger = logging.getLogger(__name__)
+
+# Bump when preprocessing or extraction changes what a file OCRs to
+OCR_PIPELINE_VERSION = "3"
+
+CACHED_FIELDS = ("text", "confidence", "extracted_data", "status")
+
+# ERROR results are transient (pool full, bad decode) and never cached
+CACHEABLE_STATUSES = {"SUCCESS", "LOW_CONFIDENCE", "NO_TEXT_DETECTED"}
+
+
+def is_cacheable(result: Dict[str, Any]) -> bool:
+    """
+    Whether ``result`` describes the file rather than the engine: results
+    where every OCR pass failed (tesseract missing or crashing) carry
+    "engine_error" and would otherwise be served as NO_TEXT_DETECTED forever
+    """
+    return result.get("status") in CACHEABLE_STATUSES and not result.get("engine_error")
+
+
+class OCRResultCache:
+    """
+    OCR results keyed by file content, doc type and engine version
+
+    A bounded in-memory LRU in front of an optional directory of JSON files
+    (OCR_CACHE_DIR), so a byte-identical re-upload skips OCR entirely and
+    survives restarts when the disk tier is on.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, cache_dir: Optional[str] = None):
+        self.capacity = settings.OCR_CACHE_SIZE if capacity is None else capacity
+        self.cache_dir = settings.OCR_CACHE_DIR if cache_dir is None else cache_dir
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._engine_version: Optional[str] = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def engine_version(self) -> str:
+        if self._engine_version is None:
+            self._engine_version = f"{tesseract_pool.version}/{OCR_PIPELINE_VERSION}"
+        return self._engine_version
+
+    def key(self, file_bytes: bytes, doc_type: str) -> str:
+        return self.key_from_digest(hashlib.sha256(file_bytes).hexdigest(), doc_type)
+
+    def key_from_digest(self, sha256_hex: str, doc_type: str) -> str:
+        """Cache key for a file whose SHA-256 is already known"""
+        raw = f"{sha256_hex}:{doc_type}:{self.engine_version}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry)
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, entry)
+            self.hits += 1
+            self.disk_hits += 1
+            return copy.deepcopy(entry)
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, result: Dict[str, Any]):
+        if not is_cacheable(result):
+            return
+        entry = {field: copy.deepcopy(result.get(field)) for field in CACHED_FIELDS}
+        self._remember(key, entry)
+        self._write_disk(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "disk_tier": bool(self.cache_dir),
+            "engine_version": self.engine_version,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Unreadable OCR cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so a concurrent reader never sees half a file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Could not persist OCR cache entry {key}: {e}")
+
+
+ocr_result_cache = OCRResultCache()
@@ -0,0 +1,142 @@
+import functools
+import logging
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+from PIL import Image
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def installed_languages() -> Set[str]:
+    """Tesseract languages with traineddata installed (probed once per process)"""
+    try:
+        import tesserocr
+        _, langs = tesserocr.get_languages()
+        return set(langs)
+    except ImportError:
+        pass
+    except Exception as e:
+        logger.warning(f"tesserocr language probe failed: {e}")
+
+    try:
+        import pytesseract
+        return set(pytesseract.get_languages(config=""))
+    except Exception as e:
+        logger.warning(f"Could not list Tesseract languages: {e}")
+        return {"eng"}
+
+
+class TesseractAPIPool:
+    """
+    Long-lived Tesseract handles, one per (language, page-segmentation mode)
+
+    With tesserocr each handle keeps its traineddata loaded, so a
+    recognition pass is a SetImage + one recognize call instead of a
+    tesseract subprocess re-reading the model. Without tesserocr it falls
+    back to a single pytesseract.image_to_data call per pass. Handles live
+    for the life of the (OCR worker) process and are kept per thread, as a
+    PyTessBaseAPI must not be used from two threads at once (OCR_WORKERS=0
+    runs several jobs on threads of one process).
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        backend = (backend or settings.OCR_ENGINE).lower()
+        if backend in ("auto", "tesserocr"):
+            try:
+                import tesserocr  # noqa: F401
+                backend = "tesserocr"
+            except ImportError:
+                if backend == "tesserocr":
+                    logger.warning("tesserocr not installed, using pytesseract")
+                backend = "pytesseract"
+        self.backend = backend
+        self._local = threading.local()
+        self._all_handles: List[object] = []
+        self._lock = threading.Lock()
+
+    @functools.cached_property
+    def version(self) -> str:
+        """Engine identity, part of any cache key over OCR output"""
+        try:
+            if self.backend == "tesserocr":
+                import tesserocr
+                return f"tesserocr-{tesserocr.tesseract_version().split()[1]}"
+            import pytesseract
+            return f"pytesseract-{pytesseract.get_tesseract_version()}"
+        except Exception:
+            return self.backend
+
+    def recognize(self, image: Image.Image, lang: str, psm: int) -> Tuple[str, List[float]]:
+        """
+        One recognition pass: (text, per-word confidences in 0..100)
+        """
+        if self.backend == "tesserocr":
+            api = self._handle(lang, psm)
+            api.SetImage(image)
+            text = api.GetUTF8Text()
+            # Reads the result of the recognition above; no second pass
+            confidences = [float(c) for c in api.AllWordConfidences()]
+            return text, confidences
+
+        return self._recognize_pytesseract(image, lang, psm)
+
+    def close(self):
+        """End every thread's handles (call once no recognition is running)"""
+        with self._lock:
+            for api in self._all_handles:
+                api.End()
+            self._all_handles = []
+            self._local = threading.local()
+
+    def _handle(self, lang: str, psm: int):
+        handles: Dict[Tuple[str, int], object] = getattr(self._local, "handles", None)
+        if handles is None:
+            handles = self._local.handles = {}
+
+        key = (lang, psm)
+        api = handles.get(key)
+        if api is None:
+            from tesserocr import PyTessBaseAPI
+            api = PyTessBaseAPI(lang=lang, psm=psm)
+            handles[key] = api
+            with self._lock:
+                self._all_handles.append(api)
+            logger.info(f"Initialized Tesseract handle lang={lang} psm={psm}")
+        return api
+
+    def _recognize_pytesseract(self, image: Image.Image, lang: str, psm: int) -> Tuple[str, List[float]]:
+        import pytesseract
+
+        data = pytesseract.image_to_data(
+            image,
+            output_type=pytesseract.Output.DICT,
+            config=f"--psm {psm} -l {lang}"
+        )
+
+        # Rebuild the text layout from word boxes instead of running
+        # image_to_string (a second full recognition)
+        lines: Dict[Tuple[int, int, int], List[str]] = {}
+        confidences: List[float] = []
+        for i, word in enumerate(data.get("text", [])):
+            conf = float(data["conf"][i])
+            if conf < 0:
+                continue
+            confidences.append(conf)
+            if word.strip():
+                key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+                lines.setdefault(key, []).append(word)
+
+        text_lines: List[str] = []
+        previous_block = None
+        for (block, par, _), words in lines.items():
+            if previous_block is not None and (block, par) != previous_block:
+                text_lines.append("")
+            text_lines.append(" ".join(words))
+            previous_block = (block, par)
+
+        return "\n".join(text_lines), confidences
+
+
+tesseract_pool = TesseractAPIPool()
@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Optional
+from fastapi import UploadFile
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of each accepted format; ".jpeg" uploads sniff as ".jpg"
+MAGIC_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+]
+EXTENSION_ALIASES = {".jpeg": ".jpg"}
+
+
+class UploadTooLarge(Exception):
+    """Upload crossed MAX_FILE_SIZE_MB while streaming"""
+
+
+class UnsupportedUpload(Exception):
+    """File content is not a supported format, or not the one its name claims"""
+
+
+def max_upload_bytes() -> int:
+    return int(settings.MAX_FILE_SIZE_MB * 1024 * 1024)
+
+
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """File extension implied by the magic bytes in ``head``, or None"""
+    # PDF allows junk before the header, within the first KiB
+    if b"%PDF-" in head[:1024]:
+        return ".pdf"
+    for signature, ext in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return ext
+    return None
+
+
+class SpooledUpload:
+    """
+    An upload streamed to a named temp file
+
+    OCR workers open ``path`` directly (PIL, pdf2image, PyPDF2 and pdfminer
+    all take a path), so the file is never held in memory or pickled to a
+    worker. ``sha256`` was computed while streaming.
+
+    This is a second copy of Starlette's own spool on purpose: that is a
+    SpooledTemporaryFile, held in memory up to 1 MiB and then rolled to an
+    anonymous temp file, so it has no name a worker process could open or
+    that could be renamed. The copy is the single pass that also checks
+    the magic bytes and size and computes the hash.
+    """
+
+    def __init__(self, path: str, ext: str, size: int, sha256: str):
+        self.path = path
+        self.ext = ext
+        self.size = size
+        self.sha256 = sha256
+
+    def cleanup(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not remove spooled upload {self.path}: {e}")
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+
+async def spool_upload(file: UploadFile, ext: str, max_bytes: Optional[int] = None) -> SpooledUpload:
+    """
+    Stream ``file`` to disk in UPLOAD_CHUNK_SIZE chunks
+
+    Raises UnsupportedUpload as soon as the first chunk's magic bytes do not
+    match ``ext``, and UploadTooLarge as soon as ``max_bytes`` is crossed;
+    the partial file is removed in both cases.
+    """
+    max_bytes = max_upload_bytes() if max_bytes is None else max_bytes
+    expected = EXTENSION_ALIASES.get(ext, ext)
+
+    fd, path = tempfile.mkstemp(suffix=expected, dir=settings.UPLOAD_TMP_DIR)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            first = True
+            while True:
+                chunk = await file.read(settings.UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if first:
+                    sniffed = sniff_file_type(chunk)
+                    if sniffed is None:
+                        raise UnsupportedUpload("Unrecognized file content")
+                    if sniffed != expected:
+                        raise UnsupportedUpload(f"File content is {sniffed}, not {ext}")
+                    first = False
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+                digest.update(chunk)
+                out.write(chunk)
+        if size == 0:
+            raise UnsupportedUpload("Empty file")
+    except BaseException:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        raise
+
+    return SpooledUpload(path, expected, size, digest.hexdigest())
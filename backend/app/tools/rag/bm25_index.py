@@ -0,0 +1,102 @@
+import logging
+import math
+import re
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from",
+    "how", "i", "in", "is", "it", "me", "my", "of", "on", "or", "the", "to",
+    "what", "when", "which", "with", "you", "your"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case alphanumeric tokens, stopwords removed ("Form 16" -> form, 16)"""
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory inverted index with Okapi BM25 scoring"""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> parallel lists of doc ids and term frequencies
+        self._postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._doc_lengths: List[int] = []
+        # Read-optimized NumPy view of the postings, rebuilt after writes
+        self._compiled: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None
+        self._lengths: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, text: str) -> int:
+        """Index ``text`` as the next document id"""
+        doc_id = len(self._doc_lengths)
+        tokens = tokenize(text)
+        self._doc_lengths.append(len(tokens))
+
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            ids, tfs = self._postings.setdefault(token, ([], []))
+            ids.append(doc_id)
+            tfs.append(tf)
+
+        self._compiled = None
+        return doc_id
+
+    def compile(self):
+        """Freeze postings into NumPy arrays for vectorized scoring"""
+        if self._compiled is not None:
+            return
+        self._compiled = {
+            term: (np.asarray(ids, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            for term, (ids, tfs) in self._postings.items()
+        }
+        self._lengths = np.asarray(self._doc_lengths, dtype=np.float32)
+
+    def candidates(self, query: str) -> np.ndarray:
+        """Sorted ids of documents containing at least one query term"""
+        self.compile()
+        postings = [self._compiled[t][0] for t in set(tokenize(query)) if t in self._compiled]
+        if not postings:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(postings))
+
+    def search(self, query: str, top_k: int = 10, mask: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """Top ``top_k`` (doc_id, bm25_score) pairs, best first, within ``mask`` if given"""
+        n_docs = len(self._doc_lengths)
+        if not n_docs or top_k <= 0:
+            return []
+
+        self.compile()
+        terms = [t for t in set(tokenize(query)) if t in self._compiled]
+        if not terms:
+            return []
+
+        avg_length = float(self._lengths.mean()) or 1.0
+        scores = np.zeros(n_docs, dtype=np.float32)
+        for term in terms:
+            ids, tfs = self._compiled[term]
+            df = len(ids)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1.0 - self.b + self.b * self._lengths[ids] / avg_length)
+            scores[ids] += idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+
+        if mask is not None:
+            scores[~mask] = 0.0
+
+        matched = np.flatnonzero(scores)
+        if len(matched) > top_k:
+            part = np.argpartition(scores[matched], len(matched) - top_k)[len(matched) - top_k:]
+            matched = matched[part]
+        ranked = matched[np.argsort(scores[matched])[::-1]]
+        return [(int(i), float(scores[i])) for i in ranked]
@@ -0,0 +1,354 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Union
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+ONNX_CONFIG_FILE = "embedding_config.json"
+
+
+class OnnxEmbeddingModel:
+    """
+    ONNX Runtime drop-in for the parts of SentenceTransformer we use
+
+    Reproduces the all-MiniLM-L6-v2 pipeline (transformer -> mean pooling ->
+    L2 normalize) with only ``onnxruntime`` and ``tokenizers`` imported, so
+    neither torch nor transformers is loaded at runtime.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, num_threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, ONNX_CONFIG_FILE), "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.model_name = config["model_name"]
+        self.dim = int(config["dim"])
+        self.max_seq_length = int(config.get("max_seq_length", 256))
+
+        model_file = ONNX_INT8_FILE if quantized else ONNX_FP32_FILE
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding()
+
+        logger.info(f"Loaded ONNX embedding model {self.model_name} ({model_file})")
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        normalize_embeddings: bool = True,
+        **kwargs
+    ) -> np.ndarray:
+        """Same shape contract as SentenceTransformer.encode (numpy output)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        # Sort by length so each batch pads as little as possible
+        order = np.argsort([-len(t) for t in texts])
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+
+        if normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            out /= norms
+        return out[0] if single else out
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+        # Mean pooling over real (non-padding) tokens
+        mask = attention_mask[:, :, np.newaxis].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        counts = np.clip(mask.sum(axis=1), 1e-9, None)
+        return summed / counts
+
+
+def export_onnx(model_name: Optional[str] = None, output_dir: Optional[str] = None, quantize: bool = True) -> str:
+    """
+    Export the Hugging Face encoder to ONNX and (optionally) int8-quantize it
+
+    Needs torch + transformers (build time only). Writes model.onnx,
+    model_int8.onnx, tokenizer.json and embedding_config.json to output_dir.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    model_name = model_name or settings.EMBEDDING_MODEL_NAME
+    output_dir = output_dir or settings.EMBEDDING_ONNX_DIR
+    os.makedirs(output_dir, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+
+    sample = tokenizer(["export sample sentence"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic_axes = {n: {0: "batch", 1: "sequence"} for n in input_names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+    fp32_path = os.path.join(output_dir, ONNX_FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(fp32_path, os.path.join(output_dir, ONNX_INT8_FILE), weight_type=QuantType.QInt8)
+
+    tokenizer.save_pretrained(output_dir)
+    with open(os.path.join(output_dir, ONNX_CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump({
+            "model_name": model_name,
+            "dim": int(model.config.hidden_size),
+            "max_seq_length": min(256, int(tokenizer.model_max_length))
+        }, f)
+
+    logger.info(f"Exported {model_name} to ONNX at {output_dir}")
+    return output_dir
+
+
+def load_embedding_model(backend: Optional[str] = None) -> Any:
+    """
+    Load the embedding model for EMBEDDING_BACKEND ("torch" or "onnx")
+
+    The ONNX backend falls back to SentenceTransformer when onnxruntime or
+    the exported model is missing.
+    """
+    backend = (backend or settings.EMBEDDING_BACKEND).lower()
+
+    if backend == "onnx":
+        try:
+            return OnnxEmbeddingModel(
+                settings.EMBEDDING_ONNX_DIR,
+                quantized=settings.EMBEDDING_ONNX_QUANTIZED,
+                num_threads=settings.EMBEDDING_TORCH_THREADS or None
+            )
+        except Exception as e:
+            logger.error(f"ONNX embedding backend unavailable, falling back to torch: {e}")
+
+    from app.tools.rag.embedding_executor import configure_torch_threads
+    from sentence_transformers import SentenceTransformer
+
+    configure_torch_threads()
+    return SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+
+
+# Cosine similarity every ONNX embedding must keep with the torch one
+COMPATIBILITY_TOLERANCE = 0.99
+
+SAMPLE_TEXTS = [
+    "What documents are required for a personal loan?",
+    "Personal loan interest rates range from 10.5% to 18% per annum based on credit score.",
+    "Minimum credit score of 650 is required for loan approval.",
+    "How long does loan disbursement take after approval?",
+    "Prepayment is allowed after 6 months with a 2% foreclosure charge.",
+    "Can I apply if I am self-employed?",
+    "Salary slips for the last three months and a PAN card are needed for KYC.",
+    "What is the maximum tenure for a personal loan?"
+]
+
+
+def compatibility_report(reference: np.ndarray, candidate: np.ndarray, tolerance: float = COMPATIBILITY_TOLERANCE) -> Dict[str, Any]:
+    """
+    How closely ``candidate`` embeddings track ``reference`` ones
+
+    Checks per-row cosine against ``tolerance`` and whether nearest-neighbour
+    rankings over the sample agree, i.e. whether vectors already in the
+    index (or embedding cache) can be searched with the new backend.
+    """
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    cosine = np.sum(reference * candidate, axis=1)
+
+    # Query each sample with the candidate vector against reference vectors
+    cross = candidate @ reference.T
+    self_rank_top1 = float(np.mean(np.argmax(cross, axis=1) == np.arange(len(cross))))
+
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "top1_agreement": self_rank_top1,
+        "tolerance": tolerance,
+        "compatible": bool(cosine.min() >= tolerance)
+    }
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """Peak resident set size of this process; None where unsupported (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    divisor = 1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor
+
+
+def _measure(backend: str, out_path: str, texts: List[str], runs: int = 20) -> Dict[str, Any]:
+    """Import, load and encode with one backend (run in a fresh process)"""
+    start = time.perf_counter()
+    if backend == "torch":
+        import sentence_transformers  # noqa: F401
+    else:
+        import onnxruntime  # noqa: F401
+        import tokenizers  # noqa: F401
+    import_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if backend == "torch":
+        model = load_embedding_model("torch")
+    else:
+        model = OnnxEmbeddingModel(
+            settings.EMBEDDING_ONNX_DIR,
+            quantized=backend == "onnx-int8",
+            num_threads=settings.EMBEDDING_TORCH_THREADS or None
+        )
+    load_s = time.perf_counter() - start
+
+    model.encode(texts[:1])  # warm-up
+    latencies = []
+    for i in range(runs):
+        start = time.perf_counter()
+        model.encode([texts[i % len(texts)]], normalize_embeddings=True)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    batch = (texts * (256 // len(texts) + 1))[:256]
+    start = time.perf_counter()
+    model.encode(batch, batch_size=settings.EMBEDDING_BATCH_SIZE, normalize_embeddings=True)
+    throughput = len(batch) / (time.perf_counter() - start)
+
+    np.save(out_path, np.asarray(model.encode(texts, normalize_embeddings=True), dtype=np.float32))
+    return {
+        "backend": backend,
+        "import_s": import_s,
+        "load_s": load_s,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "texts_per_s": throughput,
+        "peak_rss_mb": _peak_rss_mb()
+    }
+
+
+def benchmark(texts: Optional[List[str]] = None, backends: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Compare torch and ONNX backends: latency, throughput, peak RSS, import
+    time, and embedding compatibility against torch
+
+    Each backend runs in its own interpreter so import time and RSS are not
+    polluted by the other.
+    """
+    texts = texts or SAMPLE_TEXTS
+    backends = backends or ["torch", "onnx-fp32", "onnx-int8"]
+    report: Dict[str, Any] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        texts_path = os.path.join(tmp, "texts.json")
+        with open(texts_path, "w", encoding="utf-8") as f:
+            json.dump(texts, f)
+
+        embeddings: Dict[str, np.ndarray] = {}
+        for backend in backends:
+            out_path = os.path.join(tmp, f"{backend}.npy")
+            proc = subprocess.run(
+                [sys.executable, "-m", "app.tools.rag.embedding_backends", "_measure", backend, out_path, texts_path],
+                capture_output=True,
+                text=True
+            )
+            if proc.returncode != 0:
+                report[backend] = {"error": proc.stderr.strip().splitlines()[-1:] or ["failed"]}
+                continue
+            report[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            embeddings[backend] = np.load(out_path)
+
+        if "torch" in embeddings:
+            for backend, vectors in embeddings.items():
+                if backend != "torch":
+                    report[backend]["compatibility"] = compatibility_report(embeddings["torch"], vectors)
+
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Usage:
+        python -m app.tools.rag.embedding_backends export [output_dir]
+        python -m app.tools.rag.embedding_backends benchmark [texts.txt]
+
+    ``benchmark`` exits non-zero when an ONNX backend drifts past
+    COMPATIBILITY_TOLERANCE from the torch embeddings.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    args = sys.argv[1:] if argv is None else argv
+    command = args[0] if args else "benchmark"
+
+    if command == "_measure":
+        with open(args[3], "r", encoding="utf-8") as f:
+            texts = json.load(f)
+        print(json.dumps(_measure(args[1], args[2], texts)))
+        return
+
+    if command == "export":
+        print(export_onnx(output_dir=args[1] if len(args) > 1 else None))
+        return
+
+    texts = None
+    if len(args) > 1:
+        with open(args[1], "r", encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    report = benchmark(texts)
+    print(json.dumps(report, indent=2))
+
+    drifted = [b for b, r in report.items() if not r.get("compatibility", {}).get("compatible", True)]
+    if drifted:
+        sys.exit(f"Embeddings outside tolerance: {', '.join(drifted)}")
+
+
+if __name__ == "__main__":
+    main()
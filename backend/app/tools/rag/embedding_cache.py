@@ -0,0 +1,195 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Callable, Dict, List, Optional
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(content: str) -> str:
+    """Stable SHA-256 digest of a document's text"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model name, content hash)
+
+    Layout per model:
+        <cache_dir>/<model>/embeddings.<version>.npy  - float32 (n, dim), unit-length rows
+        <cache_dir>/<model>/index.json                - {"matrix": "embeddings.<version>.npy",
+                                                         "hashes": [sha256, ...]} in row order
+
+    The matrix is opened with ``mmap_mode='r'`` so every worker shares the same
+    page-cache pages and nothing is copied when the row order already matches
+    the requested corpus. A new corpus is written to a new matrix file and
+    switched to by replacing index.json, so a matrix that is still mapped is
+    never overwritten (which Windows refuses) and a reader never sees the new
+    index with a half-written matrix.
+    """
+
+    # Matrix file written by versions without index.json "matrix"
+    LEGACY_MATRIX = "embeddings.npy"
+    MATRIX_FILE = re.compile(r'^embeddings(\.[0-9a-f]+)?\.npy$')
+
+    def __init__(self, cache_dir: Optional[str] = None, model_name: Optional[str] = None):
+        model_name = model_name or settings.EMBEDDING_MODEL_NAME
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', model_name)
+        self.model_name = model_name
+        self.directory = os.path.join(cache_dir or settings.EMBEDDING_CACHE_DIR, safe_name)
+        self.index_path = os.path.join(self.directory, "index.json")
+
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_name: Optional[str] = None
+        self._rows: Dict[str, int] = {}
+        self._hashes: List[str] = []
+
+    def load(self) -> int:
+        """Memory-map the cache from disk; returns the number of cached vectors"""
+        if not os.path.exists(self.index_path):
+            return 0
+
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            hashes = index["hashes"]
+            matrix_name = os.path.basename(index.get("matrix", self.LEGACY_MATRIX))
+            matrix = np.load(os.path.join(self.directory, matrix_name), mmap_mode="r")
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding cache at {self.directory}: {e}")
+            return 0
+
+        if matrix.ndim != 2 or matrix.shape[0] != len(hashes):
+            logger.warning(f"Embedding cache at {self.directory} is inconsistent; ignoring")
+            return 0
+
+        self._matrix = matrix
+        self._matrix_name = matrix_name
+        self._hashes = hashes
+        self._rows = {h: i for i, h in enumerate(hashes)}
+        return len(hashes)
+
+    def get_or_encode(
+        self,
+        contents: List[str],
+        encode: Callable[[List[str]], np.ndarray],
+        batch_size: Optional[int] = None
+    ) -> np.ndarray:
+        """
+        Return unit-length embeddings for ``contents`` in order
+
+        Args:
+            contents: Document texts
+            encode: Batch encoder returning normalized float32 rows
+            batch_size: Documents per encode call
+
+        Returns:
+            (len(contents), dim) float32 array; a read-only memory map when
+            the cache already holds exactly this corpus in this order
+        """
+        if self._matrix is None:
+            self.load()
+
+        hashes = [content_hash(c) for c in contents]
+        if hashes == self._hashes:
+            logger.info(f"Embedding cache hit for all {len(hashes)} documents")
+            return self._matrix
+
+        matrix = self.encode(contents, encode, batch_size=batch_size, hashes=hashes)
+        return self.save(hashes, matrix)
+
+    def encode(
+        self,
+        contents: List[str],
+        encode: Callable[[List[str]], np.ndarray],
+        batch_size: Optional[int] = None,
+        hashes: Optional[List[str]] = None
+    ) -> np.ndarray:
+        """Look ``contents`` up in the cache and encode only the misses (no write)"""
+        if self._matrix is None:
+            self.load()
+
+        hashes = hashes or [content_hash(c) for c in contents]
+        missing = [i for i, h in enumerate(hashes) if h not in self._rows]
+        # Duplicate texts only need one encode
+        to_encode = list(dict.fromkeys(hashes[i] for i in missing))
+        texts = {hashes[i]: contents[i] for i in missing}
+
+        fresh: Dict[str, np.ndarray] = {}
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        for start in range(0, len(to_encode), batch_size):
+            batch = to_encode[start:start + batch_size]
+            vectors = np.asarray(encode([texts[h] for h in batch]), dtype=np.float32)
+            fresh.update(zip(batch, vectors))
+
+        logger.info(
+            f"Embedding cache: {len(hashes) - len(missing)} hits, "
+            f"{len(to_encode)} documents encoded"
+        )
+
+        rows = [fresh[h] if h in fresh else self._matrix[self._rows[h]] for h in hashes]
+        if not rows:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(np.stack(rows), dtype=np.float32)
+
+    def save(self, hashes: List[str], matrix: np.ndarray) -> np.ndarray:
+        """Persist exactly this corpus and return its memory-mapped matrix"""
+        if self._matrix is None:
+            self.load()
+        if hashes == self._hashes:
+            return self._matrix
+        self._write(hashes, np.ascontiguousarray(matrix, dtype=np.float32))
+        return self._matrix if self._matrix is not None else matrix
+
+    def _write(self, hashes: List[str], matrix: np.ndarray):
+        """Atomically switch the cache to this corpus, then re-map it"""
+        os.makedirs(self.directory, exist_ok=True)
+        pid = os.getpid()
+        # Named after the corpus: the same corpus written twice reuses the
+        # file, a different one never touches a matrix someone has mapped
+        version = hashlib.sha256("\n".join(hashes).encode("utf-8")).hexdigest()[:16]
+        matrix_name = f"embeddings.{version}.npy"
+        matrix_path = os.path.join(self.directory, matrix_name)
+        tmp_matrix = f"{matrix_path}.{pid}.tmp.npy"
+        tmp_index = f"{self.index_path}.{pid}.tmp"
+        previous = self._matrix_name
+
+        try:
+            if not os.path.exists(matrix_path):
+                np.save(tmp_matrix, matrix)
+                os.replace(tmp_matrix, matrix_path)
+            with open(tmp_index, "w", encoding="utf-8") as f:
+                json.dump({"model": self.model_name, "matrix": matrix_name, "hashes": hashes}, f)
+            # The matrix is complete before any index names it
+            os.replace(tmp_index, self.index_path)
+        except Exception as e:
+            logger.warning(f"Failed to write embedding cache: {e}")
+            for path in (tmp_matrix, tmp_index):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._matrix = None
+            return
+
+        self.load()
+        self._remove_stale({matrix_name, previous})
+
+    def _remove_stale(self, keep: set):
+        """
+        Delete matrix files other than ``keep`` (the current one, and the one
+        it replaced, which readers of the old index may still be opening)
+        """
+        for name in os.listdir(self.directory):
+            if name in keep or not self.MATRIX_FILE.match(name):
+                continue
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError as e:
+                # Still mapped by another process on Windows; retried on the next write
+                logger.debug(f"Keeping embedding cache file {name}: {e}")
+
+
+embedding_cache = EmbeddingCache()
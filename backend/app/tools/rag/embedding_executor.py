@@ -0,0 +1,106 @@
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def configure_torch_threads(num_threads: Optional[int] = None) -> Optional[int]:
+    """
+    Cap torch intra-op threads so encode does not oversubscribe the cores
+    shared with uvicorn workers. Returns the applied value, or None.
+    """
+    num_threads = settings.EMBEDDING_TORCH_THREADS if num_threads is None else num_threads
+    if not num_threads or num_threads <= 0:
+        return None
+
+    try:
+        import torch
+        torch.set_num_threads(num_threads)
+    except Exception as e:
+        logger.warning(f"Could not cap torch threads: {e}")
+        return None
+
+    logger.info(f"torch intra-op threads capped at {num_threads}")
+    return num_threads
+
+
+class EmbeddingExecutor:
+    """
+    Dedicated, bounded thread pool for CPU-bound embedding work
+
+    At most EMBEDDING_WORKERS encodes run at once and at most
+    EMBEDDING_MAX_QUEUE more wait; further callers await a slot instead of
+    piling work onto the pool.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None):
+        self.max_workers = max_workers or settings.EMBEDDING_WORKERS
+        self.max_queue = settings.EMBEDDING_MAX_QUEUE if max_queue is None else max_queue
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="embed")
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self._wait_ms = 0.0
+        self._run_ms = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the embedding pool"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue)
+
+        enqueued = time.perf_counter()
+        self.queued += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        try:
+            async with self._slots:
+                return await asyncio.get_running_loop().run_in_executor(
+                    self._pool,
+                    functools.partial(self._timed, fn, enqueued, *args, **kwargs)
+                )
+        finally:
+            self.queued -= 1
+
+    def _timed(self, fn: Callable[..., Any], enqueued: float, *args, **kwargs) -> Any:
+        started = time.perf_counter()
+        self._wait_ms += (started - enqueued) * 1000
+        self.running += 1
+        try:
+            result = fn(*args, **kwargs)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._run_ms += (time.perf_counter() - started) * 1000
+
+    def stats(self) -> Dict[str, Any]:
+        finished = self.completed + self.failed
+        return {
+            "workers": self.max_workers,
+            "queue_capacity": self.max_queue,
+            # Tasks submitted but not finished, including the ones running
+            "queue_depth": self.queued,
+            "running": self.running,
+            "max_queue_depth": self.max_queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait_ms": self._wait_ms / finished if finished else 0.0,
+            "avg_run_ms": self._run_ms / finished if finished else 0.0
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+embedding_executor = EmbeddingExecutor()
@@ -0,0 +1,179 @@
+import logging
+import os
+import time
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+INDEX_TYPES = {"flat", "ivf", "hnsw"}
+
+
+def _import_faiss():
+    """Import faiss lazily so the exact path keeps working without it"""
+    try:
+        import faiss
+        return faiss
+    except Exception as e:
+        logger.error(f"faiss unavailable: {e}")
+        return None
+
+
+def faiss_available() -> bool:
+    """Whether the faiss-cpu package can be imported"""
+    return _import_faiss() is not None
+
+
+def choose_index_type(n_docs: int) -> str:
+    """Pick an index type from corpus size when FAISS_INDEX_TYPE is 'auto'"""
+    configured = settings.FAISS_INDEX_TYPE.lower()
+    if configured in INDEX_TYPES:
+        return configured
+
+    # Exact search is cheapest below a few thousand vectors; HNSW gives the
+    # best latency in the mid range; IVF keeps memory flat for huge corpora.
+    if n_docs < settings.FAISS_HNSW_MIN_DOCS:
+        return "flat"
+    if n_docs < settings.FAISS_IVF_MIN_DOCS:
+        return "hnsw"
+    return "ivf"
+
+
+class FaissIndex:
+    """Inner-product FAISS index over unit-length embeddings (i.e. cosine)"""
+
+    def __init__(self, index: Any, index_type: str, read_only: bool = False, owner: Any = None):
+        self.index = index
+        self.index_type = index_type
+        # Memory-mapped indexes cannot be appended to
+        self.read_only = read_only
+        # The SWIG object that owns ``index`` when it is a downcast view;
+        # freeing it would leave ``index`` pointing at released memory
+        self._owner = owner
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.index.ntotal)
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, index_type: Optional[str] = None) -> Optional["FaissIndex"]:
+        """Build an index over the rows of ``matrix`` (already normalized)"""
+        faiss = _import_faiss()
+        if faiss is None:
+            return None
+
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        n_docs, dim = matrix.shape
+        index_type = index_type or choose_index_type(n_docs)
+
+        if index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, settings.FAISS_HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            index.hnsw.efConstruction = settings.FAISS_HNSW_EF_CONSTRUCTION
+            index.hnsw.efSearch = settings.FAISS_HNSW_EF_SEARCH
+        elif index_type == "ivf":
+            # ~4*sqrt(N) lists, but never more than the training set can support
+            nlist = max(1, min(int(4 * np.sqrt(n_docs)), n_docs // 39))
+            quantizer = faiss.IndexFlatIP(dim)
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            index.train(matrix)
+            index.nprobe = min(settings.FAISS_IVF_NPROBE, nlist)
+        else:
+            index_type = "flat"
+            index = faiss.IndexFlatIP(dim)
+
+        if n_docs:
+            index.add(matrix)
+
+        logger.info(f"Built FAISS {index_type} index over {n_docs} vectors")
+        return cls(index, index_type)
+
+    def search(self, queries: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (scores, ids) of shape (n_queries, top_k); missing ids are -1"""
+        queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        return self.index.search(queries, top_k)
+
+    def save(self, path: str):
+        """Write the index to disk"""
+        faiss = _import_faiss()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        faiss.write_index(self.index, path)
+        logger.info(f"Saved FAISS {self.index_type} index to {path}")
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> Optional["FaissIndex"]:
+        """Load an index from disk, memory-mapping it when faiss supports it"""
+        faiss = _import_faiss()
+        if faiss is None or not os.path.exists(path):
+            return None
+
+        index = None
+        read_only = False
+        if mmap:
+            try:
+                index = faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                read_only = True
+            except Exception as e:
+                logger.warning(f"FAISS mmap load failed, reading into memory: {e}")
+        if index is None:
+            index = faiss.read_index(path)
+
+        base = faiss.downcast_index(index)
+        if isinstance(base, faiss.IndexHNSWFlat):
+            index_type = "hnsw"
+            base.hnsw.efSearch = settings.FAISS_HNSW_EF_SEARCH
+        elif isinstance(base, faiss.IndexIVF):
+            index_type = "ivf"
+            base.nprobe = min(settings.FAISS_IVF_NPROBE, base.nlist)
+        else:
+            index_type = "flat"
+
+        logger.info(f"Loaded FAISS {index_type} index from {path} ({index.ntotal} vectors)")
+        return cls(base, index_type, read_only=read_only, owner=index)
+
+
+def recall_report(index: FaissIndex, matrix: np.ndarray, queries: np.ndarray, top_k: int = 10) -> Dict[str, Any]:
+    """
+    Compare an ANN index against exact matrix search
+
+    Args:
+        index: FAISS index built over ``matrix``
+        matrix: Normalized document embeddings (exact ground truth)
+        queries: Normalized query embeddings
+        top_k: Cut-off for recall@k
+
+    Returns:
+        {
+            "index_type": str,
+            "n_docs": int,
+            "n_queries": int,
+            "recall_at_k": float,
+            "exact_ms_per_query": float,
+            "ann_ms_per_query": float
+        }
+    """
+    queries = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+    n_queries = queries.shape[0]
+    k = min(top_k, matrix.shape[0])
+
+    start = time.perf_counter()
+    exact_ids = []
+    for q in queries:
+        scores = matrix @ q
+        exact_ids.append(np.argpartition(scores, len(scores) - k)[len(scores) - k:])
+    exact_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    ann_ids = [index.search(q, k)[1][0] for q in queries]
+    ann_ms = (time.perf_counter() - start) * 1000
+
+    hits = sum(len(set(e.tolist()) & set(a.tolist())) for e, a in zip(exact_ids, ann_ids))
+
+    return {
+        "index_type": index.index_type,
+        "n_docs": int(matrix.shape[0]),
+        "n_queries": n_queries,
+        "recall_at_k": hits / float(max(1, n_queries * k)),
+        "exact_ms_per_query": exact_ms / max(1, n_queries),
+        "ann_ms_per_query": ann_ms / max(1, n_queries)
+    }
@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+import numpy as np
+from app.config import settings
+from app.tools.rag.embedding_cache import EmbeddingCache, content_hash, embedding_cache
+from app.tools.rag.embedding_executor import embedding_executor
+from app.tools.rag.vector_store import VectorStore, vector_store
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = {".md", ".markdown", ".txt", ".pdf"}
+
+
+def iter_source_files(directory: str) -> Iterator[str]:
+    """Yield supported policy files under ``directory`` in a stable order"""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() in SUPPORTED_EXTENSIONS:
+                yield os.path.join(root, name)
+
+
+def read_document(path: str) -> str:
+    """Read a Markdown/TXT file, or the text layer of a PDF via pdfminer"""
+    if path.lower().endswith(".pdf"):
+        from pdfminer.high_level import extract_text
+        return extract_text(path)
+
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int) -> Iterator[str]:
+    """Split text into windows of ``chunk_size`` words overlapping by ``overlap``"""
+    words = text.split()
+    if not words:
+        return
+
+    step = max(1, chunk_size - overlap)
+    for start in range(0, len(words), step):
+        yield " ".join(words[start:start + chunk_size])
+        if start + chunk_size >= len(words):
+            break
+
+
+def iter_chunks(
+    directory: str,
+    stats: Optional[Dict[str, int]] = None,
+    chunk_size: Optional[int] = None,
+    overlap: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """Yield {"content", "metadata"} chunks for every policy file"""
+    chunk_size = chunk_size or settings.KB_CHUNK_SIZE
+    overlap = settings.KB_CHUNK_OVERLAP if overlap is None else overlap
+
+    for path in iter_source_files(directory):
+        try:
+            text = read_document(path)
+        except Exception as e:
+            logger.warning(f"Skipping unreadable policy file {path}: {e}")
+            continue
+        if stats is not None:
+            stats["files"] += 1
+
+        source = os.path.relpath(path, directory).replace(os.sep, "/")
+        category = os.path.splitext(os.path.basename(path))[0]
+        for i, chunk in enumerate(chunk_text(text, chunk_size, overlap)):
+            yield {
+                "content": chunk,
+                "metadata": {"category": category, "source": source, "chunk": i}
+            }
+
+
+def dedupe(chunks: Iterable[Dict[str, Any]], seen: Set[str], stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """Drop chunks whose content hash was already seen"""
+    for chunk in chunks:
+        stats["chunks"] += 1
+        digest = content_hash(chunk["content"])
+        if digest in seen:
+            stats["duplicates"] += 1
+            continue
+        seen.add(digest)
+        chunk["hash"] = digest
+        yield chunk
+
+
+def batched(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Group an iterable into lists of at most ``size`` items"""
+    batch: List[Dict[str, Any]] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ingest_directory(
+    directory: Optional[str] = None,
+    store: VectorStore = vector_store,
+    cache: EmbeddingCache = embedding_cache
+) -> Dict[str, Any]:
+    """
+    Ingest a directory of policy files into ``store``
+
+    Files stream through read -> chunk -> dedupe -> batch -> encode -> store;
+    every stage is a generator, so only one batch of chunk text is in flight.
+
+    Args:
+        directory: Folder of .md/.txt/.pdf files (defaults to KNOWLEDGE_BASE_DIR)
+        store: Vector store receiving the chunks
+        cache: Embedding cache consulted before encoding
+
+    Returns:
+        {
+            "directory": str,
+            "files": int,
+            "chunks": int,
+            "duplicates": int,
+            "added": int,
+            "seconds": float
+        }
+    """
+    directory = directory or settings.KNOWLEDGE_BASE_DIR
+    if not os.path.isdir(directory):
+        raise FileNotFoundError(f"Knowledge base directory not found: {directory}")
+
+    start = time.perf_counter()
+    stats = {"files": 0, "chunks": 0, "duplicates": 0, "added": 0}
+    # Chunks already in the store count as duplicates, so re-ingesting is idempotent
+    hashes = [content_hash(doc["content"]) for doc in store.documents]
+    seen = set(hashes)
+
+    pipeline = batched(dedupe(iter_chunks(directory, stats), seen, stats), settings.KB_INGEST_BATCH_SIZE)
+    while True:
+        # File reads, pdfminer and chunking run on a worker thread, one batch at a time
+        batch = await asyncio.to_thread(next, pipeline, None)
+        if batch is None:
+            break
+        contents = [chunk["content"] for chunk in batch]
+        batch_hashes = [chunk["hash"] for chunk in batch]
+        embeddings = await embedding_executor.run(cache.encode, contents, store.encode_batch, hashes=batch_hashes)
+        await store.add_embedded_documents(contents, [chunk["metadata"] for chunk in batch], embeddings)
+        hashes.extend(batch_hashes)
+        stats["added"] += len(batch)
+
+    if stats["added"]:
+        # Persist the whole corpus, then serve it from the shared mapping
+        saved = await asyncio.to_thread(cache.save, hashes, np.asarray(store.embeddings))
+        store.share_matrix(saved)
+
+    result = {
+        "directory": directory,
+        **stats,
+        "seconds": round(time.perf_counter() - start, 3)
+    }
+    logger.info(f"Knowledge base ingested: {result}")
+    return result
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """
+    Pre-warm the embedding cache (and FAISS index) before the API starts
+
+    Usage: python -m app.tools.rag.ingestion [directory]
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    args = sys.argv[1:] if argv is None else argv
+    directory = args[0] if args else settings.KNOWLEDGE_BASE_DIR
+
+    result = asyncio.run(ingest_directory(directory))
+    if settings.VECTOR_INDEX_BACKEND == "faiss":
+        vector_store.save_index()
+    print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import os
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Optional
+from app.config import settings
+from app.tools.rag.embedding_cache import embedding_cache
+from app.tools.rag.embedding_executor import embedding_executor
+from app.tools.rag.ingestion import ingest_directory, iter_source_files
+from app.tools.rag.vector_store import VectorStore, vector_store
+
+logger = logging.getLogger(__name__)
+
+# Fallback policy snippets used when KNOWLEDGE_BASE_DIR has no files
+BUILTIN_DOCUMENTS = [
+    {
+        "content": "Personal loan eligibility: Applicants must be between 21-60 years old with minimum monthly income of ₹25,000. Credit score should be above 650.",
+        "metadata": {"category": "eligibility"}
+    },
+    {
+        "content": "Interest rates range from 10.5% to 18% per annum depending on credit profile and loan amount.",
+        "metadata": {"category": "interest_rates"}
+    },
+    {
+        "content": "Required documents include: salary slips (last 3 months), PAN card, Aadhaar card, and bank statements (last 6 months).",
+        "metadata": {"category": "documents"}
+    },
+    {
+        "content": "Loan amount ranges from ₹50,000 to ₹50,00,000. Repayment tenure options: 12 to 60 months.",
+        "metadata": {"category": "loan_details"}
+    },
+    {
+        "content": "Processing time is typically 2-3 business days after document verification. Instant approvals available for pre-qualified customers.",
+        "metadata": {"category": "processing"}
+    }
+]
+
+
+class Snapshot:
+    """An immutable, versioned vector store"""
+
+    def __init__(self, version: int, store: VectorStore, source: str):
+        self.version = version
+        self.store = store
+        self.source = source
+        self.created_at = datetime.utcnow()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "documents": len(self.store),
+            "source": self.source,
+            "fingerprint": self.store.fingerprint(),
+            "created_at": self.created_at.isoformat()
+        }
+
+
+class KnowledgeBase:
+    """
+    Publishes versioned knowledge-base snapshots with atomic hot swap
+
+    Readers grab ``current`` once per query; a rebuild fills a brand-new store
+    and publishes it with a single reference assignment, so in-flight queries
+    finish on the snapshot they started with. Ingestion, index builds and
+    freezing run on worker threads; only the swap happens on the event loop.
+    """
+
+    def __init__(self, template: VectorStore):
+        self._template = template
+        self._current: Optional[Snapshot] = None
+        self._history: Deque[Snapshot] = deque(maxlen=max(1, settings.KB_SNAPSHOT_HISTORY))
+        self._next_version = 1
+        self._rebuild_task: Optional[asyncio.Task] = None
+        self._last_error: Optional[str] = None
+
+    @property
+    def current(self) -> VectorStore:
+        """Store of the live snapshot (the empty template before the first build)"""
+        snapshot = self._current
+        return snapshot.store if snapshot else self._template
+
+    @property
+    def version(self) -> int:
+        snapshot = self._current
+        return snapshot.version if snapshot else 0
+
+    @property
+    def rebuilding(self) -> bool:
+        return self._rebuild_task is not None and not self._rebuild_task.done()
+
+    async def rebuild(self, directory: Optional[str] = None) -> Dict[str, Any]:
+        """Build a new snapshot from the knowledge base and publish it"""
+        directory = directory or settings.KNOWLEDGE_BASE_DIR
+        # Always a fresh store: nothing reads it until it is published
+        store = self._template.spawn()
+
+        if os.path.isdir(directory) and next(iter_source_files(directory), None):
+            await ingest_directory(directory, store=store)
+            source = directory
+        else:
+            await self._load_builtin_documents(store)
+            source = "builtin"
+
+        await asyncio.to_thread(self._prepare, store)
+        return self.publish(store, source).to_dict()
+
+    def _prepare(self, store: VectorStore):
+        """Build search indexes and freeze (CPU-bound; runs off the event loop)"""
+        # Reuse a persisted ANN index when it matches, otherwise build one
+        if settings.VECTOR_INDEX_BACKEND == "faiss" and not store.load_index():
+            store.save_index()
+        store.freeze()
+
+    def publish(self, store: VectorStore, source: str) -> Snapshot:
+        """Make ``store`` the live snapshot (freezing it first if needed)"""
+        if not store.frozen:
+            store.freeze()
+        snapshot = Snapshot(self._next_version, store, source)
+        self._next_version += 1
+
+        self._history.append(snapshot)
+        self._current = snapshot
+        logger.info(f"Published knowledge base v{snapshot.version} ({len(store)} documents from {source})")
+        return snapshot
+
+    def start_rebuild(self, directory: Optional[str] = None) -> bool:
+        """Kick off a background rebuild; returns False if one is already running"""
+        if self.rebuilding:
+            return False
+
+        self._last_error = None
+        self._rebuild_task = asyncio.create_task(self._run_rebuild(directory))
+        return True
+
+    async def _run_rebuild(self, directory: Optional[str]):
+        try:
+            await self.rebuild(directory)
+        except Exception as e:
+            self._last_error = str(e)
+            logger.error(f"Knowledge base rebuild failed: {e}", exc_info=True)
+
+    def rollback(self, version: Optional[int] = None) -> Snapshot:
+        """Re-publish a retained snapshot (default: the one before current)"""
+        if version is None:
+            older = [s for s in self._history if s.version < self.version]
+            if not older:
+                raise ValueError("No previous knowledge base version to roll back to")
+            target = older[-1]
+        else:
+            target = next((s for s in self._history if s.version == version), None)
+            if target is None:
+                raise ValueError(f"Knowledge base version {version} is not retained")
+
+        self._current = target
+        logger.info(f"Rolled knowledge base back to v{target.version}")
+        return target
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "current_version": self.version,
+            "rebuilding": self.rebuilding,
+            "last_error": self._last_error,
+            "versions": [s.to_dict() for s in self._history]
+        }
+
+    async def _load_builtin_documents(self, store: VectorStore):
+        contents = [doc["content"] for doc in BUILTIN_DOCUMENTS]
+        # Only new or changed documents are encoded; the rest come
+        # straight from the memory-mapped embedding cache
+        embeddings = await embedding_executor.run(embedding_cache.get_or_encode, contents, store.encode_batch)
+        await store.add_embedded_documents(
+            contents,
+            [dict(doc["metadata"]) for doc in BUILTIN_DOCUMENTS],
+            embeddings
+        )
+
+
+knowledge_base = KnowledgeBase(vector_store)
@@ -0,0 +1,94 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _as_values(condition: Any) -> List[Any]:
+    """A filter condition is a single value or a list/tuple/set of allowed values"""
+    if isinstance(condition, (list, tuple, set, frozenset)):
+        return list(condition)
+    return [condition]
+
+
+class MetadataIndex:
+    """
+    Per-field value -> bitmap index over document metadata
+
+    Filters are dicts ANDed across fields; each field takes one value or a
+    list of allowed values (OR), e.g.
+        {"category": "documents"}
+        {"category": ["eligibility", "interest_rates"], "source": "faq.md"}
+    Indexed fields resolve to NumPy bool bitmaps combined with logical and/or;
+    any other field falls back to a scan over the stored metadata.
+    """
+
+    def __init__(self, fields: Iterable[str]):
+        self.fields = set(fields)
+        self._size = 0
+        # field -> value -> doc ids (append-only while building)
+        self._postings: Dict[str, Dict[Any, List[int]]] = {f: {} for f in self.fields}
+        # field -> value -> bool bitmap of length _size, built on demand
+        self._bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+
+    def add(self, metadata: Dict[str, Any]) -> int:
+        doc_id = self._size
+        self._size += 1
+        for field in self.fields:
+            value = metadata.get(field)
+            try:
+                self._postings[field].setdefault(value, []).append(doc_id)
+            except TypeError:
+                # Unhashable values are only reachable through the scan path
+                pass
+        self._bitmaps = {}
+        return doc_id
+
+    def compile(self):
+        """Materialize every bitmap (done once when a snapshot is frozen)"""
+        for field, values in self._postings.items():
+            for value in values:
+                self._bitmap(field, value)
+
+    def mask(self, filters: Optional[Dict[str, Any]], documents: List[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Bool mask of documents matching ``filters`` (None when there is no filter)"""
+        if not filters:
+            return None
+
+        mask = np.ones(self._size, dtype=bool)
+        for field, condition in filters.items():
+            allowed = _as_values(condition)
+            if field in self.fields:
+                field_mask = np.zeros(self._size, dtype=bool)
+                for value in allowed:
+                    bitmap = self._bitmap(field, value)
+                    if bitmap is not None:
+                        field_mask |= bitmap
+            else:
+                field_mask = np.fromiter(
+                    (doc["metadata"].get(field) in allowed for doc in documents),
+                    dtype=bool,
+                    count=len(documents)
+                )
+            mask &= field_mask
+            if not mask.any():
+                break
+
+        return mask
+
+    def _bitmap(self, field: str, value: Any) -> Optional[np.ndarray]:
+        try:
+            cached = self._bitmaps.get(field, {}).get(value)
+            ids = self._postings[field].get(value)
+        except TypeError:
+            return None
+        if cached is not None:
+            return cached
+        if ids is None:
+            return None
+
+        bitmap = np.zeros(self._size, dtype=bool)
+        bitmap[ids] = True
+        self._bitmaps.setdefault(field, {})[value] = bitmap
+        return bitmap
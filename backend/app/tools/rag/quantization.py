@@ -0,0 +1,150 @@
+import logging
+import time
+from typing import Any, Dict, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+QUANTIZATION_MODES = {"int8", "binary"}
+
+# Rows scored per block so the int8 -> float32 upcast stays small
+BLOCK_ROWS = 8192
+
+# popcount of every byte value, for Hamming distance on packed bits
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+class QuantizedIndex:
+    """
+    Compressed first-pass index over unit-length embeddings
+
+    int8 keeps one signed byte per dimension (4x smaller than float32);
+    binary keeps one sign bit per dimension (32x smaller). Candidates from
+    the compressed pass are rescored exactly against the float32 rows, which
+    can stay in a memory-mapped file so only the rescored pages are touched.
+    """
+
+    def __init__(self, mode: str, codes: np.ndarray, scale: np.ndarray, dim: int):
+        self.mode = mode
+        self.codes = codes
+        self.scale = scale
+        self.dim = dim
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.codes.shape[0])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.codes.nbytes + self.scale.nbytes)
+
+    @classmethod
+    def build(cls, matrix: np.ndarray, mode: str = "int8") -> "QuantizedIndex":
+        """Quantize the rows of ``matrix``"""
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization mode: {mode}")
+
+        matrix = np.asarray(matrix, dtype=np.float32)
+        dim = matrix.shape[1]
+
+        if mode == "binary":
+            codes = np.packbits(matrix > 0, axis=1)
+            scale = np.ones(0, dtype=np.float32)
+        else:
+            # Per-dimension symmetric scale: the largest |value| maps to 127
+            max_abs = np.abs(matrix).max(axis=0) if len(matrix) else np.ones(dim, dtype=np.float32)
+            max_abs[max_abs == 0] = 1.0
+            scale = (127.0 / max_abs).astype(np.float32)
+            codes = np.clip(np.rint(matrix * scale), -127, 127).astype(np.int8)
+
+        return cls(mode, np.ascontiguousarray(codes), scale, dim)
+
+    def first_pass(self, query: np.ndarray) -> np.ndarray:
+        """Approximate similarity of ``query`` to every row (higher is better)"""
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.empty(self.ntotal, dtype=np.float32)
+
+        if self.mode == "binary":
+            query_bits = np.packbits(query > 0)
+            for start in range(0, self.ntotal, BLOCK_ROWS):
+                block = self.codes[start:start + BLOCK_ROWS]
+                hamming = _POPCOUNT[np.bitwise_xor(block, query_bits)].sum(axis=1, dtype=np.int32)
+                scores[start:start + len(block)] = -hamming
+        else:
+            # x ~= codes / scale, so q . x ~= (q / scale) . codes
+            scaled_query = query / self.scale
+            for start in range(0, self.ntotal, BLOCK_ROWS):
+                block = self.codes[start:start + BLOCK_ROWS].astype(np.float32)
+                scores[start:start + len(block)] = block @ scaled_query
+
+        return scores
+
+    def search(self, query: np.ndarray, top_k: int, matrix: np.ndarray, rescore_factor: int = 4) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compressed first pass, then exact rescoring of the best candidates
+
+        Returns (ids, cosine scores), best first.
+        """
+        n = self.ntotal
+        top_k = min(top_k, n)
+        if top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        approx = self.first_pass(query)
+        n_candidates = min(n, max(top_k, top_k * rescore_factor))
+        if n_candidates < n:
+            candidates = np.argpartition(approx, n - n_candidates)[n - n_candidates:]
+        else:
+            candidates = np.arange(n)
+
+        candidates.sort()  # sequential reads from a memory-mapped matrix
+        exact = matrix[candidates] @ np.asarray(query, dtype=np.float32)
+        order = np.argsort(exact)[::-1][:top_k]
+        return candidates[order], exact[order]
+
+
+def quantization_report(matrix: np.ndarray, queries: np.ndarray, top_k: int = 10, rescore_factor: int = 4) -> Dict[str, Any]:
+    """
+    Recall@k, latency and memory of each quantization mode vs exact float32
+
+    Args:
+        matrix: Normalized document embeddings
+        queries: Normalized query embeddings
+        top_k: Cut-off for recall@k
+        rescore_factor: Candidates rescored per requested result
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+    n = matrix.shape[0]
+    k = min(top_k, n)
+
+    start = time.perf_counter()
+    exact_ids = []
+    for q in queries:
+        scores = matrix @ q
+        exact_ids.append(set(np.argpartition(scores, n - k)[n - k:].tolist()))
+    exact_ms = (time.perf_counter() - start) * 1000 / max(1, len(queries))
+
+    report: Dict[str, Any] = {
+        "n_docs": n,
+        "n_queries": len(queries),
+        "top_k": k,
+        "float32": {"bytes": int(matrix.nbytes), "ms_per_query": exact_ms, "recall_at_k": 1.0}
+    }
+
+    for mode in sorted(QUANTIZATION_MODES):
+        index = QuantizedIndex.build(matrix, mode)
+        start = time.perf_counter()
+        hits = 0
+        for q, truth in zip(queries, exact_ids):
+            ids, _ = index.search(q, k, matrix, rescore_factor=rescore_factor)
+            hits += len(truth & set(ids.tolist()))
+        elapsed = (time.perf_counter() - start) * 1000 / max(1, len(queries))
+        report[mode] = {
+            "bytes": index.nbytes,
+            "compression": matrix.nbytes / float(max(1, index.nbytes)),
+            "ms_per_query": elapsed,
+            "recall_at_k": hits / float(max(1, len(queries) * k))
+        }
+
+    return report
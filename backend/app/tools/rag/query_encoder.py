@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from app.config import settings
+from app.tools.rag.embedding_executor import embedding_executor
+from app.tools.rag.vector_store import vector_store
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(text: str) -> str:
+    """Canonical cache key: lower-cased, whitespace-collapsed (MiniLM is uncased)"""
+    return re.sub(r'\s+', ' ', text).strip().lower()
+
+
+class QueryEncoder:
+    """
+    Query-embedding LRU cache in front of a dynamic micro-batcher
+
+    Cache misses are queued; a single worker task gathers whatever arrives
+    within QUERY_BATCH_WINDOW_MS (up to QUERY_BATCH_MAX) and runs one batched
+    encode on the embedding thread pool. Concurrent requests for the same query share
+    one pending future.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        cache_size: Optional[int] = None,
+        window_ms: Optional[float] = None,
+        max_batch: Optional[int] = None
+    ):
+        self._encode = encode
+        self.cache_size = settings.QUERY_CACHE_SIZE if cache_size is None else cache_size
+        self.window = (settings.QUERY_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000.0
+        self.max_batch = max_batch or settings.QUERY_BATCH_MAX
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+        self.batched_queries = 0
+
+    async def encode(self, text: str) -> np.ndarray:
+        """Unit-length float32 embedding for ``text`` (read-only array)"""
+        key = normalize_query(text)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        future = self._pending.get(key)
+        if future is None:
+            self._ensure_worker()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            self._queue.put_nowait(key)
+
+        # Shield so one cancelled caller does not cancel the shared result
+        return await asyncio.shield(future)
+
+    async def encode_many(self, texts: List[str]) -> np.ndarray:
+        """Embeddings for many texts: cache hits plus one batched encode for the rest"""
+        keys = [normalize_query(t) for t in texts]
+        vectors: Dict[str, np.ndarray] = {}
+        missing = []
+        for key in dict.fromkeys(keys):
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                vectors[key] = cached
+            else:
+                missing.append(key)
+        missed = set(missing)
+        n_missed = sum(1 for k in keys if k in missed)
+        self.hits += len(keys) - n_missed
+        self.misses += n_missed
+
+        if missing:
+            encoded = await embedding_executor.run(self._encode, missing)
+            self.batches += 1
+            self.batched_queries += len(missing)
+            for key, vector in zip(missing, encoded):
+                vector = np.array(vector, dtype=np.float32)
+                vector.flags.writeable = False
+                self._remember(key, vector)
+                vectors[key] = vector
+
+        return np.stack([vectors[k] for k in keys]) if keys else np.zeros((0, 0), dtype=np.float32)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cache_size": len(self._cache),
+            "cache_capacity": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "batches": self.batches,
+            "avg_batch_size": self.batched_queries / self.batches if self.batches else 0.0,
+            "pending": len(self._pending)
+        }
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                vectors = await embedding_executor.run(self._encode, batch)
+            except Exception as e:
+                logger.error(f"Query encode batch failed: {e}")
+                for key in batch:
+                    future = self._pending.pop(key, None)
+                    if future is not None and not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.batched_queries += len(batch)
+            for key, vector in zip(batch, vectors):
+                vector = np.array(vector, dtype=np.float32)
+                vector.flags.writeable = False
+                self._remember(key, vector)
+                future = self._pending.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(vector)
+
+    def _remember(self, key: str, vector: np.ndarray):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = vector
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+query_encoder = QueryEncoder(vector_store.encode_batch)
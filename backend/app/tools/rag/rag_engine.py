@@ -1,59 +1,48 @@
 import logging
-from typing import List, Dict, Any
-from sentence_transformers import SentenceTransformer
+from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
-from app.tools.rag.vector_store import vector_store
+from app.config import settings
+from app.tools.rag.vector_store import VectorStore, vector_store
+from app.tools.rag.knowledge_base import knowledge_base
+from app.tools.rag.query_encoder import query_encoder
+from app.tools.rag.semantic_cache import semantic_cache
 
 logger = logging.getLogger(__name__)
 
 
+def reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], k: int = 60) -> List[Tuple[int, float]]:
+    """Fuse ranked result lists by summing 1 / (k + rank) per document id"""
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, result in enumerate(ranking, start=1):
+            fused[result["id"]] = fused.get(result["id"], 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
 class RAGEngine:
     """Retrieval-Augmented Generation for knowledge queries"""
     
     def __init__(self):
-        self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        # Share the store's model instead of loading MiniLM a second time
+        self.embedding_model = vector_store.embedding_model
         self.initialized = False
     
     async def initialize(self):
         """Initialize RAG with policy documents"""
         if not self.initialized:
-            # Add sample policy documents
-            documents = [
-                {
-                    "content": "Personal loan eligibility: Applicants must be between 21-60 years old with minimum monthly income of ₹25,000. Credit score should be above 650.",
-                    "metadata": {"category": "eligibility"}
-                },
-                {
-                    "content": "Interest rates range from 10.5% to 18% per annum depending on credit profile and loan amount.",
-                    "metadata": {"category": "interest_rates"}
-                },
-                {
-                    "content": "Required documents include: salary slips (last 3 months), PAN card, Aadhaar card, and bank statements (last 6 months).",
-                    "metadata": {"category": "documents"}
-                },
-                {
-                    "content": "Loan amount ranges from ₹50,000 to ₹50,00,000. Repayment tenure options: 12 to 60 months.",
-                    "metadata": {"category": "loan_details"}
-                },
-                {
-                    "content": "Processing time is typically 2-3 business days after document verification. Instant approvals available for pre-qualified customers.",
-                    "metadata": {"category": "processing"}
-                }
-            ]
-            
-            for doc in documents:
-                await vector_store.add_document(doc["content"], doc["metadata"])
+            await knowledge_base.rebuild()
             
             self.initialized = True
             logger.info("RAG engine initialized with policy documents")
     
-    async def query(self, question: str, top_k: int = 3) -> Dict[str, Any]:
+    async def query(self, question: str, top_k: int = 3, filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Query knowledge base and generate answer
         
         Args:
             question: User's question
             top_k: Number of relevant documents to retrieve
+            filters: Optional metadata filter, e.g. {"category": "documents"}
             
         Returns:
             {
@@ -65,9 +54,85 @@ class RAGEngine:
         if not self.initialized:
             await self.initialize()
         
-        # Retrieve relevant documents
-        results = await vector_store.search(question, top_k=top_k)
+        # Pin the live snapshot (and its version) for this query; a concurrent
+        # hot swap does not affect it
+        store = knowledge_base.current
+        version = knowledge_base.version
+        query_embedding = await query_encoder.encode(question)
+        
+        if settings.SEMANTIC_CACHE_ENABLED:
+            cached = semantic_cache.lookup(query_embedding, version, top_k, filters)
+            if cached is not None:
+                return cached
+        
+        result = await self._answer(store, question, query_embedding, top_k, filters)
+        
+        if settings.SEMANTIC_CACHE_ENABLED:
+            semantic_cache.store(query_embedding, version, top_k, result, filters)
+        return result
+    
+    async def query_batch(
+        self,
+        questions: List[str],
+        top_k: int = 3,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Answer many questions at once
+        
+        Questions are encoded in one batch and scored against the store with
+        one matrix-matrix product; semantic-cache hits skip retrieval.
+        Returns one query()-shaped dict per question, in order.
+        """
+        if not self.initialized:
+            await self.initialize()
+        if not questions:
+            return []
+        
+        store = knowledge_base.current
+        version = knowledge_base.version
+        embeddings = await query_encoder.encode_many(questions)
+        
+        answers: List[Optional[Dict[str, Any]]] = [None] * len(questions)
+        if settings.SEMANTIC_CACHE_ENABLED:
+            for i, embedding in enumerate(embeddings):
+                answers[i] = semantic_cache.lookup(embedding, version, top_k, filters)
+        pending = [i for i, answer in enumerate(answers) if answer is None]
+        if not pending:
+            return answers
+        
+        allowed = store.filter_ids(filters)
+        if allowed is not None and not len(allowed):
+            retrieved = [[] for _ in pending]
+        else:
+            depth = max(top_k, settings.HYBRID_FUSION_DEPTH) if settings.HYBRID_SEARCH else top_k
+            dense = await store.search_by_embeddings(embeddings[pending], top_k=depth, candidates=allowed)
+            retrieved = [
+                self._fuse(store, questions[i], embeddings[i], ranked, top_k, filters)
+                if settings.HYBRID_SEARCH else ranked
+                for i, ranked in zip(pending, dense)
+            ]
         
+        for i, results in zip(pending, retrieved):
+            answers[i] = self._build_answer(results)
+            if settings.SEMANTIC_CACHE_ENABLED:
+                semantic_cache.store(embeddings[i], version, top_k, answers[i], filters)
+        return answers
+    
+    async def _answer(
+        self,
+        store: VectorStore,
+        question: str,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Retrieve from ``store`` and build the answer payload"""
+        results = await self._retrieve(store, question, query_embedding, top_k, filters)
+        return self._build_answer(results)
+    
+    def _build_answer(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Answer payload from ranked retrieval results"""
         if not results:
             return {
                 "answer": "I don't have specific information about that. Please contact our support team for detailed assistance.",
@@ -87,6 +152,64 @@ class RAGEngine:
             "sources": [r["metadata"] for r in results],
             "confidence": results[0]["score"]
         }
+    
+    async def _retrieve(
+        self,
+        store: VectorStore,
+        question: str,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Hybrid BM25 + dense retrieval fused with reciprocal-rank fusion"""
+        # Metadata filters resolve to candidate ids before any scoring
+        allowed = store.filter_ids(filters)
+        if allowed is not None and not len(allowed):
+            return []
+        
+        if not settings.HYBRID_SEARCH:
+            return await store.search_by_embedding(query_embedding, top_k=top_k, candidates=allowed)
+        
+        depth = max(top_k, settings.HYBRID_FUSION_DEPTH)
+        
+        # On a large corpus, score densely only the documents sharing a term
+        # with the question (when there are enough of them to fill top_k)
+        candidates = allowed
+        pool = len(store) if allowed is None else len(allowed)
+        if pool >= settings.HYBRID_PRUNE_MIN_DOCS:
+            matched = store.lexical.candidates(question)
+            if allowed is not None:
+                matched = np.intersect1d(matched, allowed, assume_unique=True)
+            if len(matched) >= depth:
+                candidates = matched
+        dense = await store.search_by_embedding(query_embedding, top_k=depth, candidates=candidates)
+        return self._fuse(store, question, query_embedding, dense, top_k, filters)
+    
+    def _fuse(
+        self,
+        store: VectorStore,
+        question: str,
+        query_embedding: np.ndarray,
+        dense: List[Dict[str, Any]],
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """Fuse a dense ranking with BM25 via reciprocal-rank fusion"""
+        depth = max(top_k, settings.HYBRID_FUSION_DEPTH)
+        lexical = store.lexical_search(question, top_k=depth, filters=filters)
+        
+        fused = reciprocal_rank_fusion([dense, lexical], k=settings.HYBRID_RRF_K)[:top_k]
+        if not fused:
+            return []
+        
+        # Report cosine similarity as the score so confidence keeps its meaning
+        by_id = {r["id"]: r for r in dense + lexical}
+        ids = [doc_id for doc_id, _ in fused]
+        cosine = store.score_documents(query_embedding, ids)
+        results = []
+        for (doc_id, rrf_score), score in zip(fused, cosine):
+            results.append({**by_id[doc_id], "score": float(score), "rrf_score": rrf_score})
+        return results
 
 
 rag_engine = RAGEngine()
@@ -0,0 +1,149 @@
+import copy
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """
+    Answer cache keyed by question meaning rather than exact text
+
+    Question embeddings sit in a fixed-size float32 ring buffer; a lookup is
+    one matrix-vector product, and the best match above the similarity
+    threshold among entries stored with the same top_k and filters returns
+    its cached answer. Entries expire after a TTL, and the whole cache is
+    dropped when the knowledge-base version changes.
+    """
+
+    def __init__(
+        self,
+        capacity: Optional[int] = None,
+        threshold: Optional[float] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.capacity = capacity or settings.SEMANTIC_CACHE_SIZE
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.ttl = settings.SEMANTIC_CACHE_TTL if ttl_seconds is None else ttl_seconds
+
+        self._embeddings: Optional[np.ndarray] = None
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        # Per-slot id of the entry's (top_k, filters); -1 marks an empty slot
+        self._key_ids = np.full(self.capacity, -1, dtype=np.int64)
+        self._keys: Dict[Tuple[int, Optional[str]], int] = {}
+        self._count = 0
+        self._next = 0
+        self.version: Optional[int] = None
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def lookup(
+        self,
+        embedding: np.ndarray,
+        version: int,
+        top_k: int,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Cached result for a question similar to ``embedding``, or None"""
+        self._check_version(version)
+        if not self._count:
+            self.misses += 1
+            return None
+
+        key_id = self._keys.get(self._key(top_k, filters))
+        if key_id is None:
+            self.misses += 1
+            return None
+
+        # Entries for other top_k / filters must not shadow a matching one
+        similarities = self._embeddings[:self._count] @ embedding
+        similarities[self._key_ids[:self._count] != key_id] = -np.inf
+        best = int(np.argmax(similarities))
+        entry = self._entries[best]
+
+        if similarities[best] < self.threshold or entry is None:
+            self.misses += 1
+            return None
+
+        if time.monotonic() - entry["stored_at"] > self.ttl:
+            # Expired: forget it so it cannot shadow a fresher neighbour
+            self._entries[best] = None
+            self._embeddings[best] = 0.0
+            self._key_ids[best] = -1
+            self.expired += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return copy.deepcopy(entry["result"])
+
+    def store(
+        self,
+        embedding: np.ndarray,
+        version: int,
+        top_k: int,
+        result: Dict[str, Any],
+        filters: Optional[Dict[str, Any]] = None
+    ):
+        """Remember ``result`` for this question, evicting the oldest entry when full"""
+        self._check_version(version)
+        if self._embeddings is None:
+            self._embeddings = np.zeros((self.capacity, embedding.shape[0]), dtype=np.float32)
+
+        slot = self._next
+        self._embeddings[slot] = embedding
+        self._key_ids[slot] = self._keys.setdefault(self._key(top_k, filters), len(self._keys))
+        self._entries[slot] = {
+            "top_k": top_k,
+            "filters": copy.deepcopy(filters) or None,
+            "result": copy.deepcopy(result),
+            "stored_at": time.monotonic()
+        }
+        self._next = (slot + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+
+    def clear(self):
+        if self._embeddings is not None:
+            self._embeddings[:] = 0.0
+        self._entries = [None] * self.capacity
+        self._key_ids[:] = -1
+        self._keys.clear()
+        self._count = 0
+        self._next = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": sum(1 for e in self._entries if e is not None),
+            "capacity": self.capacity,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl,
+            "knowledge_base_version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    @staticmethod
+    def _key(top_k: int, filters: Optional[Dict[str, Any]]) -> Tuple[int, Optional[str]]:
+        return top_k, json.dumps(filters, sort_keys=True, default=str) if filters else None
+
+    def _check_version(self, version: int):
+        if version != self.version:
+            if self._count:
+                self.invalidations += 1
+                logger.info(f"Semantic cache invalidated (knowledge base v{self.version} -> v{version})")
+            self.clear()
+            self.version = version
+
+
+semantic_cache = SemanticCache()
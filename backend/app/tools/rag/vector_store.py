@@ -1,68 +1,413 @@
+import asyncio
+import hashlib
+import json
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from app.config import settings
+from app.tools.rag.faiss_index import FaissIndex, recall_report
+from app.tools.rag.embedding_backends import load_embedding_model
+from app.tools.rag.embedding_executor import embedding_executor
+from app.tools.rag.bm25_index import BM25Index
+from app.tools.rag.metadata_index import MetadataIndex
+from app.tools.rag.quantization import QUANTIZATION_MODES, QuantizedIndex, quantization_report
 
 logger = logging.getLogger(__name__)
 
 
 class VectorStore:
-    """Simple in-memory vector store for document retrieval"""
-    
-    def __init__(self):
-        self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+    """In-memory vector store backed by a pre-normalized float32 matrix"""
+
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, embedding_model: Optional[Any] = None):
+        if embedding_model is None:
+            # SentenceTransformer, or its ONNX Runtime drop-in (EMBEDDING_BACKEND)
+            embedding_model = load_embedding_model()
+        self.embedding_model = embedding_model
+        self.dim = self.embedding_model.get_sentence_embedding_dimension()
         self.documents: List[Dict[str, Any]] = []
-        self.embeddings: List[np.ndarray] = []
-    
+        # Rows [0, size) are live; the rest is preallocated headroom
+        self._matrix = np.zeros((self.INITIAL_CAPACITY, self.dim), dtype=np.float32)
+        self._size = 0
+        # Optional FAISS ANN index mirroring the matrix rows
+        self._ann: Optional[FaissIndex] = None
+        self._ann_disabled = False
+        # Optional int8/binary codes for a compressed first pass
+        self._quantized: Optional[QuantizedIndex] = None
+        # Inverted index over the same documents for lexical (BM25) retrieval
+        self.lexical = BM25Index()
+        # Value -> bitmap indexes for metadata filters
+        self.metadata_index = MetadataIndex(settings.METADATA_INDEX_FIELDS)
+        # Published snapshots are frozen: searches never race with writes
+        self.frozen = False
+
+    def spawn(self) -> "VectorStore":
+        """Create an empty store sharing this store's embedding model"""
+        return VectorStore(embedding_model=self.embedding_model)
+
+    def freeze(self):
+        """Make the store immutable and warm any lazily built search index"""
+        self.frozen = True
+        self.lexical.compile()
+        self.metadata_index.compile()
+        self._ann_index()
+        self._quantized_index()
+
+    def fingerprint(self) -> str:
+        """Digest of the stored contents in row order"""
+        digest = hashlib.sha256()
+        for doc in self.documents:
+            digest.update(hashlib.sha256(doc["content"].encode("utf-8")).digest())
+        return digest.hexdigest()
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        """Read-only view of the stored (unit-length) document embeddings"""
+        view = self._matrix[:self._size]
+        view.flags.writeable = False
+        return view
+
+    def __len__(self) -> int:
+        return self._size
+
     async def add_document(self, content: str, metadata: Dict[str, Any] = None):
         """Add document to vector store"""
-        embedding = self.embedding_model.encode(content)
-        
-        self.documents.append({
-            "content": content,
-            "metadata": metadata or {}
-        })
-        self.embeddings.append(embedding)
-        
+        self._check_mutable()
+        embeddings = await embedding_executor.run(self.encode_batch, [content])
+        self._append(embeddings)
+        self._add_records([content], [metadata])
+
         logger.info(f"Added document to vector store: {content[:50]}...")
-    
-    async def search(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
-        """Search for relevant documents"""
-        if not self.documents:
+
+    async def add_documents(self, contents: List[str], metadatas: Optional[List[Dict[str, Any]]] = None):
+        """Add several documents with a single batched encode call"""
+        if not contents:
+            return
+        embeddings = await embedding_executor.run(self.encode_batch, contents)
+        await self.add_embedded_documents(contents, metadatas, embeddings)
+
+    async def add_embedded_documents(
+        self,
+        contents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]],
+        embeddings: np.ndarray
+    ):
+        """
+        Add documents whose unit-length embeddings were computed elsewhere
+
+        An empty store adopts a contiguous float32 ``embeddings`` array as-is,
+        so a memory-mapped cache is served without copying it into RAM. The
+        copy and lexical/metadata indexing run on a worker thread.
+        """
+        if not contents:
+            return
+        await asyncio.to_thread(self.extend_embedded, contents, metadatas, embeddings)
+
+    def extend_embedded(
+        self,
+        contents: List[str],
+        metadatas: Optional[List[Dict[str, Any]]],
+        embeddings: np.ndarray
+    ):
+        """Synchronous add_embedded_documents, for a store no query is reading yet"""
+        if not contents:
+            return
+        self._check_mutable()
+        metadatas = metadatas or [{} for _ in contents]
+
+        if (self._size == 0
+                and embeddings.dtype == np.float32
+                and embeddings.ndim == 2
+                and embeddings.shape == (len(contents), self.dim)
+                and embeddings.flags.c_contiguous):
+            # Capacity == size, so the next append grows into a fresh array
+            # instead of writing to the (possibly read-only) mapping.
+            self._matrix = embeddings
+            self._size = len(contents)
+            self._ann = None
+        else:
+            self._append(embeddings)
+        self._add_records(contents, metadatas)
+
+        logger.info(f"Added {len(contents)} documents to vector store")
+
+    def _add_records(self, contents: List[str], metadatas: List[Optional[Dict[str, Any]]]):
+        for content, metadata in zip(contents, metadatas):
+            self.documents.append({
+                "content": content,
+                "metadata": metadata or {}
+            })
+            self.lexical.add(content)
+            self.metadata_index.add(metadata or {})
+
+    def share_matrix(self, matrix: np.ndarray) -> bool:
+        """Serve the current rows from an identical external array (e.g. a cache mmap)"""
+        if matrix.shape != (self._size, self.dim) or matrix.dtype != np.float32:
+            return False
+        self._matrix = matrix
+        return True
+
+    def encode_batch(self, contents: List[str]) -> np.ndarray:
+        """Encode texts in model-sized batches into unit-length float32 rows"""
+        embeddings = self.embedding_model.encode(
+            contents,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            show_progress_bar=False
+        )
+        return self._normalize(np.asarray(embeddings))
+
+    async def search(self, query: str, top_k: int = 3, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Search for relevant documents, optionally restricted by metadata ``filters``"""
+        if not self._size:
+            return []
+
+        query_embeddings = await embedding_executor.run(self.encode_batch, [query])
+        return self._rank(query_embeddings, top_k, candidates=self.filter_ids(filters))[0]
+
+    async def search_by_embedding(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 3,
+        candidates: Optional[np.ndarray] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search with a query embedding that was already computed
+
+        When ``candidates`` (document ids) and/or metadata ``filters`` are
+        given, only the matching rows are scored.
+        """
+        if not self._size:
+            return []
+
+        allowed = self.filter_ids(filters)
+        if allowed is not None:
+            candidates = allowed if candidates is None else np.intersect1d(candidates, allowed, assume_unique=True)
+
+        query_embedding = self._normalize(query_embedding)
+        return self._rank(query_embedding[np.newaxis, :], top_k, candidates=candidates)[0]
+
+    async def search_by_embeddings(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 3,
+        candidates: Optional[np.ndarray] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Rank precomputed query embeddings together (one matrix-matrix product)"""
+        if not self._size:
+            return [[] for _ in range(len(query_embeddings))]
+        return self._rank(self._normalize(query_embeddings), top_k, candidates=candidates)
+
+    def lexical_search(self, query: str, top_k: int = 3, filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """BM25 keyword search over the inverted index"""
+        mask = self.metadata_index.mask(filters, self.documents)
+        hits = self.lexical.search(query, top_k, mask=mask)
+        return self._collect([i for i, _ in hits], [s for _, s in hits])
+
+    def filter_ids(self, filters: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Ids of documents whose metadata matches ``filters`` (None = no filter)"""
+        mask = self.metadata_index.mask(filters, self.documents)
+        return None if mask is None else np.flatnonzero(mask)
+
+    def score_documents(self, query_embedding: np.ndarray, ids: List[int]) -> np.ndarray:
+        """Cosine similarity of the query to specific documents"""
+        if not ids:
+            return np.empty(0, dtype=np.float32)
+        return self._matrix[np.asarray(ids)] @ self._normalize(query_embedding)
+
+    async def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 3,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """Search for several queries at once with one matrix-matrix product"""
+        if not queries:
             return []
-        
-        # Encode query
-        query_embedding = self.embedding_model.encode(query)
-        
-        # Calculate cosine similarity
-        similarities = []
-        for doc_embedding in self.embeddings:
-            similarity = self._cosine_similarity(query_embedding, doc_embedding)
-            similarities.append(similarity)
-        
-        # Get top-k results
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
-        
+        if not self._size:
+            return [[] for _ in queries]
+
+        query_embeddings = await embedding_executor.run(self.encode_batch, queries)
+        return self._rank(query_embeddings, top_k, candidates=self.filter_ids(filters))
+
+    def _rank(self, queries: np.ndarray, top_k: int, candidates: Optional[np.ndarray] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Rank documents for each row of ``queries`` (already normalized)
+
+        With ``candidates``, only those rows are scored (exactly) - filtering
+        happens before scoring, never after top-k.
+        """
+        if candidates is not None:
+            if not len(candidates):
+                return [[] for _ in range(queries.shape[0])]
+            scores = self._matrix[candidates] @ queries.T
+            ranked = []
+            for i in range(queries.shape[0]):
+                column = scores[:, i]
+                top = self._top_k_indices(column, top_k)
+                ranked.append(self._collect(candidates[top], column[top]))
+            return ranked
+
+        ann = self._ann_index()
+        if ann is not None:
+            scores, ids = ann.search(queries, min(top_k, self._size))
+            ranked = []
+            for row_scores, row_ids in zip(scores, ids):
+                found = row_ids >= 0
+                ranked.append(self._collect(row_ids[found], row_scores[found]))
+            return ranked
+
+        quantized = self._quantized_index()
+        if quantized is not None:
+            ranked = []
+            for query in queries:
+                ids, scores = quantized.search(
+                    query, top_k, self._matrix[:self._size],
+                    rescore_factor=settings.QUANTIZATION_RESCORE_FACTOR
+                )
+                ranked.append(self._collect(ids, scores))
+            return ranked
+
+        # (n_docs, dim) @ (dim, n_queries) -> one score column per query
+        scores = self._matrix[:self._size] @ queries.T
+        ranked = []
+        for i in range(queries.shape[0]):
+            column = scores[:, i]
+            top_indices = self._top_k_indices(column, top_k)
+            ranked.append(self._collect(top_indices, column[top_indices]))
+        return ranked
+
+    def _collect(self, indices: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """Turn ranked indices and their scores into result dicts"""
         results = []
-        for idx in top_indices:
+        for idx, score in zip(indices, scores):
             results.append({
+                "id": int(idx),
                 "content": self.documents[idx]["content"],
                 "metadata": self.documents[idx]["metadata"],
-                "score": float(similarities[idx])
+                "score": float(score)
             })
-        
+
         return results
-    
-    def _cosine_similarity(self, vec1: np.ndarray, vec2: np.ndarray) -> float:
-        """Calculate cosine similarity between two vectors"""
-        dot_product = np.dot(vec1, vec2)
-        norm1 = np.linalg.norm(vec1)
-        norm2 = np.linalg.norm(vec2)
-        
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-        
-        return dot_product / (norm1 * norm2)
+
+    def _ann_index(self) -> Optional[FaissIndex]:
+        """Return an up-to-date FAISS index when the faiss backend is enabled"""
+        if settings.VECTOR_INDEX_BACKEND != "faiss" or self._ann_disabled:
+            return None
+
+        if self._ann is None or self._ann.ntotal != self._size:
+            self._ann = FaissIndex.build(self._matrix[:self._size])
+            if self._ann is None:
+                logger.warning("FAISS backend requested but unavailable; using exact search")
+                self._ann_disabled = True
+
+        return self._ann
+
+    def _quantized_index(self) -> Optional[QuantizedIndex]:
+        """Return up-to-date quantized codes when EMBEDDING_QUANTIZATION is set"""
+        mode = settings.EMBEDDING_QUANTIZATION
+        if mode not in QUANTIZATION_MODES:
+            return None
+
+        if self._quantized is None or self._quantized.ntotal != self._size or self._quantized.mode != mode:
+            self._quantized = QuantizedIndex.build(self._matrix[:self._size], mode)
+            logger.info(f"Quantized {self._size} embeddings ({mode}, {self._quantized.nbytes} bytes)")
+
+        return self._quantized
+
+    def quantization_report(self, queries: List[str], top_k: int = 10) -> Dict[str, Any]:
+        """Recall@k / memory / latency of int8 and binary first passes vs float32"""
+        query_embeddings = self.encode_batch(queries)
+        return quantization_report(
+            self._matrix[:self._size], query_embeddings,
+            top_k=top_k, rescore_factor=settings.QUANTIZATION_RESCORE_FACTOR
+        )
+
+    def save_index(self, path: Optional[str] = None):
+        """Persist the FAISS index (building it first if needed)"""
+        ann = self._ann_index()
+        if ann is not None:
+            path = path or settings.FAISS_INDEX_PATH
+            ann.save(path)
+            with open(f"{path}.json", "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": self.fingerprint(), "ntotal": ann.ntotal}, f)
+
+    def load_index(self, path: Optional[str] = None, mmap: bool = True) -> bool:
+        """Load a persisted FAISS index if it matches the current documents"""
+        if settings.VECTOR_INDEX_BACKEND != "faiss":
+            return False
+
+        path = path or settings.FAISS_INDEX_PATH
+        try:
+            with open(f"{path}.json", "r", encoding="utf-8") as f:
+                fingerprint = json.load(f).get("fingerprint")
+        except (OSError, ValueError):
+            return False
+        if fingerprint != self.fingerprint():
+            logger.info(f"FAISS index at {path} was built for other documents; ignoring")
+            return False
+
+        ann = FaissIndex.load(path, mmap=mmap)
+        if ann is None:
+            return False
+        if ann.ntotal != self._size:
+            logger.warning(f"Stale FAISS index ({ann.ntotal} vectors, store has {self._size}); ignoring")
+            return False
+
+        self._ann = ann
+        return True
+
+    def ann_report(self, queries: List[str], top_k: int = 10) -> Dict[str, Any]:
+        """Recall@k and per-query latency of the FAISS index vs exact search"""
+        ann = self._ann_index() or FaissIndex.build(self._matrix[:self._size])
+        if ann is None:
+            return {"error": "faiss unavailable"}
+
+        query_embeddings = self.encode_batch(queries)
+        return recall_report(ann, self._matrix[:self._size], query_embeddings, top_k=top_k)
+
+    @staticmethod
+    def _top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+        """Indices of the top_k scores, best first, without a full sort"""
+        n = scores.shape[0]
+        if top_k <= 0:
+            return np.empty(0, dtype=np.int64)
+        if top_k < n:
+            candidates = np.argpartition(scores, n - top_k)[n - top_k:]
+        else:
+            candidates = np.arange(n)
+        return candidates[np.argsort(scores[candidates])[::-1]]
+
+    def _check_mutable(self):
+        if self.frozen:
+            raise RuntimeError("Vector store snapshot is immutable; build a new snapshot instead")
+
+    def _append(self, embeddings: np.ndarray):
+        """Normalize and copy rows into the matrix, growing it geometrically"""
+        embeddings = self._normalize(embeddings.astype(np.float32, copy=False))
+        needed = self._size + embeddings.shape[0]
+
+        if needed > self._matrix.shape[0]:
+            capacity = self._matrix.shape[0]
+            while capacity < needed:
+                capacity *= 2
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self._size] = self._matrix[:self._size]
+            self._matrix = grown
+
+        self._matrix[self._size:needed] = embeddings
+        if self._ann is not None and not self._ann.read_only and self._ann.ntotal == self._size:
+            self._ann.index.add(embeddings)
+        self._size = needed
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        """Scale vectors to unit length so a dot product is cosine similarity"""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
 
 
 vector_store = VectorStore()
@@ -0,0 +1,46 @@
+import hashlib
+import os
+import sys
+import numpy as np
+import pytest
+
+# app.config refuses to load without an LLM key; tests never call the LLM
+os.environ.setdefault("HF_API_KEY", "test")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class HashEmbedder:
+    """Deterministic stand-in for a SentenceTransformer: one random vector per text"""
+
+    def __init__(self, dim: int = 32):
+        self.dim = dim
+        self.calls = []
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def encode(self, contents, batch_size=None, show_progress_bar=False):
+        self.calls.append(list(contents))
+        rows = []
+        for content in contents:
+            seed = int.from_bytes(hashlib.sha256(content.encode("utf-8")).digest()[:8], "little")
+            rows.append(np.random.default_rng(seed).standard_normal(self.dim))
+        return np.asarray(rows, dtype=np.float32).reshape(len(rows), self.dim)
+
+
+@pytest.fixture
+def make_store():
+    """Build a VectorStore over ``contents`` embedded with a HashEmbedder"""
+    # Importing the store module loads the default embedding model
+    pytest.importorskip("sentence_transformers")
+    from app.tools.rag.vector_store import VectorStore
+
+    def make(contents=(), metadatas=None, dim=32):
+        store = VectorStore(embedding_model=HashEmbedder(dim))
+        contents = list(contents)
+        if contents:
+            store.extend_embedded(contents, metadatas, store.encode_batch(contents))
+        return store
+
+    return make
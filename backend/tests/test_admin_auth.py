@@ -0,0 +1,55 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# The admin router imports the live knowledge base, which loads the embedding model
+pytest.importorskip("sentence_transformers")
+
+from app.api import admin
+
+ENDPOINTS = [
+    ("post", "/api/admin/knowledge-base/ingest"),
+    ("get", "/api/admin/knowledge-base/status"),
+    ("post", "/api/admin/knowledge-base/rollback"),
+    ("get", "/api/admin/rag/metrics"),
+    ("get", "/api/admin/rag/ann-report"),
+    ("get", "/api/admin/rag/quantization-report"),
+    ("get", "/api/admin/ocr/metrics"),
+]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(admin.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_every_admin_route_is_covered():
+    routes = {(method.lower(), route.path) for route in admin.router.routes for method in route.methods}
+    assert routes == set(ENDPOINTS)
+
+
+@pytest.mark.parametrize("method,path", ENDPOINTS)
+def test_refused_when_no_key_is_configured(client, monkeypatch, method, path):
+    monkeypatch.setattr(admin.settings, "ADMIN_API_KEY", None)
+    for headers in ({}, {"X-Admin-Key": ""}, {"X-Admin-Key": "anything"}):
+        response = client.request(method, path, headers=headers)
+        assert response.status_code == 403
+        assert "not configured" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("method,path", ENDPOINTS)
+def test_refused_without_the_configured_key(client, monkeypatch, method, path):
+    monkeypatch.setattr(admin.settings, "ADMIN_API_KEY", "secret")
+    for headers in ({}, {"X-Admin-Key": "wrong"}, {"X-Admin-Key": "secretx"}):
+        response = client.request(method, path, headers=headers)
+        assert response.status_code == 403
+        assert response.json()["detail"] == "Invalid admin key"
+
+
+def test_configured_key_is_accepted(client, monkeypatch):
+    monkeypatch.setattr(admin.settings, "ADMIN_API_KEY", "secret")
+    response = client.get("/api/admin/knowledge-base/status", headers={"X-Admin-Key": "secret"})
+    assert response.status_code == 200
@@ -0,0 +1,57 @@
+import asyncio
+import io
+import os
+import pytest
+from PIL import Image
+from fastapi import UploadFile
+from app.api import documents
+
+
+def _png_upload(name):
+    buffer = io.BytesIO()
+    Image.new("L", (64, 32), color=255).save(buffer, format="PNG")
+    buffer.seek(0)
+    return UploadFile(file=buffer, filename=name)
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    """Spool into tmp_path against a stub session; returns the spooled paths"""
+    monkeypatch.setattr(documents.settings, "UPLOAD_TMP_DIR", str(tmp_path))
+
+    async def get_session(session_id):
+        return object()
+
+    monkeypatch.setattr(documents.session_manager, "get_session", get_session)
+
+    async def upload():
+        return await documents.upload_documents_batch(
+            request=None,
+            session_id="s",
+            files=[_png_upload("pan.png"), _png_upload("aadhaar.png")],
+            doc_types=["pan_card", "aadhaar"]
+        )
+
+    return upload
+
+
+def test_spool_files_removed_when_stream_never_starts(batch, tmp_path):
+    async def scenario():
+        response = await batch()
+        assert len(os.listdir(tmp_path)) == 2
+        # Client gone before the body is iterated: only the background task runs
+        await response.background()
+
+    asyncio.run(scenario())
+    assert os.listdir(tmp_path) == []
+
+
+def test_spool_files_removed_when_response_fails(batch, tmp_path, monkeypatch):
+    def broken_response(*args, **kwargs):
+        raise RuntimeError("response construction failed")
+
+    monkeypatch.setattr(documents, "StreamingResponse", broken_response)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(batch())
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,73 @@
+import math
+import numpy as np
+import pytest
+from app.tools.rag.bm25_index import BM25Index, tokenize
+
+DOCS = [
+    "Form 16 is required for salaried applicants",
+    "Bank statements for the last six months are required",
+    "Prepayment of the loan is allowed after twelve EMIs",
+    "Self employed applicants submit ITR and bank statements bank statements",
+    "Processing fee is two percent of the loan amount",
+]
+
+
+def _reference_bm25(query, docs, k1=1.5, b=0.75):
+    tokenized = [tokenize(d) for d in docs]
+    avg = sum(len(t) for t in tokenized) / len(tokenized)
+    scores = []
+    for tokens in tokenized:
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(1 for t in tokenized if term in t)
+            if not df:
+                continue
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            tf = tokens.count(term)
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg))
+        scores.append(score)
+    return scores
+
+
+@pytest.fixture
+def index():
+    index = BM25Index()
+    for doc in DOCS:
+        index.add(doc)
+    return index
+
+
+def test_tokenize():
+    assert tokenize("What is the Form-16 for my ITR?") == ["form", "16", "itr"]
+
+
+@pytest.mark.parametrize("query", ["bank statements", "form 16 salaried", "loan", "ITR bank prepayment"])
+def test_scores_match_okapi_bm25(index, query):
+    expected = _reference_bm25(query, DOCS)
+    results = index.search(query, top_k=len(DOCS))
+
+    assert {doc_id for doc_id, _ in results} == {i for i, s in enumerate(expected) if s > 0}
+    for doc_id, score in results:
+        assert score == pytest.approx(expected[doc_id], rel=1e-5)
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_top_k_mask_and_candidates(index):
+    assert [doc_id for doc_id, _ in index.search("bank statements", top_k=1)] == [3]
+
+    mask = np.ones(len(DOCS), dtype=bool)
+    mask[3] = False
+    assert [doc_id for doc_id, _ in index.search("bank statements", mask=mask)] == [1]
+
+    np.testing.assert_array_equal(index.candidates("loan ITR"), [2, 3, 4])
+    assert index.search("the of and") == []
+    assert index.search("unknown words") == []
+    assert index.search("loan", top_k=0) == []
+
+
+def test_documents_added_after_compile_are_searchable(index):
+    index.compile()
+    doc_id = index.add("Gold loan tenure up to three years")
+    assert index.search("gold")[0][0] == doc_id
+    assert len(index) == len(DOCS) + 1
@@ -0,0 +1,41 @@
+import os
+import numpy as np
+import pytest
+from app.config import settings
+from app.tools.rag.embedding_backends import (
+    COMPATIBILITY_TOLERANCE, ONNX_CONFIG_FILE, SAMPLE_TEXTS, OnnxEmbeddingModel, compatibility_report
+)
+
+
+def test_compatibility_report_flags_drift():
+    rng = np.random.default_rng(0)
+    reference = rng.standard_normal((8, 16)).astype(np.float32)
+
+    same = compatibility_report(reference, reference * 2.0)
+    assert same["compatible"]
+    assert same["min_cosine"] == pytest.approx(1.0, abs=1e-6)
+    assert same["top1_agreement"] == 1.0
+
+    drifted = compatibility_report(reference, rng.standard_normal((8, 16)).astype(np.float32))
+    assert not drifted["compatible"]
+
+
+@pytest.mark.parametrize("quantized", [False, True])
+def test_onnx_matches_torch_within_tolerance(quantized):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    if not os.path.exists(os.path.join(settings.EMBEDDING_ONNX_DIR, ONNX_CONFIG_FILE)):
+        pytest.skip("ONNX model not exported (python -m app.tools.rag.embedding_backends export)")
+
+    texts = SAMPLE_TEXTS[:4]
+    torch_model = sentence_transformers.SentenceTransformer(settings.EMBEDDING_MODEL_NAME)
+    onnx_model = OnnxEmbeddingModel(settings.EMBEDDING_ONNX_DIR, quantized=quantized)
+
+    reference = torch_model.encode(texts, normalize_embeddings=True)
+    candidate = onnx_model.encode(texts, normalize_embeddings=True)
+
+    assert candidate.shape == reference.shape
+    report = compatibility_report(reference, candidate)
+    assert report["min_cosine"] >= COMPATIBILITY_TOLERANCE
+    assert report["top1_agreement"] == 1.0
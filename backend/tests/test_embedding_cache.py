@@ -0,0 +1,100 @@
+import json
+import os
+import numpy as np
+import pytest
+from app.tools.rag.embedding_cache import EmbeddingCache, content_hash
+
+DIM = 8
+
+
+def _encode(contents):
+    rows = [np.random.default_rng(len(c) * 7919 + ord(c[-1])).standard_normal(DIM) for c in contents]
+    rows = np.asarray(rows, dtype=np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _matrix_files(cache):
+    return sorted(name for name in os.listdir(cache.directory) if name.endswith(".npy"))
+
+
+@pytest.fixture
+def never_touch_mapped_files(monkeypatch):
+    """Fail like Windows does when a memory-mapped file is replaced or deleted"""
+    mapped = set()
+    real_load, real_replace, real_remove = np.load, os.replace, os.remove
+
+    def load(path, *args, **kwargs):
+        array = real_load(path, *args, **kwargs)
+        if kwargs.get("mmap_mode"):
+            mapped.add(os.path.abspath(path))
+        return array
+
+    def guard(real):
+        def call(*paths):
+            if os.path.abspath(paths[-1]) in mapped:
+                raise PermissionError(f"{paths[-1]} is mapped")
+            return real(*paths)
+        return call
+
+    monkeypatch.setattr(np, "load", load)
+    monkeypatch.setattr(os, "replace", guard(real_replace))
+    monkeypatch.setattr(os, "remove", guard(real_remove))
+    return mapped
+
+
+def test_new_corpus_is_written_beside_the_mapped_matrix(tmp_path, never_touch_mapped_files):
+    cache = EmbeddingCache(cache_dir=str(tmp_path), model_name="test/model")
+    first = ["policy a", "policy b"]
+    live = cache.get_or_encode(first, _encode)
+    assert isinstance(live, np.memmap)
+
+    second = first + ["policy c"]
+    updated = cache.get_or_encode(second, _encode)
+
+    assert updated.shape == (3, DIM)
+    np.testing.assert_allclose(updated[:2], live)
+    # The store still serving the old corpus reads intact data
+    np.testing.assert_allclose(live, _encode(first), rtol=1e-6)
+
+    reopened = EmbeddingCache(cache_dir=str(tmp_path), model_name="test/model")
+    assert reopened.load() == 3
+    assert reopened.get_or_encode(second, lambda contents: pytest.fail("re-encoded")).shape == (3, DIM)
+
+
+def test_old_matrices_are_pruned(tmp_path):
+    cache = EmbeddingCache(cache_dir=str(tmp_path), model_name="test/model")
+    corpora = [["a1"], ["a1", "b2"], ["a1", "b2", "c3"]]
+    for corpus in corpora:
+        cache.get_or_encode(corpus, _encode)
+
+    # The current matrix and the one it replaced
+    assert len(_matrix_files(cache)) == 2
+    with open(cache.index_path, encoding="utf-8") as f:
+        index = json.load(f)
+    assert index["matrix"] in _matrix_files(cache)
+    assert index["hashes"] == [content_hash(c) for c in corpora[-1]]
+
+
+def test_legacy_layout_is_read(tmp_path):
+    cache = EmbeddingCache(cache_dir=str(tmp_path), model_name="test/model")
+    os.makedirs(cache.directory)
+    contents = ["x1", "y2"]
+    np.save(os.path.join(cache.directory, "embeddings.npy"), _encode(contents))
+    with open(cache.index_path, "w", encoding="utf-8") as f:
+        json.dump({"hashes": [content_hash(c) for c in contents]}, f)
+
+    assert cache.load() == 2
+    cache.get_or_encode(contents + ["z3"], _encode)
+    cache.get_or_encode(contents + ["z3", "w4"], _encode)
+    assert "embeddings.npy" not in _matrix_files(cache)
+
+
+def test_index_naming_a_missing_matrix_is_ignored(tmp_path):
+    cache = EmbeddingCache(cache_dir=str(tmp_path), model_name="test/model")
+    cache.get_or_encode(["a1", "b2"], _encode)
+    for name in _matrix_files(cache):
+        os.remove(os.path.join(cache.directory, name))
+
+    reopened = EmbeddingCache(cache_dir=str(tmp_path), model_name="test/model")
+    assert reopened.load() == 0
+    assert reopened.get_or_encode(["a1", "b2"], _encode).shape == (2, DIM)
@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+import pytest
+from app.tools.rag.embedding_executor import EmbeddingExecutor
+
+
+def test_work_runs_off_the_event_loop():
+    executor = EmbeddingExecutor(max_workers=1, max_queue=4)
+    loop_thread = threading.get_ident()
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.ensure_future(ticker())
+        worker_thread = await executor.run(lambda: (time.sleep(0.3), threading.get_ident())[1])
+        ticking.cancel()
+        return worker_thread, ticks
+
+    try:
+        worker_thread, ticks = asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert worker_thread != loop_thread
+    # The loop kept serving other coroutines while the encode ran
+    assert ticks >= 10
+
+
+def test_concurrency_is_bounded():
+    executor = EmbeddingExecutor(max_workers=2, max_queue=1)
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def encode():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+
+    async def scenario():
+        await asyncio.gather(*[executor.run(encode) for _ in range(8)])
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        executor.shutdown()
+    assert peak == 2
+    stats = executor.stats()
+    assert stats["completed"] == 8
+    assert stats["queue_depth"] == 0
+    # Callers beyond workers + queue wait for a slot instead of piling up
+    assert stats["max_queue_depth"] == 8
+
+
+def test_failures_propagate_and_are_counted():
+    executor = EmbeddingExecutor(max_workers=1, max_queue=0)
+
+    def broken(text):
+        raise ValueError(text)
+
+    async def scenario():
+        with pytest.raises(ValueError, match="bad input"):
+            await executor.run(broken, "bad input")
+        return await executor.run(len, "four")
+
+    try:
+        assert asyncio.run(scenario()) == 4
+    finally:
+        executor.shutdown()
+    stats = executor.stats()
+    assert (stats["completed"], stats["failed"], stats["running"]) == (1, 1, 0)
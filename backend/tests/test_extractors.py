@@ -0,0 +1,115 @@
+import re
+import pytest
+from app.tools.document_ocr import extractors
+from app.tools.document_ocr.extractors import (
+    AadhaarExtractor,
+    FieldExtractor,
+    extract_fields,
+    get_extractor,
+    has_required_fields,
+    register_extractor,
+)
+
+AADHAAR_FRONT = """Government of India
+Ravi Kumar Sharma
+DOB: 14/08/1990
+MALE
+6826 4584 5686
+Aadhaar - Aam Aadmi ka Adhikar
+"""
+
+
+def test_builtin_extractors_registered():
+    for doc_type in ("salary_slip", "pan_card", "aadhaar"):
+        assert get_extractor(doc_type).doc_type == doc_type
+    assert get_extractor("passport") is None
+    assert extract_fields("anything", "passport") == {}
+    assert has_required_fields("passport", {"number": "X"}) is False
+
+
+def test_patterns_compiled_once():
+    assert all(isinstance(p, re.Pattern) for p in AadhaarExtractor.AADHAAR_PATTERNS + AadhaarExtractor.NAME_PATTERNS)
+    assert get_extractor("aadhaar") is get_extractor("aadhaar")
+
+
+def test_register_custom_extractor(monkeypatch):
+    monkeypatch.setattr(extractors, "_EXTRACTORS", dict(extractors._EXTRACTORS))
+
+    @register_extractor
+    class VoterIdExtractor(FieldExtractor):
+        doc_type = "voter_id"
+        required_fields = ("epic_number",)
+        EPIC = re.compile(r'\b([A-Z]{3}\d{7})\b')
+
+        def extract(self, text):
+            match = self.EPIC.search(text)
+            return {"epic_number": match.group(1)} if match else {}
+
+    assert extract_fields("EPIC No. ABC1234567", "voter_id") == {"epic_number": "ABC1234567"}
+    assert has_required_fields("voter_id", {"epic_number": "ABC1234567"})
+    assert not has_required_fields("voter_id", {"epic_number": ""})
+
+
+def test_register_requires_doc_type():
+    with pytest.raises(ValueError):
+        @register_extractor
+        class Unnamed(FieldExtractor):
+            pass
+
+
+def test_no_required_fields_never_complete():
+    assert FieldExtractor().is_complete({"anything": 1}) is False
+
+
+@pytest.mark.parametrize("text, salary", [
+    ("Gross Salary: ₹ 85,000\nNet Pay: 72,500", "85000"),
+    ("net pay 72,500", "72500"),
+    ("Amount credited ₹1,20,000", "120000"),
+    ("No figures here", None),
+])
+def test_salary_slip(text, salary):
+    data = extract_fields(text, "salary_slip")
+    assert data.get("monthly_salary") == salary
+    assert has_required_fields("salary_slip", data) is (salary is not None)
+
+
+def test_pan_card():
+    text = "INCOME TAX DEPARTMENT\nPermanent Account Number\nABCDE1234F\nXABCDE1234FX"
+    assert extract_fields(text, "pan_card") == {"pan_number": "ABCDE1234F"}
+    assert extract_fields("abcde1234f ABCD1234F", "pan_card") == {}
+
+
+def test_aadhaar_front():
+    data = extract_fields(AADHAAR_FRONT, "aadhaar")
+    assert data == {
+        "aadhaar_number": "6826 4584 5686",
+        "name": "Ravi Kumar Sharma",
+        "dob": "14/08/1990",
+        "gender": "MALE",
+    }
+    assert has_required_fields("aadhaar", data)
+    assert not has_required_fields("aadhaar", {"aadhaar_number": data["aadhaar_number"]})
+
+
+@pytest.mark.parametrize("text, number", [
+    ("6826-4584-5686", "6826-4584-5686"),
+    ("682645845686", "682645845686"),
+    ("1234 5678 9012", None),  # cannot start with 0 or 1
+    ("6826 4584 568", None),
+])
+def test_aadhaar_number(text, number):
+    assert extract_fields(text, "aadhaar").get("aadhaar_number") == number
+
+
+def test_aadhaar_name_from_back_and_label():
+    assert extract_fields("S/O: Mohan Lal Verma, House 12", "aadhaar")["name"] == "Mohan Lal Verma"
+    assert extract_fields("Name: Priya Nair\n", "aadhaar")["name"] == "Priya Nair"
+
+
+def test_aadhaar_boilerplate_is_not_a_name():
+    data = extract_fields("Unique Identification\nAuthority Of India\nDOB 01/01/1990", "aadhaar")
+    assert "name" not in data
+
+
+def test_aadhaar_hindi_gender():
+    assert extract_fields("पुरुष / MALE", "aadhaar")["gender"] == "MALE"
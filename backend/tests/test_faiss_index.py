@@ -0,0 +1,38 @@
+import gc
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from app.tools.rag.faiss_index import FaissIndex
+
+
+def _unit_rows(n, dim=16, seed=0):
+    rows = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "ivf"])
+def test_save_load_search(tmp_path, index_type, mmap):
+    matrix = _unit_rows(400)
+    queries = _unit_rows(5, seed=1)
+    built = FaissIndex.build(matrix, index_type)
+    path = str(tmp_path / "index.faiss")
+    built.save(path)
+
+    loaded = FaissIndex.load(path, mmap=mmap)
+    # Anything only the loader referenced must stay alive with the index
+    gc.collect()
+
+    assert loaded.index_type == index_type
+    assert loaded.ntotal == 400
+    assert loaded.index.d == 16
+    scores, ids = loaded.search(queries, 3)
+    expected_scores, expected_ids = built.search(queries, 3)
+    np.testing.assert_array_equal(ids, expected_ids)
+    np.testing.assert_allclose(scores, expected_scores, rtol=1e-5)
+
+
+def test_load_missing_file(tmp_path):
+    assert FaissIndex.load(str(tmp_path / "missing.faiss")) is None
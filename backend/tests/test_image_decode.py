@@ -0,0 +1,105 @@
+from io import BytesIO
+import pytest
+from PIL import Image, JpegImagePlugin
+from app.config import settings
+from app.tools.document_ocr import ocr_engine as engine_module
+from app.tools.document_ocr.ocr_engine import BASE_IMAGE_CACHE_SIZE, MIN_OCR_LONG_EDGE, OCREngine
+
+
+def _encoded(size, fmt, color=(180, 120, 60)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def drafts(monkeypatch):
+    requested = []
+    draft = JpegImagePlugin.JpegImageFile.draft
+
+    def spy(self, mode, size):
+        # Image.thumbnail() drafts too; only the decoder-level request counts
+        if mode is not None:
+            requested.append((self.format, mode, size))
+        return draft(self, mode, size)
+
+    monkeypatch.setattr(JpegImagePlugin.JpegImageFile, "draft", spy)
+    return requested
+
+
+def test_large_jpeg_decoded_as_reduced_draft(drafts, monkeypatch):
+    monkeypatch.setattr(settings, "OCR_IMAGE_MAX_EDGE", 1000)
+    image = OCREngine()._load_image(_encoded((4000, 3000), "JPEG"))
+
+    assert drafts == [("JPEG", "L", (1000, 750))]
+    assert image.mode == "L"
+    assert image.size == (1000, 750)
+
+
+def test_large_png_downscaled_after_decode(drafts, monkeypatch):
+    monkeypatch.setattr(settings, "OCR_IMAGE_MAX_EDGE", 1000)
+    image = OCREngine()._load_image(_encoded((3000, 1200), "PNG"))
+
+    assert drafts == []
+    assert image.mode == "L"
+    assert image.size == (1000, 400)
+
+
+def test_small_image_kept_at_full_resolution(drafts, tmp_path):
+    path = tmp_path / "card.jpg"
+    path.write_bytes(_encoded((800, 500), "JPEG"))
+    image = OCREngine()._load_image(str(path))
+
+    assert drafts == []
+    assert image.size == (800, 500)
+    # Small images are upscaled for OCR afterwards
+    assert max(OCREngine()._base_image(image).size) == MIN_OCR_LONG_EDGE
+
+
+@pytest.fixture
+def counted_decodes(monkeypatch):
+    decoded = []
+    load = OCREngine._load_image
+
+    def spy(self, source):
+        decoded.append(source)
+        return load(self, source)
+
+    monkeypatch.setattr(OCREngine, "_load_image", spy)
+    return decoded
+
+
+def test_passes_share_one_decode(counted_decodes, monkeypatch):
+    monkeypatch.setattr(engine_module.tesseract_pool, "recognize", lambda image, lang, psm: ("", []))
+    engine = OCREngine()
+    source = _encoded((600, 400), "PNG")
+
+    for ocr_pass in [(False, 3), (False, 6), (True, 6)]:
+        engine.ocr_pass_sync(source, "pan_card", ocr_pass)
+    assert len(counted_decodes) == 1
+
+
+def test_changed_file_is_decoded_again(counted_decodes, tmp_path):
+    engine = OCREngine()
+    path = tmp_path / "card.png"
+    path.write_bytes(_encoded((600, 400), "PNG"))
+
+    first = engine._base_image_for(str(path))
+    assert engine._base_image_for(str(path)) is first
+    path.write_bytes(_encoded((640, 400), "PNG", color=(0, 0, 0)))
+    assert engine._base_image_for(str(path)) is not first
+    assert len(counted_decodes) == 2
+
+
+def test_base_image_cache_is_bounded(counted_decodes):
+    engine = OCREngine()
+    sources = [_encoded((300 + i, 200), "PNG") for i in range(BASE_IMAGE_CACHE_SIZE + 1)]
+    for source in sources:
+        engine._base_image_for(source)
+    assert len(engine._base_images) == BASE_IMAGE_CACHE_SIZE
+
+    # The most recent ones are still cached, the oldest was evicted
+    engine._base_image_for(sources[-1])
+    assert len(counted_decodes) == len(sources)
+    engine._base_image_for(sources[0])
+    assert len(counted_decodes) == len(sources) + 1
@@ -0,0 +1,98 @@
+import asyncio
+import gc
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# The admin router imports the live knowledge base, which loads the embedding model
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("faiss")
+
+from app.api import admin
+from app.tools.rag.quantization import QUANTIZATION_MODES
+
+DIM = 32
+
+
+@pytest.fixture
+def store(make_store):
+    return make_store([f"loan policy clause {i}" for i in range(200)], dim=DIM)
+
+
+def test_ann_report(store):
+    queries = [f"loan policy clause {i}" for i in range(0, 200, 10)]
+    report = store.ann_report(queries, top_k=5)
+
+    assert set(report) == {"index_type", "n_docs", "n_queries", "recall_at_k",
+                           "exact_ms_per_query", "ann_ms_per_query"}
+    assert report["n_docs"] == 200
+    assert report["n_queries"] == len(queries)
+    # 200 vectors is below the ANN thresholds, so the index is exact
+    assert report["index_type"] == "flat"
+    assert report["recall_at_k"] == pytest.approx(1.0)
+
+
+def test_quantization_report(store):
+    queries = [f"loan policy clause {i}" for i in range(0, 200, 10)]
+    report = store.quantization_report(queries, top_k=5)
+
+    assert report["n_docs"] == 200
+    assert report["n_queries"] == len(queries)
+    assert report["top_k"] == 5
+    assert report["float32"]["bytes"] == 200 * DIM * 4
+    assert report["float32"]["recall_at_k"] == 1.0
+    for mode in QUANTIZATION_MODES:
+        assert set(report[mode]) == {"bytes", "compression", "ms_per_query", "recall_at_k"}
+        assert report[mode]["bytes"] < report["float32"]["bytes"]
+        assert report[mode]["compression"] > 1.0
+        assert 0.0 <= report[mode]["recall_at_k"] <= 1.0
+    # int8 keeps enough precision for float32 rescoring to recover the exact top-k
+    assert report["int8"]["recall_at_k"] >= 0.9
+    assert report["binary"]["compression"] == pytest.approx(32.0)
+
+
+def test_ann_report_endpoint_samples_the_corpus(store, monkeypatch):
+    monkeypatch.setattr(admin, "knowledge_base", SimpleNamespace(current=store))
+    monkeypatch.setattr(admin.settings, "ADMIN_API_KEY", "secret")
+    app = FastAPI()
+    app.include_router(admin.router)
+
+    with TestClient(app, headers={"X-Admin-Key": "secret"}) as client:
+        report = client.get("/api/admin/rag/ann-report", params={"top_k": 3}).json()
+        assert report["n_queries"] == admin.REPORT_SAMPLE_QUERIES
+        assert report["recall_at_k"] == pytest.approx(1.0)
+
+        report = client.get("/api/admin/rag/ann-report", params={"query": ["clause 7"]}).json()
+        assert report["n_queries"] == 1
+
+        monkeypatch.setattr(admin, "knowledge_base", SimpleNamespace(current=store.spawn()))
+        assert client.get("/api/admin/rag/ann-report").status_code == 409
+
+
+def test_quantization_report_endpoint(store, monkeypatch):
+    monkeypatch.setattr(admin, "knowledge_base", SimpleNamespace(current=store))
+    monkeypatch.setattr(admin.settings, "ADMIN_API_KEY", "secret")
+    app = FastAPI()
+    app.include_router(admin.router)
+
+    with TestClient(app, headers={"X-Admin-Key": "secret"}) as client:
+        report = client.get("/api/admin/rag/quantization-report", params={"top_k": 3}).json()
+        assert report["n_queries"] == admin.REPORT_SAMPLE_QUERIES
+        assert set(QUANTIZATION_MODES) <= set(report)
+
+
+def test_persisted_index_serves_searches(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(admin.settings, "VECTOR_INDEX_BACKEND", "faiss")
+    path = str(tmp_path / "kb.faiss")
+    expected = asyncio.run(store.search("loan policy clause 42", top_k=3))
+    store.save_index(path)
+
+    restarted = store.spawn()
+    contents = [doc["content"] for doc in store.documents]
+    restarted.extend_embedded(contents, None, restarted.encode_batch(contents))
+    assert restarted.load_index(path)
+    gc.collect()
+
+    assert asyncio.run(restarted.search("loan policy clause 42", top_k=3)) == expected
+    assert expected[0]["content"] == "loan policy clause 42"
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+
+# ingestion imports the live vector store, which loads the embedding model
+pytest.importorskip("sentence_transformers")
+
+from app.tools.rag import ingestion
+from app.tools.rag.embedding_cache import EmbeddingCache
+from app.tools.rag.ingestion import chunk_text, ingest_directory
+
+
+def test_chunk_text_windows():
+    words = " ".join(f"w{i}" for i in range(10))
+    assert list(chunk_text(words, 4, 1)) == ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"]
+    assert list(chunk_text(words, 20, 5)) == [words]
+    assert list(chunk_text("  \n ", 4, 1)) == []
+    # Overlap >= chunk size still advances
+    assert len(list(chunk_text(words, 3, 3))) == 8
+
+
+def _write_pdf(path, text):
+    from reportlab.pdfgen import canvas
+
+    pdf = canvas.Canvas(str(path))
+    pdf.drawString(72, 720, text)
+    pdf.save()
+
+
+@pytest.fixture
+def knowledge_dir(tmp_path):
+    kb = tmp_path / "kb"
+    (kb / "loans").mkdir(parents=True)
+    (kb / "loans" / "personal_loan.md").write_text(" ".join(f"loan{i}" for i in range(12)), encoding="utf-8")
+    (kb / "eligibility.txt").write_text("minimum salary twenty five thousand", encoding="utf-8")
+    # Same text as the .txt: deduplicated by content hash
+    (kb / "copy.txt").write_text("minimum salary twenty five thousand", encoding="utf-8")
+    (kb / "notes.docx").write_text("ignored", encoding="utf-8")
+    _write_pdf(kb / "rates.pdf", "interest rate starts at ten percent")
+    return kb
+
+
+def test_ingest_directory(knowledge_dir, tmp_path, make_store, monkeypatch):
+    monkeypatch.setattr(ingestion.settings, "KB_CHUNK_SIZE", 5)
+    monkeypatch.setattr(ingestion.settings, "KB_CHUNK_OVERLAP", 1)
+    monkeypatch.setattr(ingestion.settings, "KB_INGEST_BATCH_SIZE", 2)
+    store = make_store()
+    cache = EmbeddingCache(cache_dir=str(tmp_path / "cache"), model_name="test")
+
+    result = asyncio.run(ingest_directory(str(knowledge_dir), store=store, cache=cache))
+
+    # Windows of 5 words stepping 4: 12 words -> 3 chunks, 6 -> 2, 5 -> 1 (twice)
+    assert {k: result[k] for k in ("files", "chunks", "duplicates", "added")} == \
+        {"files": 4, "chunks": 7, "duplicates": 1, "added": 6}
+    assert len(store) == 6
+    # Files are read in sorted order, so the first of the identical pair is kept
+    assert {doc["metadata"]["source"] for doc in store.documents} == \
+        {"copy.txt", "loans/personal_loan.md", "rates.pdf"}
+    loan = [doc for doc in store.documents if doc["metadata"]["category"] == "personal_loan"]
+    assert [doc["metadata"]["chunk"] for doc in loan] == [0, 1, 2]
+    assert any("interest rate" in doc["content"] for doc in store.documents)
+    # Encoded in KB_INGEST_BATCH_SIZE batches
+    assert max(len(call) for call in store.embedding_model.calls) <= 2
+
+    # Re-ingesting finds every chunk already stored
+    again = asyncio.run(ingest_directory(str(knowledge_dir), store=store, cache=cache))
+    assert again["added"] == 0
+    assert again["duplicates"] == 7
+
+    # A fresh store is filled from the embedding cache without encoding
+    fresh = make_store()
+    asyncio.run(ingest_directory(str(knowledge_dir), store=fresh, cache=cache))
+    assert fresh.embedding_model.calls == []
+    assert [doc["content"] for doc in fresh.documents] == [doc["content"] for doc in store.documents]
+
+
+def test_missing_directory(tmp_path, make_store):
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(ingest_directory(str(tmp_path / "missing"), store=make_store()))
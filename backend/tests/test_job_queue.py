@@ -0,0 +1,188 @@
+import asyncio
+import os
+import sqlite3
+import time
+import pytest
+from app.tools.document_ocr import ocr_engine as engine_module
+from app.tools.document_ocr import job_queue
+from app.tools.document_ocr.job_queue import OCRJobQueue
+
+
+def _queue(tmp_path) -> OCRJobQueue:
+    return OCRJobQueue(db_path=str(tmp_path / "jobs.sqlite3"), job_dir=str(tmp_path / "files"))
+
+
+def _upload(tmp_path, name="upload.png"):
+    path = tmp_path / name
+    path.write_bytes(b"\x89PNG")
+    return str(path)
+
+
+def test_enqueue_removes_the_file_if_the_insert_fails(tmp_path, monkeypatch):
+    queue = _queue(tmp_path)
+    os.makedirs(queue.job_dir)
+
+    def broken_insert(job):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(queue, "_insert", broken_insert)
+    with pytest.raises(sqlite3.OperationalError):
+        asyncio.run(queue.enqueue("s", "pan_card", "pan.png", _upload(tmp_path), ".png", "ab" * 32))
+    assert os.listdir(queue.job_dir) == []
+
+
+def _finished_job(queue, job_id, hours_ago):
+    with sqlite3.connect(queue.db_path) as conn:
+        conn.execute(
+            "INSERT INTO ocr_jobs (id, session_id, doc_type, filename, path, ext, sha256, status, result, "
+            "created_at, finished_at) VALUES (?, 's', 'pan_card', 'pan.png', '', '.png', ?, 'done', ?, 0, ?)",
+            (job_id, "ab" * 32, '{"status": "SUCCESS"}', time.time() - hours_ago * 3600)
+        )
+
+
+def test_finished_jobs_are_purged_while_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(job_queue, "MAINTENANCE_INTERVAL_SECONDS", 0.1)
+    monkeypatch.setattr(job_queue, "IDLE_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(job_queue.settings, "OCR_JOB_RETENTION_HOURS", 24)
+    queue = _queue(tmp_path)
+
+    async def on_complete(job, result):
+        pass
+
+    async def scenario():
+        await queue.start(on_complete)
+        try:
+            # Written after the startup purge: only the periodic one can remove it
+            _finished_job(queue, "old", hours_ago=25)
+            _finished_job(queue, "recent", hours_ago=1)
+            await asyncio.sleep(0.5)
+            return await queue.get("old"), await queue.get("recent")
+        finally:
+            await queue.stop()
+
+    old, recent = asyncio.run(scenario())
+    assert old is None
+    assert recent["status"] == "done"
+
+
+def _job(queue, tmp_path, job_id="job-1", sha256="cd" * 32):
+    return {
+        "id": job_id, "session_id": "s", "doc_type": "pan_card", "filename": "pan.png",
+        "path": _upload(tmp_path, f"{job_id}.png"), "ext": ".png", "sha256": sha256,
+        "status": "queued", "created_at": time.time()
+    }
+
+
+def _expire_leases(queue):
+    with sqlite3.connect(queue.db_path) as conn:
+        conn.execute("UPDATE ocr_jobs SET lease_expires_at = 0 WHERE status = 'running'")
+
+
+def test_live_workers_jobs_are_not_requeued(tmp_path):
+    worker, other = _queue(tmp_path), _queue(tmp_path)
+    worker._init_schema()
+    worker._insert(_job(worker, tmp_path))
+    claimed = worker._claim()
+    assert claimed["id"] == "job-1"
+
+    # Another process starting (or a rolling restart) leaves leased jobs alone
+    other._init_schema()
+    assert other._requeue_expired() == 0
+    assert other._claim() is None
+    assert worker._renew("job-1")
+
+    # The worker dies: once its lease runs out the job moves on
+    _expire_leases(worker)
+    assert other._requeue_expired() == 1
+    assert other._claim()["id"] == "job-1"
+
+    assert not worker._renew("job-1")
+    worker._finish("job-1", {"status": "SUCCESS"}, None)
+    with sqlite3.connect(worker.db_path) as conn:
+        status, owner = conn.execute("SELECT status, owner FROM ocr_jobs WHERE id = 'job-1'").fetchone()
+    assert (status, owner) == ("running", other.worker_id)
+
+
+def test_jobs_from_a_database_without_leases_are_recovered(tmp_path):
+    queue = _queue(tmp_path)
+    with sqlite3.connect(queue.db_path) as conn:
+        conn.execute(
+            "CREATE TABLE ocr_jobs (id TEXT PRIMARY KEY, session_id TEXT NOT NULL, doc_type TEXT NOT NULL, "
+            "filename TEXT NOT NULL, path TEXT NOT NULL, ext TEXT NOT NULL, sha256 TEXT NOT NULL, "
+            "status TEXT NOT NULL, result TEXT, error TEXT, created_at REAL NOT NULL, started_at REAL, "
+            "finished_at REAL)"
+        )
+        conn.execute(
+            "INSERT INTO ocr_jobs (id, session_id, doc_type, filename, path, ext, sha256, status, created_at) "
+            "VALUES ('old', 's', 'pan_card', 'pan.png', '', '.png', 'ab', 'running', 0)"
+        )
+
+    queue._init_schema()
+    queue._init_schema()
+    assert queue._requeue_expired() == 1
+    assert queue._claim()["owner"] == queue.worker_id
+
+
+def _slow_ocr(monkeypatch, seconds):
+    async def process_image(path, doc_type):
+        await asyncio.sleep(seconds)
+        return {"status": "SUCCESS", "text": "", "confidence": 90.0, "extracted_data": {}}
+
+    monkeypatch.setattr(engine_module.ocr_engine, "process_image", process_image)
+
+
+def test_running_job_keeps_its_lease(tmp_path, monkeypatch):
+    _slow_ocr(monkeypatch, 1.5)
+    worker, other = _queue(tmp_path), _queue(tmp_path)
+    worker.lease_seconds = 0.6
+    completed = []
+
+    async def on_complete(job, result):
+        completed.append(job["id"])
+
+    async def scenario():
+        await worker.start(on_complete)
+        try:
+            job = await worker.enqueue("s", "pan_card", "pan.png", _upload(tmp_path), ".png", "ef" * 32)
+            requeued = 0
+            while (await worker.get(job["job_id"]))["status"] in ("queued", "running"):
+                requeued += other._requeue_expired()
+                await asyncio.sleep(0.05)
+            return job["job_id"], requeued
+        finally:
+            await worker.stop()
+
+    job_id, requeued = asyncio.run(scenario())
+    assert requeued == 0
+    assert completed == [job_id]
+    assert os.listdir(worker.job_dir) == []
+
+
+def test_worker_that_lost_its_lease_leaves_the_job_alone(tmp_path, monkeypatch):
+    _slow_ocr(monkeypatch, 0.5)
+    worker, other = _queue(tmp_path), _queue(tmp_path)
+    completed = []
+
+    async def on_complete(job, result):
+        completed.append(job["id"])
+
+    async def scenario():
+        await worker.start(on_complete)
+        try:
+            job = await worker.enqueue("s", "pan_card", "pan.png", _upload(tmp_path), ".png", "01" * 32)
+            while (await worker.get(job["job_id"]))["status"] == "queued":
+                await asyncio.sleep(0.02)
+            # The worker looked dead (e.g. a long stall) and the job was taken over
+            _expire_leases(worker)
+            assert other._requeue_expired() == 1
+            assert other._claim()["id"] == job["job_id"]
+            await asyncio.sleep(0.8)
+            return await worker.get(job["job_id"])
+        finally:
+            await worker.stop()
+
+    job = asyncio.run(scenario())
+    assert completed == []
+    assert job["status"] == "running"
+    # The new owner still needs the upload
+    assert len(os.listdir(worker.job_dir)) == 1
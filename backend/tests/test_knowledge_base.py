@@ -0,0 +1,100 @@
+import asyncio
+import functools
+import pytest
+
+# knowledge_base imports the live vector store, which loads the embedding model
+pytest.importorskip("sentence_transformers")
+
+from app.tools.rag import knowledge_base as kb_module
+from app.tools.rag.embedding_cache import EmbeddingCache
+from app.tools.rag.ingestion import ingest_directory
+from app.tools.rag.knowledge_base import BUILTIN_DOCUMENTS, KnowledgeBase
+
+
+@pytest.fixture
+def knowledge_base(make_store, tmp_path, monkeypatch):
+    cache = EmbeddingCache(cache_dir=str(tmp_path / "cache"), model_name="test")
+    monkeypatch.setattr(kb_module, "embedding_cache", cache)
+    monkeypatch.setattr(kb_module, "ingest_directory", functools.partial(ingest_directory, cache=cache))
+    monkeypatch.setattr(kb_module.settings, "VECTOR_INDEX_BACKEND", "exact")
+    return KnowledgeBase(make_store())
+
+
+def _policy_dir(tmp_path, name, text):
+    directory = tmp_path / name
+    directory.mkdir()
+    (directory / "policy.md").write_text(text, encoding="utf-8")
+    return str(directory)
+
+
+def test_rebuild_publishes_frozen_snapshots(knowledge_base, tmp_path):
+    assert knowledge_base.version == 0
+    assert len(knowledge_base.current) == 0
+
+    first = asyncio.run(knowledge_base.rebuild(str(tmp_path / "missing")))
+    assert first["source"] == "builtin"
+    assert first["documents"] == len(BUILTIN_DOCUMENTS)
+    reader = knowledge_base.current
+    assert reader.frozen
+
+    second = asyncio.run(knowledge_base.rebuild(_policy_dir(tmp_path, "kb", "prepayment is free after one year")))
+    assert second["version"] == 2
+    assert knowledge_base.current is not reader
+    assert knowledge_base.current.documents[0]["content"] == "prepayment is free after one year"
+    # A query that grabbed the old snapshot still sees all of it
+    assert len(reader) == len(BUILTIN_DOCUMENTS)
+
+
+def test_rollback(knowledge_base, tmp_path):
+    for i in range(3):
+        asyncio.run(knowledge_base.rebuild(_policy_dir(tmp_path, f"kb{i}", f"policy version {i}")))
+
+    assert knowledge_base.rollback().version == 2
+    assert knowledge_base.current.documents[0]["content"] == "policy version 1"
+    assert knowledge_base.rollback(3).version == 3
+    with pytest.raises(ValueError):
+        knowledge_base.rollback(99)
+
+
+def test_history_is_bounded(make_store, tmp_path, monkeypatch):
+    monkeypatch.setattr(kb_module.settings, "KB_SNAPSHOT_HISTORY", 2)
+    knowledge_base = KnowledgeBase(make_store())
+    for i in range(4):
+        store = make_store([f"policy {i}"])
+        knowledge_base.publish(store, "test")
+
+    assert [v["version"] for v in knowledge_base.status()["versions"]] == [3, 4]
+    with pytest.raises(ValueError):
+        knowledge_base.rollback(1)
+    assert knowledge_base.rollback().version == 3
+    with pytest.raises(ValueError):
+        knowledge_base.rollback()
+
+
+def test_background_rebuild(knowledge_base, tmp_path, monkeypatch):
+    release = None
+
+    async def slow_ingest(directory, store):
+        await release.wait()
+        raise OSError("disk vanished")
+
+    monkeypatch.setattr(kb_module, "ingest_directory", slow_ingest)
+    directory = _policy_dir(tmp_path, "kb", "policy")
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        assert knowledge_base.start_rebuild(directory)
+        await asyncio.sleep(0)
+        assert knowledge_base.rebuilding
+        assert not knowledge_base.start_rebuild(directory)
+
+        release.set()
+        while knowledge_base.rebuilding:
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    status = knowledge_base.status()
+    assert status["last_error"] == "disk vanished"
+    # The failed build published nothing
+    assert status["current_version"] == 0
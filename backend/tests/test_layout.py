@@ -0,0 +1,137 @@
+import asyncio
+import numpy as np
+import pytest
+from PIL import Image
+from app.config import settings
+from app.tools.document_ocr import layout
+from app.tools.document_ocr import ocr_engine as engine_module
+from app.tools.document_ocr.layout import CARD_WIDTH, LAYOUT_TEMPLATES, layout_regions
+from app.tools.document_ocr.ocr_engine import OCREngine
+from app.tools.document_ocr.ocr_pool import OCRPool
+from app.tools.document_ocr.pass_scheduler import PassScheduler
+
+cv2 = pytest.importorskip("cv2")
+
+CARD = (856, 540)
+# Dark block where a 2018+ PAN card prints the number, as card fractions
+MARKER = (0.10, 0.25, 0.40, 0.38)
+
+
+def _card_photo(angle=6.0, portrait=False):
+    """A light card with a dark marker, rotated on a dark table"""
+    card = np.full((CARD[1], CARD[0]), 235, dtype=np.uint8)
+    x0, y0, x1, y1 = MARKER
+    card[int(y0 * CARD[1]):int(y1 * CARD[1]), int(x0 * CARD[0]):int(x1 * CARD[0])] = 20
+    if portrait:
+        card = np.ascontiguousarray(np.rot90(card))
+
+    photo = np.full((1200, 1600), 40, dtype=np.uint8)
+    height, width = card.shape
+    top, left = (1200 - height) // 2, (1600 - width) // 2
+    photo[top:top + height, left:left + width] = card
+    rotation = cv2.getRotationMatrix2D((800, 600), angle, 1.0)
+    photo = cv2.warpAffine(photo, rotation, (1600, 1200), borderValue=40)
+    return Image.fromarray(photo)
+
+
+def _pan_crops(candidate):
+    return [np.asarray(crop) for field, crop, psm in candidate]
+
+
+def test_no_template_no_regions():
+    assert layout_regions(_card_photo(), "salary_slip") == []
+
+
+def test_card_is_located_deskewed_and_cropped():
+    candidates = layout_regions(_card_photo(), "pan_card")
+    assert len(candidates) == 2
+    assert [(field, psm) for field, _, psm in candidates[0]] == [
+        (field, psm) for field, _, psm in LAYOUT_TEMPLATES["pan_card"]["regions"]
+    ]
+
+    new_layout, old_layout = _pan_crops(candidates[0])
+    # Crops come from the warped card, not the photo
+    assert new_layout.shape[1] == pytest.approx(0.73 * CARD_WIDTH, abs=2)
+    assert new_layout.min() < 80
+    assert old_layout.min() > 150
+
+
+def test_upside_down_is_the_second_candidate():
+    candidates = layout_regions(_card_photo(angle=180 + 6), "pan_card")
+    upright, rotated = candidates
+    assert _pan_crops(upright)[0].min() > 150
+    assert _pan_crops(rotated)[0].min() < 80
+
+
+def test_portrait_photo_turned_to_landscape():
+    candidates = layout_regions(_card_photo(angle=90, portrait=True), "pan_card")
+    crops = [_pan_crops(c)[0] for c in candidates]
+    # Turned one way or the other; one orientation shows the marker
+    assert all(crop.shape[1] > crop.shape[0] for crop in crops)
+    assert min(crop.min() for crop in crops) < 80
+
+
+def test_whole_image_used_when_no_card_found(monkeypatch):
+    monkeypatch.setattr(layout, "_cv2", lambda: None)
+    image = Image.new("L", (600, 900), 255)
+    candidates = layout_regions(image, "aadhaar")
+
+    details = np.asarray(candidates[0][0][1])
+    # Portrait image rotated to 900 x 600, then cropped by fractions
+    assert details.shape == (int(0.68 * 600) - int(0.20 * 600), int(0.98 * 900) - int(0.26 * 900))
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    pool = OCRPool(max_workers=0, max_queue=8)
+    monkeypatch.setattr(engine_module, "ocr_pool", pool)
+    # Wins recorded here must not reorder passes for other tests
+    monkeypatch.setattr(engine_module, "pass_scheduler", PassScheduler())
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture
+def photo_path(tmp_path):
+    path = tmp_path / "pan.png"
+    _card_photo().save(path)
+    return str(path)
+
+
+def test_roi_hit_skips_full_image_passes(thread_pool, photo_path, monkeypatch):
+    read = []
+
+    def recognize(image, lang, psm):
+        read.append(image.size)
+        return "Permanent Account Number\nABCDE1234F", [91.0, 89.0]
+
+    monkeypatch.setattr(engine_module.tesseract_pool, "recognize", recognize)
+    monkeypatch.setattr(OCREngine, "_run_passes", None)
+    engine = OCREngine()
+    result = asyncio.run(engine.process_image(photo_path, "pan_card"))
+
+    assert result["ocr_pass"] == "roi"
+    assert result["extracted_data"]["pan_number"] == "ABCDE1234F"
+    # Only the template crops were read, never the whole photo
+    assert len(read) == 2 and all(size[0] < CARD_WIDTH for size in read)
+    assert engine.roi_stats()["hits"] == 1
+
+
+def test_roi_miss_falls_back_to_full_passes(thread_pool, photo_path, monkeypatch):
+    monkeypatch.setattr(engine_module.tesseract_pool, "recognize", lambda image, lang, psm: ("", []))
+    full = {"text": "ABCDE1234F", "confidence": 0.9, "extracted_data": {"pan_number": "ABCDE1234F"},
+            "status": "SUCCESS", "ocr_pass": "(False, 6)", "passes_run": ["(False, 6)"]}
+
+    async def run_passes(self, source, doc_type):
+        return dict(full)
+
+    monkeypatch.setattr(OCREngine, "_run_passes", run_passes)
+    engine = OCREngine()
+    result = asyncio.run(engine.process_image(photo_path, "pan_card"))
+
+    assert result["ocr_pass"] == "(False, 6)"
+    assert engine.roi_stats()["misses"] == 1
+
+    monkeypatch.setattr(settings, "OCR_ROI_ENABLED", False)
+    asyncio.run(engine.process_image(photo_path, "pan_card"))
+    assert engine.roi_stats()["misses"] == 1
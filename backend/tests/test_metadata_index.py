@@ -0,0 +1,70 @@
+import numpy as np
+
+from app.tools.rag.metadata_index import MetadataIndex
+
+METADATA = [
+    {"category": "eligibility", "source": "faq.md", "tags": ["a"]},
+    {"category": "documents", "source": "faq.md"},
+    {"category": "documents", "source": "kyc.md", "language": "hi"},
+    {"category": "interest_rates", "source": "rates.md", "language": "en"},
+    {"source": "misc.md"},
+]
+
+
+def _index(fields=("category", "source")):
+    index = MetadataIndex(fields)
+    for metadata in METADATA:
+        index.add(metadata)
+    return index, [{"content": "", "metadata": m} for m in METADATA]
+
+
+def _ids(mask):
+    return np.flatnonzero(mask).tolist()
+
+
+def test_no_filter_means_no_mask():
+    index, documents = _index()
+    assert index.mask(None, documents) is None
+    assert index.mask({}, documents) is None
+
+
+def test_single_value_and_value_list():
+    index, documents = _index()
+    assert _ids(index.mask({"category": "documents"}, documents)) == [1, 2]
+    assert _ids(index.mask({"category": ["eligibility", "interest_rates"]}, documents)) == [0, 3]
+    assert _ids(index.mask({"category": "unknown"}, documents)) == []
+
+
+def test_fields_are_anded():
+    index, documents = _index()
+    assert _ids(index.mask({"category": "documents", "source": "faq.md"}, documents)) == [1]
+    assert _ids(index.mask({"category": "documents", "source": "rates.md"}, documents)) == []
+
+
+def test_missing_field_matches_none():
+    index, documents = _index()
+    assert _ids(index.mask({"category": None}, documents)) == [4]
+
+
+def test_unindexed_field_falls_back_to_scan():
+    index, documents = _index()
+    assert _ids(index.mask({"language": "hi"}, documents)) == [2]
+    assert _ids(index.mask({"language": ["hi", "en"], "category": "documents"}, documents)) == [2]
+
+
+def test_unhashable_values_are_skipped_by_bitmaps():
+    index, documents = _index(fields=("category", "tags"))
+    assert _ids(index.mask({"tags": [["a"]]}, documents)) == []
+    assert _ids(index.mask({"category": "documents"}, documents)) == [1, 2]
+
+
+def test_bitmaps_cover_documents_added_after_compile():
+    index, documents = _index()
+    index.compile()
+    assert _ids(index.mask({"category": "documents"}, documents)) == [1, 2]
+
+    index.add({"category": "documents", "source": "late.md"})
+    documents.append({"content": "", "metadata": {"category": "documents"}})
+    mask = index.mask({"category": "documents"}, documents)
+    assert len(mask) == 6
+    assert _ids(mask) == [1, 2, 5]
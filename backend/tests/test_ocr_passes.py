@@ -0,0 +1,116 @@
+import asyncio
+import time
+import pytest
+from PIL import Image
+from app.config import settings
+from app.tools.document_ocr import ocr_engine as engine_module
+from app.tools.document_ocr.ocr_engine import OCREngine
+from app.tools.document_ocr.ocr_pool import OCRPool
+from app.tools.document_ocr.pass_scheduler import OCR_PASSES, PassScheduler, pass_label
+
+# (binarize, psm) -> (seconds, extracted PAN or None)
+PASS_BEHAVIOUR = {
+    (False, 3): (0.5, None),
+    (False, 6): (0.05, "ABCDE1234F"),
+    (True, 3): (0.5, None),
+    (True, 6): (0.5, None),
+}
+
+
+@pytest.fixture
+def fake_passes(monkeypatch, tmp_path):
+    ran = []
+
+    def fake_ocr_pass(self, base, doc_type, ocr_pass):
+        seconds, pan = PASS_BEHAVIOUR[ocr_pass]
+        ran.append(ocr_pass)
+        time.sleep(seconds)
+        if pan is None:
+            return None
+        return {"text": pan, "confidence": 0.9, "extracted_data": {"pan_number": pan}, "ocr_pass": pass_label(ocr_pass)}
+
+    monkeypatch.setattr(OCREngine, "_ocr_pass", fake_ocr_pass)
+    pool = OCRPool(max_workers=0, max_queue=8)
+    monkeypatch.setattr(engine_module, "ocr_pool", pool)
+
+    path = tmp_path / "card.png"
+    Image.new("L", (200, 120), 255).save(path)
+    yield pool, str(path), ran
+    pool.shutdown()
+
+
+def test_sequential_passes_use_one_slot_and_stop_at_the_win(monkeypatch, fake_passes):
+    pool, path, ran = fake_passes
+    monkeypatch.setattr(settings, "OCR_PARALLEL_PASSES", 1)
+
+    result = asyncio.run(OCREngine()._run_passes(path, "pan_card"))
+
+    assert result["extracted_data"] == {"pan_number": "ABCDE1234F"}
+    assert ran == [(False, 3), (False, 6)]
+    assert pool.pending == 0
+    assert pool.max_pending == 1
+
+
+def test_parallel_passes_release_pool_after_cancelled_passes_finish(monkeypatch, fake_passes):
+    pool, path, ran = fake_passes
+    monkeypatch.setattr(settings, "OCR_PARALLEL_PASSES", 2)
+
+    async def scenario():
+        result = await OCREngine()._run_passes(path, "pan_card")
+        # The losing pass is still running in its worker and keeps its slot
+        occupied_after_win = pool.pending
+
+        deadline = time.monotonic() + 5
+        while pool.pending and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        return result, occupied_after_win
+
+    result, occupied_after_win = asyncio.run(scenario())
+
+    assert result["extracted_data"] == {"pan_number": "ABCDE1234F"}
+    assert occupied_after_win == 1
+    assert pool.pending == 0
+    # Queued passes were dropped, not started
+    assert sorted(ran) == [(False, 3), (False, 6)]
+
+
+def test_scheduler_starts_in_default_order():
+    scheduler = PassScheduler()
+    assert scheduler.order("pan_card") == OCR_PASSES
+    assert scheduler.stats() == {}
+
+
+def test_scheduler_learns_winning_pass_per_doc_type():
+    scheduler = PassScheduler()
+    for _ in range(3):
+        # gray-psm3 ran and failed, gray-psm6 won
+        scheduler.record("pan_card", ["gray-psm3", "gray-psm6"], "gray-psm6")
+
+    assert scheduler.order("pan_card")[0] == (False, 6)
+    # Untried passes (rate 0.5) now beat the one that kept failing
+    assert scheduler.order("pan_card")[-1] == (False, 3)
+    # Other doc types keep their own history
+    assert scheduler.order("aadhaar") == OCR_PASSES
+
+    stats = scheduler.stats()["pan_card"]
+    assert stats["documents"] == 3
+    assert stats["avg_passes"] == 2.0
+    assert stats["passes"]["gray-psm6"] == {"runs": 3, "wins": 3, "win_rate": 0.8}
+    assert stats["passes"]["gray-psm3"]["win_rate"] == 0.2
+
+
+def test_engine_feeds_passes_back_to_scheduler(monkeypatch, fake_passes):
+    pool, path, ran = fake_passes
+    scheduler = PassScheduler()
+    monkeypatch.setattr(engine_module, "pass_scheduler", scheduler)
+    monkeypatch.setattr(settings, "OCR_ROI_ENABLED", False)
+    monkeypatch.setattr(settings, "OCR_PARALLEL_PASSES", 1)
+
+    result = asyncio.run(OCREngine().process_image(path, "pan_card"))
+    assert "passes_run" not in result
+    assert scheduler.stats()["pan_card"]["passes"]["gray-psm6"]["wins"] == 1
+
+    ran.clear()
+    asyncio.run(OCREngine().process_image(path, "pan_card"))
+    # The learned winner now runs first
+    assert ran == [(False, 6)]
@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from app.tools.document_ocr.ocr_pool import OCRPool, OCRQueueFull, OCRUnavailable
+
+
+async def _wait_until_idle(pool: OCRPool, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while pool.pending and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_cancelled_jobs_hold_their_slot_until_they_finish(max_workers):
+    async def scenario():
+        pool = OCRPool(max_workers=max_workers, max_queue=0)
+        try:
+            # Bring the workers up so the jobs below really start
+            await asyncio.gather(*[pool.run(time.sleep, 0) for _ in range(pool.workers)])
+
+            tasks = [asyncio.ensure_future(pool.run(time.sleep, 1.0)) for _ in range(pool.workers)]
+            await asyncio.sleep(0.3)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+            # The jobs are still running in the workers: no free capacity
+            assert pool.pending == pool.workers
+            assert pool.stats()["busy_workers"] == pool.workers
+            with pytest.raises(OCRQueueFull):
+                await pool.run(time.sleep, 0)
+
+            await _wait_until_idle(pool)
+            assert pool.pending == 0
+            assert pool.stats()["cancelled"] == pool.workers
+
+            started = time.perf_counter()
+            await asyncio.gather(*[pool.run(time.sleep, 0.1) for _ in range(pool.workers)])
+            assert time.perf_counter() - started < 1.0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_cancelling_a_queued_job_frees_its_slot_immediately():
+    async def scenario():
+        pool = OCRPool(max_workers=0, max_queue=2)
+        try:
+            running = [asyncio.ensure_future(pool.run(time.sleep, 0.5)) for _ in range(pool.workers)]
+            queued = asyncio.ensure_future(pool.run(time.sleep, 0.5))
+            await asyncio.sleep(0.1)
+            assert pool.pending == pool.workers + 1
+
+            queued.cancel()
+            await asyncio.gather(queued, return_exceptions=True)
+            assert pool.pending == pool.workers
+
+            await asyncio.gather(*running)
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+class _ManualExecutor(Executor):
+    """Executor whose futures the test completes by hand"""
+
+    def __init__(self):
+        self.futures = []
+        self.shut_down = False
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shut_down = True
+
+
+def test_late_failure_does_not_restart_the_replacement_pool():
+    async def scenario():
+        pool = OCRPool(max_workers=0, max_queue=4)
+        broken = pool._pool = _ManualExecutor()
+        try:
+            first = asyncio.ensure_future(pool.run(time.sleep, 0))
+            second = asyncio.ensure_future(pool.run(time.sleep, 0))
+            await asyncio.sleep(0)
+
+            broken.futures[0].set_exception(BrokenProcessPool("worker died"))
+            with pytest.raises(OCRUnavailable):
+                await first
+            # A new request brings up the replacement before the second
+            # caller sees its (old) failure
+            await pool.run(time.sleep, 0)
+            replacement = pool._pool
+
+            broken.futures[1].set_exception(BrokenProcessPool("worker died"))
+            with pytest.raises(OCRUnavailable):
+                await second
+
+            assert broken.shut_down
+            assert pool._pool is replacement
+            assert pool.restarts == 1
+            assert pool.pending == 0
+            await pool.run(time.sleep, 0)
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
+
+
+def test_worker_crash_restarts_the_process_pool_once():
+    async def scenario():
+        pool = OCRPool(max_workers=2, max_queue=2)
+        try:
+            await pool.start()
+            results = await asyncio.gather(
+                pool.run(os._exit, 1),
+                pool.run(time.sleep, 2.0),
+                return_exceptions=True
+            )
+            assert all(isinstance(r, OCRUnavailable) for r in results)
+            assert pool.restarts == 1
+
+            assert await pool.run(abs, -3) == 3
+            await _wait_until_idle(pool)
+            assert pool.pending == 0
+        finally:
+            pool.shutdown()
+
+    asyncio.run(scenario())
@@ -0,0 +1,157 @@
+import asyncio
+import shutil
+import threading
+import time
+import pytest
+from app.config import settings
+from app.tools.document_ocr import ocr_engine as engine_module
+from app.tools.document_ocr.ocr_engine import OCREngine
+from app.tools.document_ocr.ocr_pool import OCRPool
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    """
+    Replace rasterize + OCR of one page with ``behaviour[(page, dpi)]``:
+    (seconds, extracted data), or None for a page that does not exist
+    """
+    behaviour = {}
+    ran = []
+    lock = threading.Lock()
+
+    def fake_page(self, source, doc_type, page_number, dpi, passes=None):
+        with lock:
+            ran.append((page_number, dpi))
+        outcome = behaviour.get((page_number, dpi), (0.0, {}))
+        if outcome is None:
+            return None
+        if isinstance(outcome, Exception):
+            raise outcome
+        seconds, data = outcome
+        time.sleep(seconds)
+        return {
+            "text": " ".join(str(v) for v in data.values()),
+            "confidence": 0.8,
+            "extracted_data": dict(data),
+            "ocr_pass": "(False, 6)",
+            "passes_run": [f"p{page_number}@{dpi}"],
+            "page": page_number,
+            "dpi": dpi
+        }
+
+    monkeypatch.setattr(OCREngine, "ocr_pdf_page_sync", fake_page)
+    monkeypatch.setattr(settings, "OCR_PDF_DPI_STEPS", [150, 300])
+    monkeypatch.setattr(settings, "OCR_PDF_MAX_PAGES", 3)
+    pool = OCRPool(max_workers=0, max_queue=8)
+    monkeypatch.setattr(engine_module, "ocr_pool", pool)
+    yield behaviour, ran
+    pool.shutdown()
+
+
+def _ocr(page_count=None, doc_type="pan_card"):
+    return asyncio.run(OCREngine()._ocr_pdf_images(b"%PDF", doc_type, page_count))
+
+
+def test_low_dpi_success_skips_escalation(fake_pages):
+    behaviour, ran = fake_pages
+    behaviour[(1, 150)] = (0.0, {"pan_number": "ABCDE1234F"})
+
+    result = _ocr()
+    assert result["extracted_data"]["pan_number"] == "ABCDE1234F"
+    assert all(dpi == 150 for _, dpi in ran)
+    assert result["status"] == "SUCCESS"
+
+
+def test_escalates_dpi_only_while_fields_missing(fake_pages):
+    behaviour, ran = fake_pages
+    behaviour[(2, 300)] = (0.0, {"pan_number": "ABCDE1234F"})
+
+    result = _ocr()
+    assert result["extracted_data"]["pan_number"] == "ABCDE1234F"
+    assert sorted(p for p, dpi in ran if dpi == 150) == [1, 2, 3]
+    assert (2, 300) in ran
+    assert "p2@300" in result["passes_run"]
+
+
+def test_merges_fields_across_pages(fake_pages):
+    behaviour, _ = fake_pages
+    behaviour[(1, 150)] = (0.0, {"name": "RAVI KUMAR"})
+    behaviour[(3, 150)] = (0.0, {"aadhaar_number": "1234 5678 9012", "name": "OTHER"})
+
+    result = _ocr(doc_type="aadhaar")
+    # First page wins a field found on several
+    assert result["extracted_data"]["name"] == "RAVI KUMAR"
+    assert result["extracted_data"]["aadhaar_number"] == "1234 5678 9012"
+
+
+def test_stops_waiting_for_slow_pages_once_complete(fake_pages):
+    behaviour, _ = fake_pages
+    behaviour[(1, 150)] = (0.0, {"pan_number": "ABCDE1234F"})
+    behaviour[(2, 150)] = (1.0, {})
+    behaviour[(3, 150)] = (1.0, {})
+
+    started = time.monotonic()
+    result = _ocr()
+    assert result["extracted_data"]["pan_number"] == "ABCDE1234F"
+    assert time.monotonic() - started < 0.9
+
+
+def test_page_count_caps_pages_and_missing_pages_are_not_retried(fake_pages):
+    behaviour, ran = fake_pages
+    assert _ocr(page_count=2)["status"] == "NO_TEXT_DETECTED"
+    assert sorted(ran) == [(1, 150), (1, 300), (2, 150), (2, 300)]
+
+    ran.clear()
+    behaviour[(2, 150)] = None
+    behaviour[(3, 150)] = None
+    _ocr()
+    assert sorted(ran) == [(1, 150), (1, 300), (2, 150), (3, 150)]
+
+
+def test_rasterization_failure_stops_escalation(fake_pages):
+    behaviour, ran = fake_pages
+    for page in (1, 2, 3):
+        behaviour[(page, 150)] = RuntimeError("pdftoppm failed")
+
+    result = _ocr()
+    assert result["status"] == "ERROR"
+    assert "pdftoppm failed" in result["error"]
+    assert all(dpi == 150 for _, dpi in ran)
+
+
+def _pdf_pages(n):
+    from io import BytesIO
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    for i in range(n):
+        pdf.drawString(72, 720, f"Permanent Account Number ABCDE{1000 + i}F")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def test_page_rasterized_alone_in_grayscale(monkeypatch):
+    pytest.importorskip("pdf2image")
+    pytest.importorskip("reportlab")
+    if shutil.which("pdftoppm") is None:
+        pytest.skip("poppler (pdftoppm) not installed")
+
+    seen = []
+
+    def fake_ocr_image(self, image, doc_type, passes=None):
+        seen.append((image.mode, image.size))
+        return {"text": "", "confidence": 0.0, "extracted_data": {}}
+
+    monkeypatch.setattr(OCREngine, "_ocr_image", fake_ocr_image)
+    engine = OCREngine()
+    pdf = _pdf_pages(2)
+
+    result = engine.ocr_pdf_page_sync(pdf, "pan_card", 2, 150)
+    assert (result["page"], result["dpi"]) == (2, 150)
+    # One page only, A4 at 150 dpi (595 x 842 pt)
+    assert len(seen) == 1
+    mode, (width, height) = seen[0]
+    assert mode == "L"
+    assert abs(width - 1240) <= 1 and abs(height - 1754) <= 1
@@ -0,0 +1,138 @@
+import asyncio
+from io import BytesIO
+import pytest
+from PIL import Image
+from PyPDF2 import PdfReader, PdfWriter
+from app.config import settings
+from app.tools.document_ocr import ocr_engine as engine_module
+from app.tools.document_ocr.ocr_engine import OCREngine
+from app.tools.document_ocr.ocr_pool import OCRPool
+
+pytest.importorskip("reportlab")
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+
+def _digital_page(text, form=False):
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    if form:
+        # Text inside a form XObject, as some PDF producers emit it
+        pdf.beginForm("text")
+        pdf.drawString(72, 720, text)
+        pdf.endForm()
+        pdf.doForm("text")
+    else:
+        pdf.drawString(72, 720, text)
+    pdf.save()
+    return PdfReader(BytesIO(buffer.getvalue())).pages[0]
+
+
+def _scanned_page():
+    # Pillow writes image-only pages, like a scanner (reportlab always
+    # lists a font in the page resources)
+    buffer = BytesIO()
+    Image.new("L", (620, 877), 200).save(buffer, format="PDF", resolution=75.0)
+    return PdfReader(BytesIO(buffer.getvalue())).pages[0]
+
+
+def _pdf(pages, form=False):
+    """One page per entry: a string is drawn as text, None is a scanned image"""
+    writer = PdfWriter()
+    for text in pages:
+        writer.add_page(_scanned_page() if text is None else _digital_page(text, form))
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+def test_digital_pdf_reads_first_pages_only(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_PDF_TEXT_PAGES", 2)
+    triage = OCREngine().triage_pdf_sync(_pdf([f"Statement page {i}" for i in range(1, 6)]))
+
+    assert triage["page_count"] == 5
+    assert triage["has_text_layer"] is True
+    assert "Statement page 1" in triage["text"]
+    assert "Statement page 2" in triage["text"]
+    assert "Statement page 3" not in triage["text"]
+
+
+def test_scanned_pdf_skips_pdfminer(monkeypatch):
+    def no_pdfminer(*args, **kwargs):
+        raise AssertionError("pdfminer ran on a scanned PDF")
+
+    monkeypatch.setattr(engine_module, "pdf_extract_text", no_pdfminer)
+    triage = OCREngine().triage_pdf_sync(_pdf([None, None]))
+
+    assert triage == {"page_count": 2, "has_text_layer": False, "text": ""}
+
+
+def test_text_in_form_xobject_counts_as_text_layer():
+    triage = OCREngine().triage_pdf_sync(_pdf(["PAN ABCDE1234F"], form=True))
+    assert triage["has_text_layer"] is True
+    assert "ABCDE1234F" in triage["text"]
+
+
+def test_text_layer_checked_on_first_pages_only(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_PDF_TEXT_PAGES", 1)
+    triage = OCREngine().triage_pdf_sync(_pdf([None, "Digital second page"]))
+    assert triage["has_text_layer"] is False
+
+
+def test_path_source(tmp_path):
+    path = tmp_path / "statement.pdf"
+    path.write_bytes(_pdf(["Salary credited 50000"]))
+    triage = OCREngine().triage_pdf_sync(str(path))
+    assert triage["page_count"] == 1
+    assert "Salary credited 50000" in triage["text"]
+
+
+def test_unreadable_structure_falls_back_to_pdfminer(monkeypatch):
+    calls = []
+
+    def fake_pdfminer(source, maxpages, laparams):
+        calls.append(maxpages)
+        return "recovered text"
+
+    monkeypatch.setattr(engine_module, "pdf_extract_text", fake_pdfminer)
+    triage = OCREngine().triage_pdf_sync(b"%PDF-1.4 not really a pdf")
+
+    assert triage == {"page_count": None, "has_text_layer": True, "text": "recovered text"}
+    assert calls == [settings.OCR_PDF_TEXT_PAGES]
+
+
+@pytest.fixture
+def thread_pool(monkeypatch):
+    pool = OCRPool(max_workers=0, max_queue=8)
+    monkeypatch.setattr(engine_module, "ocr_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+def test_scanned_pdf_goes_straight_to_page_ocr(thread_pool, monkeypatch):
+    page_counts = []
+
+    async def fake_page_ocr(self, source, doc_type, page_count=None):
+        page_counts.append(page_count)
+        return {
+            "text": "ABCDE1234F",
+            "confidence": 0.8,
+            "extracted_data": {"pan_number": "ABCDE1234F"},
+            "status": "SUCCESS",
+            "passes_run": []
+        }
+
+    monkeypatch.setattr(OCREngine, "_ocr_pdf_images", fake_page_ocr)
+    result = asyncio.run(OCREngine().process_pdf(_pdf([None, None]), "pan_card"))
+
+    assert page_counts == [2]
+    assert result["extracted_data"] == {"pan_number": "ABCDE1234F"}
+
+
+def test_digital_pdf_with_fields_skips_ocr(thread_pool, monkeypatch):
+    monkeypatch.setattr(OCREngine, "_ocr_pdf_images", None)
+    result = asyncio.run(OCREngine().process_pdf(_pdf(["Permanent Account Number ABCDE1234F"]), "pan_card"))
+
+    assert result["status"] == "SUCCESS"
+    assert result["extracted_data"]["pan_number"] == "ABCDE1234F"
@@ -0,0 +1,118 @@
+import asyncio
+import numpy as np
+import pytest
+
+from app.tools.rag.quantization import QUANTIZATION_MODES, QuantizedIndex, quantization_report
+
+
+def _unit_rows(n, dim=64, seed=0):
+    rows = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return rows / np.linalg.norm(rows, axis=1, keepdims=True)
+
+
+def _recall(index, matrix, queries, k, rescore_factor):
+    hits = 0
+    for q in queries:
+        truth = set(np.argsort(matrix @ q)[::-1][:k].tolist())
+        ids, _ = index.search(q, k, matrix, rescore_factor=rescore_factor)
+        hits += len(truth & set(ids.tolist()))
+    return hits / float(len(queries) * k)
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        QuantizedIndex.build(_unit_rows(4), "int4")
+
+
+def test_code_sizes():
+    matrix = _unit_rows(100)
+    int8 = QuantizedIndex.build(matrix, "int8")
+    binary = QuantizedIndex.build(matrix, "binary")
+
+    assert int8.codes.dtype == np.int8 and int8.codes.shape == (100, 64)
+    assert int8.nbytes == 100 * 64 + 64 * 4
+    assert binary.codes.shape == (100, 8)
+    assert binary.nbytes == 100 * 8
+
+
+@pytest.mark.parametrize("mode", sorted(QUANTIZATION_MODES))
+def test_rescored_scores_are_exact_cosines(mode):
+    matrix = _unit_rows(300)
+    query = _unit_rows(1, seed=1)[0]
+    ids, scores = QuantizedIndex.build(matrix, mode).search(query, 10, matrix)
+
+    assert len(ids) == 10
+    np.testing.assert_allclose(scores, matrix[ids] @ query, rtol=1e-5)
+    assert list(scores) == sorted(scores, reverse=True)
+
+
+def test_int8_recall_against_exact_search():
+    matrix = _unit_rows(2000)
+    queries = _unit_rows(20, seed=1)
+    index = QuantizedIndex.build(matrix, "int8")
+
+    assert _recall(index, matrix, queries, 10, rescore_factor=4) >= 0.95
+    # Rescoring every row is exact search
+    assert _recall(index, matrix, queries, 10, rescore_factor=len(matrix)) == 1.0
+
+
+def test_binary_recall_grows_with_rescoring():
+    # Sign bits are coarse on isotropic random data; 40 random candidates
+    # out of 2000 would recall ~2%
+    matrix = _unit_rows(2000)
+    queries = _unit_rows(20, seed=1)
+    index = QuantizedIndex.build(matrix, "binary")
+
+    narrow = _recall(index, matrix, queries, 10, rescore_factor=4)
+    wide = _recall(index, matrix, queries, 10, rescore_factor=20)
+    assert narrow >= 0.25
+    assert wide > narrow
+    assert _recall(index, matrix, queries, 10, rescore_factor=len(matrix)) == 1.0
+
+
+def test_first_pass_scans_in_blocks(monkeypatch):
+    from app.tools.rag import quantization
+    matrix = _unit_rows(50)
+    query = _unit_rows(1, seed=1)[0]
+    index = QuantizedIndex.build(matrix, "int8")
+    whole = index.first_pass(query)
+
+    monkeypatch.setattr(quantization, "BLOCK_ROWS", 7)
+    np.testing.assert_allclose(index.first_pass(query), whole, rtol=1e-6)
+
+
+def test_top_k_beyond_corpus_and_empty_index():
+    matrix = _unit_rows(3)
+    ids, _ = QuantizedIndex.build(matrix, "binary").search(matrix[0], 10, matrix)
+    assert sorted(ids.tolist()) == [0, 1, 2]
+
+    empty = np.zeros((0, 64), dtype=np.float32)
+    ids, scores = QuantizedIndex.build(empty, "int8").search(matrix[0], 5, empty)
+    assert len(ids) == 0 and len(scores) == 0
+
+
+def test_report():
+    matrix = _unit_rows(500)
+    report = quantization_report(matrix, _unit_rows(5, seed=1), top_k=5)
+
+    assert report["n_docs"] == 500 and report["n_queries"] == 5
+    assert report["float32"]["recall_at_k"] == 1.0
+    assert report["int8"]["compression"] > 3.5
+    assert report["binary"]["compression"] == 32.0
+    for mode in QUANTIZATION_MODES:
+        assert 0.0 <= report[mode]["recall_at_k"] <= 1.0
+
+
+def test_store_search_uses_quantized_first_pass(make_store, monkeypatch):
+    from app.tools.rag import vector_store as store_module
+    store = make_store([f"policy clause {i}" for i in range(100)])
+    monkeypatch.setattr(store_module.settings, "EMBEDDING_QUANTIZATION", "int8")
+
+    results = asyncio.run(store.search("policy clause 42", top_k=3))
+    assert results[0]["content"] == "policy clause 42"
+    assert store._quantized is not None and store._quantized.ntotal == 100
+
+    # Rows added later are quantized on the next search
+    asyncio.run(store.add_documents(["late clause"], [{}]))
+    assert asyncio.run(store.search("late clause", top_k=1))[0]["content"] == "late clause"
+    assert store._quantized.ntotal == 101
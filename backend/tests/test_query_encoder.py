@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+
+# query_encoder imports the live vector store, which loads the embedding model
+pytest.importorskip("sentence_transformers")
+
+from app.tools.rag.query_encoder import QueryEncoder, normalize_query
+from conftest import HashEmbedder
+
+
+class RecordingEncoder:
+    """Batch encoder that records each batch and can be made to fail or wait"""
+
+    def __init__(self):
+        self.model = HashEmbedder(8)
+        self.batches = []
+        self.fail = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, texts):
+        self.gate.wait(5)
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("encoder crashed")
+        return self.model.encode(texts)
+
+
+def test_normalize_query():
+    assert normalize_query("  What IS the\n interest\trate? ") == "what is the interest rate?"
+
+
+def test_concurrent_misses_share_one_batch():
+    encoder = RecordingEncoder()
+    queries = [f"question {i}" for i in range(5)] + ["Question 0 ", "question   1"]
+
+    async def scenario():
+        query_encoder = QueryEncoder(encoder, cache_size=16, window_ms=50, max_batch=32)
+        vectors = await asyncio.gather(*[query_encoder.encode(q) for q in queries])
+        again = await query_encoder.encode("QUESTION 3")
+        return query_encoder, vectors, again
+
+    query_encoder, vectors, again = asyncio.run(scenario())
+    assert encoder.batches == [[f"question {i}" for i in range(5)]]
+    np.testing.assert_array_equal(vectors[5], vectors[0])
+    np.testing.assert_array_equal(vectors[6], vectors[1])
+    np.testing.assert_array_equal(again, vectors[3])
+    assert not again.flags.writeable
+    stats = query_encoder.stats()
+    assert (stats["hits"], stats["misses"], stats["batches"]) == (1, 7, 1)
+
+
+def test_batches_are_capped():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        query_encoder = QueryEncoder(encoder, cache_size=0, window_ms=50, max_batch=3)
+        await asyncio.gather(*[query_encoder.encode(f"q{i}") for i in range(7)])
+
+    asyncio.run(scenario())
+    assert [len(batch) for batch in encoder.batches] == [3, 3, 1]
+
+
+def test_lru_eviction():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        query_encoder = QueryEncoder(encoder, cache_size=2, window_ms=0, max_batch=8)
+        for query in ("a", "b", "a", "c", "a", "b"):
+            await query_encoder.encode(query)
+        return query_encoder
+
+    query_encoder = asyncio.run(scenario())
+    # "b" was least recently used when "c" arrived
+    assert encoder.batches == [["a"], ["b"], ["c"], ["b"]]
+    assert query_encoder.stats()["cache_size"] == 2
+
+
+def test_encode_many_mixes_hits_and_one_batch():
+    encoder = RecordingEncoder()
+
+    async def scenario():
+        query_encoder = QueryEncoder(encoder, cache_size=8, window_ms=0, max_batch=8)
+        first = await query_encoder.encode("known")
+        many = await query_encoder.encode_many(["new 1", "Known", "new 2", "new 1"])
+        return first, many
+
+    first, many = asyncio.run(scenario())
+    assert encoder.batches == [["known"], ["new 1", "new 2"]]
+    assert many.shape == (4, 8)
+    np.testing.assert_array_equal(many[1], first)
+    np.testing.assert_array_equal(many[0], many[3])
+
+
+def test_failed_batch_reaches_every_waiter_and_worker_recovers():
+    encoder = RecordingEncoder()
+    encoder.fail = True
+
+    async def scenario():
+        query_encoder = QueryEncoder(encoder, cache_size=8, window_ms=20, max_batch=8)
+        results = await asyncio.gather(
+            query_encoder.encode("x"), query_encoder.encode("y"), return_exceptions=True
+        )
+        encoder.fail = False
+        return results, await query_encoder.encode("x"), query_encoder.stats()
+
+    results, vector, stats = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert vector.shape == (8,)
+    assert stats["pending"] == 0
+
+
+def test_cancelled_caller_does_not_cancel_shared_encode():
+    encoder = RecordingEncoder()
+    encoder.gate.clear()
+
+    async def scenario():
+        query_encoder = QueryEncoder(encoder, cache_size=8, window_ms=0, max_batch=8)
+        first = asyncio.ensure_future(query_encoder.encode("shared"))
+        second = asyncio.ensure_future(query_encoder.encode("shared"))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        encoder.gate.set()
+        return await second, first.cancelled()
+
+    vector, cancelled = asyncio.run(scenario())
+    assert cancelled
+    assert vector.shape == (8,)
+    assert encoder.batches == [["shared"]]
@@ -0,0 +1,232 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# rag_engine imports the live vector store, which loads the embedding model
+pytest.importorskip("sentence_transformers")
+
+from app.api import faq
+from app.tools.rag import rag_engine as engine_module
+from app.tools.rag.knowledge_base import KnowledgeBase
+from app.tools.rag.query_encoder import QueryEncoder
+from app.tools.rag.rag_engine import RAGEngine, reciprocal_rank_fusion
+from app.tools.rag.semantic_cache import SemanticCache
+
+DOCUMENTS = [
+    ("Form 16 is required for salaried applicants", {"category": "documents"}),
+    ("Bank statements for the last six months are required", {"category": "documents"}),
+    ("Prepayment of the loan is allowed after twelve EMIs", {"category": "loan_details"}),
+    ("Self employed applicants submit ITR and bank statements", {"category": "documents"}),
+    ("Processing fee is two percent of the loan amount", {"category": "fees"}),
+]
+
+
+@pytest.fixture
+def engine(make_store, monkeypatch):
+    """A RAGEngine serving DOCUMENTS through private encoder, cache and snapshot"""
+    store = make_store([c for c, _ in DOCUMENTS], [dict(m) for _, m in DOCUMENTS])
+    knowledge_base = KnowledgeBase(store.spawn())
+    knowledge_base.publish(store, "test")
+    monkeypatch.setattr(engine_module, "knowledge_base", knowledge_base)
+    monkeypatch.setattr(engine_module, "query_encoder", QueryEncoder(store.encode_batch, window_ms=0))
+    monkeypatch.setattr(engine_module, "semantic_cache", SemanticCache(capacity=16, threshold=0.99, ttl_seconds=60))
+    monkeypatch.setattr(engine_module.settings, "HYBRID_SEARCH", True)
+    engine = RAGEngine()
+    engine.initialized = True
+    return engine
+
+
+def test_reciprocal_rank_fusion():
+    dense = [{"id": 1}, {"id": 2}, {"id": 3}]
+    lexical = [{"id": 3}, {"id": 4}]
+    fused = reciprocal_rank_fusion([dense, lexical], k=60)
+
+    assert [doc_id for doc_id, _ in fused] == [3, 1, 2, 4]
+    assert dict(fused)[3] == pytest.approx(1 / 63 + 1 / 61)
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+def test_keyword_match_wins_hybrid_ranking(engine):
+    # The stand-in embeddings carry no meaning, so only BM25 can find this
+    result = asyncio.run(engine.query("prepayment rules", top_k=3))
+    assert result["answer"] == "Prepayment of the loan is allowed after twelve EMIs"
+    assert result["sources"][0] == {"category": "loan_details"}
+    # Confidence stays a cosine similarity, not an RRF score
+    assert -1.0 <= result["confidence"] <= 1.0
+
+
+def test_dense_scoring_pruned_to_lexical_candidates(engine, monkeypatch):
+    monkeypatch.setattr(engine_module.settings, "HYBRID_PRUNE_MIN_DOCS", 1)
+    monkeypatch.setattr(engine_module.settings, "HYBRID_FUSION_DEPTH", 2)
+    store = engine_module.knowledge_base.current
+    question = "bank statements"
+    embedding = store.encode_batch([question])[0]
+
+    results = asyncio.run(engine._retrieve(store, question, embedding, top_k=2))
+    assert {r["id"] for r in results} == {1, 3}
+
+
+def _count_retrievals(engine, monkeypatch):
+    calls = []
+    retrieve = engine._retrieve
+
+    async def counting(*args, **kwargs):
+        calls.append(args[1])
+        return await retrieve(*args, **kwargs)
+
+    monkeypatch.setattr(engine, "_retrieve", counting)
+    return calls
+
+
+def test_paraphrase_served_from_semantic_cache(engine, monkeypatch):
+    store = engine_module.knowledge_base.current
+    anchor = store.encode_batch(["prepayment rules"])[0]
+    noise = np.random.default_rng(0).standard_normal(anchor.shape).astype(np.float32) * 0.02
+
+    def encode(texts):
+        # Stand-in for a real model: the paraphrase lands next to the original
+        vectors = store.encode_batch(texts)
+        for i, text in enumerate(texts):
+            if text == "can i prepay my loan":
+                vectors[i] = (anchor + noise) / np.linalg.norm(anchor + noise)
+        return vectors
+
+    monkeypatch.setattr(engine_module, "query_encoder", QueryEncoder(encode, window_ms=0))
+    calls = _count_retrievals(engine, monkeypatch)
+
+    first = asyncio.run(engine.query("prepayment rules"))
+    first["answer"] = "mutated by the caller"
+    second = asyncio.run(engine.query("Can I prepay my loan"))
+
+    assert calls == ["prepayment rules"]
+    assert second["answer"] == "Prepayment of the loan is allowed after twelve EMIs"
+    assert engine_module.semantic_cache.stats()["hits"] == 1
+
+
+def test_semantic_cache_keyed_on_top_k_and_filters(engine, monkeypatch):
+    calls = _count_retrievals(engine, monkeypatch)
+    asyncio.run(engine.query("bank statements", top_k=3))
+    asyncio.run(engine.query("bank statements", top_k=2))
+    asyncio.run(engine.query("bank statements", top_k=3, filters={"category": "fees"}))
+    asyncio.run(engine.query("bank statements", top_k=3))
+
+    assert len(calls) == 3
+
+
+def test_semantic_cache_dropped_on_new_snapshot(engine, monkeypatch):
+    calls = _count_retrievals(engine, monkeypatch)
+    asyncio.run(engine.query("processing fee"))
+    asyncio.run(engine.query("processing fee"))
+    assert len(calls) == 1
+
+    knowledge_base = engine_module.knowledge_base
+    knowledge_base.publish(knowledge_base.current, "republished")
+    asyncio.run(engine.query("processing fee"))
+    assert len(calls) == 2
+    assert engine_module.semantic_cache.stats()["invalidations"] == 1
+
+
+def test_semantic_cache_disabled(engine, monkeypatch):
+    monkeypatch.setattr(engine_module.settings, "SEMANTIC_CACHE_ENABLED", False)
+    calls = _count_retrievals(engine, monkeypatch)
+    asyncio.run(engine.query("processing fee"))
+    asyncio.run(engine.query("processing fee"))
+
+    assert len(calls) == 2
+    assert engine_module.semantic_cache.stats()["entries"] == 0
+
+
+@pytest.mark.parametrize("hybrid", [True, False])
+def test_filters_restrict_retrieval(engine, monkeypatch, hybrid):
+    monkeypatch.setattr(engine_module.settings, "HYBRID_SEARCH", hybrid)
+    # The best keyword match is a fee document, but only "documents" may answer
+    result = asyncio.run(engine.query("processing fee documents", top_k=5, filters={"category": "documents"}))
+    assert result["sources"] == [{"category": "documents"}] * 3
+
+    result = asyncio.run(engine.query("prepayment", top_k=5, filters={"category": ["fees", "loan_details"]}))
+    assert sorted(s["category"] for s in result["sources"]) == ["fees", "loan_details"]
+
+
+def test_filter_matching_nothing_skips_retrieval(engine, monkeypatch):
+    store = engine_module.knowledge_base.current
+    monkeypatch.setattr(store, "search_by_embedding", None)
+    monkeypatch.setattr(store, "search_by_embeddings", None)
+    result = asyncio.run(engine.query("prepayment", filters={"category": "unknown"}))
+    assert result["sources"] == [] and result["confidence"] == 0.0
+
+    results = asyncio.run(engine.query_batch(["prepayment", "fees"], filters={"category": "unknown"}))
+    assert [r["sources"] for r in results] == [[], []]
+
+
+QUESTIONS = ["prepayment rules", "bank statements", "processing fee", "Form 16", "prepayment rules", "nothing matches"]
+
+
+@pytest.mark.parametrize("hybrid", [True, False])
+def test_query_batch_matches_single_queries(engine, monkeypatch, hybrid):
+    monkeypatch.setattr(engine_module.settings, "HYBRID_SEARCH", hybrid)
+    monkeypatch.setattr(engine_module.settings, "SEMANTIC_CACHE_ENABLED", False)
+    batched = asyncio.run(engine.query_batch(QUESTIONS, top_k=2))
+    single = [asyncio.run(engine.query(q, top_k=2)) for q in QUESTIONS]
+
+    assert len(batched) == len(QUESTIONS)
+    for batch_result, single_result in zip(batched, single):
+        assert batch_result["answer"] == single_result["answer"]
+        assert batch_result["sources"] == single_result["sources"]
+        assert batch_result["confidence"] == pytest.approx(single_result["confidence"], abs=1e-5)
+    assert asyncio.run(engine.query_batch([])) == []
+
+
+def test_query_batch_encodes_once_and_shares_the_cache(engine, monkeypatch):
+    encoder = engine_module.query_encoder
+    calls = _count_retrievals(engine, monkeypatch)
+    asyncio.run(engine.query("processing fee"))
+
+    results = asyncio.run(engine.query_batch(["processing fee", "Form 16", "form  16"]))
+    assert encoder.stats()["batches"] == 2
+    assert results[0]["answer"] == "Processing fee is two percent of the loan amount"
+    # Batch answers are cached for later single queries
+    asyncio.run(engine.query("Form 16"))
+    assert calls == ["processing fee"]
+
+
+def _faq_client(engine, monkeypatch):
+    monkeypatch.setattr(faq, "rag_engine", engine)
+    app = FastAPI()
+    app.include_router(faq.router)
+    return TestClient(app)
+
+
+def test_faq_batch_endpoint(engine, monkeypatch):
+    client = _faq_client(engine, monkeypatch)
+    response = client.post("/api/faq/ask-batch", json={"questions": QUESTIONS[:3], "top_k": 2})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert [r["question"] for r in results] == QUESTIONS[:3]
+    assert results[0]["answer"] == "Prepayment of the loan is allowed after twelve EMIs"
+    assert len(results[1]["sources"]) == 2
+
+
+def test_faq_batch_endpoint_streams_ndjson(engine, monkeypatch):
+    monkeypatch.setattr(engine_module.settings, "FAQ_BATCH_CHUNK_SIZE", 4)
+    client = _faq_client(engine, monkeypatch)
+    questions = QUESTIONS * 2
+    response = client.post("/api/faq/ask-batch", json={"questions": questions, "stream": True})
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == list(range(len(questions)))
+    assert [line["question"] for line in lines] == questions
+    assert all("answer" in line for line in lines)
+
+
+def test_faq_batch_endpoint_limits(engine, monkeypatch):
+    monkeypatch.setattr(engine_module.settings, "FAQ_BATCH_MAX_QUESTIONS", 3)
+    client = _faq_client(engine, monkeypatch)
+    assert client.post("/api/faq/ask-batch", json={"questions": ["q"] * 4}).status_code == 413
+    assert client.post("/api/faq/ask-batch", json={"questions": ["q"], "top_k": 0}).status_code == 400
+    assert client.post("/api/faq/ask-batch", json={"questions": ["q"], "top_k": 21}).status_code == 400
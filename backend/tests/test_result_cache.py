@@ -0,0 +1,48 @@
+from PIL import Image
+from app.tools.document_ocr import tesseract_api
+from app.tools.document_ocr.ocr_engine import OCREngine
+from app.tools.document_ocr.result_cache import OCRResultCache, is_cacheable
+
+
+def _result(status, **extra):
+    return {"text": "", "confidence": 0.0, "extracted_data": {}, "status": status, **extra}
+
+
+def test_engine_failures_are_not_cacheable():
+    assert is_cacheable(_result("NO_TEXT_DETECTED"))
+    assert is_cacheable(_result("SUCCESS"))
+    assert not is_cacheable(_result("ERROR"))
+    assert not is_cacheable(_result("NO_TEXT_DETECTED", engine_error="tesseract is not installed"))
+
+
+def test_put_skips_engine_failures(tmp_path):
+    cache = OCRResultCache(capacity=4, cache_dir=str(tmp_path))
+    key = cache.key_from_digest("ab" * 32, "pan_card")
+
+    cache.put(key, _result("NO_TEXT_DETECTED", engine_error="tesseract is not installed"))
+    assert cache.get(key) is None
+    assert not any(tmp_path.rglob("*.json"))
+
+    cache.put(key, _result("NO_TEXT_DETECTED"))
+    assert cache.get(key)["status"] == "NO_TEXT_DETECTED"
+
+
+def test_passes_that_all_raise_are_flagged(monkeypatch):
+    def broken(image, lang, psm):
+        raise RuntimeError("tesseract is not installed")
+
+    monkeypatch.setattr(tesseract_api.tesseract_pool, "recognize", broken)
+    result = OCREngine()._ocr_image(Image.new("L", (64, 64), 255), "pan_card")
+
+    assert result["status"] == "NO_TEXT_DETECTED"
+    assert result["engine_error"] == "tesseract is not installed"
+    assert not is_cacheable(result)
+
+
+def test_blank_image_without_engine_errors_stays_cacheable(monkeypatch):
+    monkeypatch.setattr(tesseract_api.tesseract_pool, "recognize", lambda image, lang, psm: ("", []))
+    result = OCREngine()._ocr_image(Image.new("L", (64, 64), 255), "pan_card")
+
+    assert result["status"] == "NO_TEXT_DETECTED"
+    assert "engine_error" not in result
+    assert is_cacheable(result)
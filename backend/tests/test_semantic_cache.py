@@ -0,0 +1,49 @@
+import numpy as np
+from app.tools.rag.semantic_cache import SemanticCache
+
+DOCUMENTS = {"category": "documents"}
+
+
+def _unit(*values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_filtered_entry_does_not_hide_unfiltered_one():
+    cache = SemanticCache(capacity=8, threshold=0.9, ttl_seconds=60)
+    question = _unit(1, 0, 0)
+    cache.store(question, 1, 3, {"answer": "faq"})
+    # Stored later and identical, so it is the overall best match
+    cache.store(question, 1, 3, {"answer": "documents"}, filters=DOCUMENTS)
+
+    for _ in range(3):
+        assert cache.lookup(question, 1, 3) == {"answer": "faq"}
+        assert cache.lookup(question, 1, 3, filters=dict(DOCUMENTS)) == {"answer": "documents"}
+    assert cache.stats()["misses"] == 0
+    assert cache.stats()["entries"] == 2
+
+
+def test_lookup_needs_same_top_k_and_filters():
+    cache = SemanticCache(capacity=8, threshold=0.9, ttl_seconds=60)
+    question = _unit(1, 0, 0)
+    cache.store(question, 1, 3, {"answer": "faq"}, filters=DOCUMENTS)
+
+    assert cache.lookup(question, 1, 5, filters=DOCUMENTS) is None
+    assert cache.lookup(question, 1, 3) is None
+    assert cache.lookup(question, 1, 3, filters={"category": "faq"}) is None
+    assert cache.lookup(_unit(0, 1, 0), 1, 3, filters=DOCUMENTS) is None
+    assert cache.lookup(_unit(1, 0.1, 0), 1, 3, filters=DOCUMENTS) == {"answer": "faq"}
+
+
+def test_expired_and_invalidated_entries_miss():
+    cache = SemanticCache(capacity=2, threshold=0.9, ttl_seconds=0)
+    question = _unit(1, 0, 0)
+    cache.store(question, 1, 3, {"answer": "stale"})
+    assert cache.lookup(question, 1, 3) is None
+    assert cache.stats()["expired"] == 1
+
+    cache.ttl = 60
+    cache.store(question, 1, 3, {"answer": "fresh"})
+    assert cache.lookup(question, 1, 3) == {"answer": "fresh"}
+    assert cache.lookup(question, 2, 3) is None
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,95 @@
+import sys
+import threading
+import pytest
+import pytesseract
+from PIL import Image
+from app.tools.document_ocr.tesseract_api import TesseractAPIPool, installed_languages
+
+# image_to_data output for two paragraphs; -1 rows are layout boxes, not words
+IMAGE_DATA = {
+    "text": ["", "INCOME", "TAX", "", "PAN", "ABCDE1234F", "Name"],
+    "conf": ["-1", "91.5", "88", "-1", "95", "96.2", "0"],
+    "block_num": [1, 1, 1, 2, 2, 2, 2],
+    "par_num": [1, 1, 1, 1, 1, 1, 1],
+    "line_num": [0, 1, 1, 0, 1, 1, 2],
+}
+
+
+@pytest.fixture
+def no_tesserocr(monkeypatch):
+    # None in sys.modules makes ``import tesserocr`` raise ImportError
+    monkeypatch.setitem(sys.modules, "tesserocr", None)
+
+
+def test_auto_backend_falls_back_to_pytesseract(no_tesserocr):
+    assert TesseractAPIPool("auto").backend == "pytesseract"
+    assert TesseractAPIPool("tesserocr").backend == "pytesseract"
+    assert TesseractAPIPool("pytesseract").backend == "pytesseract"
+
+
+def test_pytesseract_pass_is_one_call(no_tesserocr, monkeypatch):
+    calls = []
+
+    def image_to_data(image, output_type, config):
+        calls.append(config)
+        return IMAGE_DATA
+
+    monkeypatch.setattr(pytesseract, "image_to_data", image_to_data)
+    monkeypatch.setattr(pytesseract, "image_to_string", None)
+
+    text, confidences = TesseractAPIPool("pytesseract").recognize(Image.new("L", (10, 10)), "eng+hin", 6)
+    assert calls == ["--psm 6 -l eng+hin"]
+    # Lines rebuilt from word boxes, a blank line between blocks
+    assert text == "INCOME TAX\n\nPAN ABCDE1234F\nName"
+    assert confidences == [91.5, 88.0, 95.0, 96.2, 0.0]
+
+
+def test_installed_languages_probed_once(no_tesserocr, monkeypatch):
+    calls = []
+
+    def get_languages(config):
+        calls.append(config)
+        return ["eng", "hin", "osd"]
+
+    monkeypatch.setattr(pytesseract, "get_languages", get_languages)
+    installed_languages.cache_clear()
+    try:
+        assert installed_languages() == {"eng", "hin", "osd"}
+        assert installed_languages() == {"eng", "hin", "osd"}
+        assert len(calls) == 1
+    finally:
+        installed_languages.cache_clear()
+
+
+def test_installed_languages_defaults_to_english(no_tesserocr, monkeypatch):
+    def get_languages(config):
+        raise pytesseract.TesseractNotFoundError()
+
+    monkeypatch.setattr(pytesseract, "get_languages", get_languages)
+    installed_languages.cache_clear()
+    try:
+        assert installed_languages() == {"eng"}
+    finally:
+        installed_languages.cache_clear()
+
+
+def test_tesserocr_handles_reused_per_thread():
+    pytest.importorskip("tesserocr")
+    if "eng" not in installed_languages():
+        pytest.skip("eng traineddata not installed")
+
+    pool = TesseractAPIPool("tesserocr")
+    try:
+        first = pool._handle("eng", 6)
+        assert pool._handle("eng", 6) is first
+        assert pool._handle("eng", 3) is not first
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(pool._handle("eng", 6)))
+        thread.start()
+        thread.join()
+        assert other[0] is not first
+        assert len(pool._all_handles) == 3
+    finally:
+        pool.close()
+    assert pool._all_handles == []
@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import io
+import os
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from app.core.upload_limit import UploadSizeLimitMiddleware
+from app.tools.document_ocr import upload_spool
+from app.tools.document_ocr.upload_spool import UnsupportedUpload, UploadTooLarge, spool_upload
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200
+PDF = b"%PDF-1.4\n" + b"\x00" * 200
+
+
+@pytest.fixture(autouse=True)
+def spool_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_spool.settings, "UPLOAD_TMP_DIR", str(tmp_path))
+    monkeypatch.setattr(upload_spool.settings, "UPLOAD_CHUNK_SIZE", 64)
+    return tmp_path
+
+
+def _spool(data, ext, max_bytes=None):
+    upload = UploadFile(file=io.BytesIO(data), filename=f"doc{ext}")
+    return asyncio.run(spool_upload(upload, ext, max_bytes=max_bytes))
+
+
+def test_spooled_file_matches_upload(spool_dir):
+    spooled = _spool(PNG, ".png")
+    with open(spooled.path, "rb") as f:
+        assert f.read() == PNG
+    assert spooled.size == len(PNG)
+    assert spooled.sha256 == hashlib.sha256(PNG).hexdigest()
+
+    spooled.cleanup()
+    spooled.cleanup()
+    assert os.listdir(spool_dir) == []
+
+
+def test_jpeg_alias():
+    spooled = _spool(b"\xff\xd8\xff\xe0" + b"\x00" * 10, ".jpeg")
+    assert spooled.ext == ".jpg"
+    spooled.cleanup()
+
+
+@pytest.mark.parametrize("data,ext,error", [
+    (PNG, ".png", UploadTooLarge),
+    (PDF, ".png", UnsupportedUpload),
+    (b"MZ\x90\x00" * 40, ".pdf", UnsupportedUpload),
+    (b"", ".png", UnsupportedUpload),
+])
+def test_rejected_uploads_leave_no_file(spool_dir, data, ext, error):
+    with pytest.raises(error):
+        _spool(data, ext, max_bytes=100)
+    assert os.listdir(spool_dir) == []
+
+
+def test_oversized_upload_stops_reading_at_the_limit():
+    read = []
+
+    class CountingFile(io.BytesIO):
+        def read(self, size=-1):
+            chunk = super().read(size)
+            read.append(len(chunk))
+            return chunk
+
+    upload = UploadFile(file=CountingFile(PNG * 100), filename="doc.png")
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(spool_upload(upload, ".png", max_bytes=256))
+    assert sum(read) <= 256 + 64
+
+
+def _limited_app(limit):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(UploadSizeLimitMiddleware, limit_for=lambda path: limit if path == "/upload" else None)
+    return app
+
+
+def test_body_limit_middleware():
+    with TestClient(_limited_app(4096)) as client:
+        small = client.post("/upload", files={"file": ("doc.png", PNG)})
+        assert small.status_code == 200
+        assert small.json() == {"size": len(PNG)}
+
+        large = client.post("/upload", files={"file": ("doc.png", PNG * 50)})
+        assert large.status_code == 413
+
+        def chunked():
+            # No Content-Length: cut off while streaming
+            yield b"--x\r\nContent-Disposition: form-data; name=\"file\"; filename=\"doc.png\"\r\n\r\n"
+            for _ in range(50):
+                yield PNG
+            yield b"\r\n--x--\r\n"
+
+        streamed = client.post(
+            "/upload", content=chunked(),
+            headers={"Content-Type": "multipart/form-data; boundary=x"}
+        )
+        assert streamed.status_code == 413
@@ -0,0 +1,71 @@
+import asyncio
+import numpy as np
+import pytest
+
+# Importing the store loads the default embedding model
+pytest.importorskip("sentence_transformers")
+
+from app.tools.rag.vector_store import VectorStore
+
+CONTENTS = [f"policy clause {i}" for i in range(150)]
+
+
+@pytest.fixture
+def store(make_store):
+    return make_store(CONTENTS)
+
+
+def test_search_ranks_by_cosine_similarity(store):
+    results = asyncio.run(store.search("policy clause 17", top_k=5))
+
+    assert [r["content"] for r in results][:1] == ["policy clause 17"]
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    scores = [r["score"] for r in results]
+    assert scores == sorted(scores, reverse=True)
+
+    query = store.encode_batch(["policy clause 17"])[0]
+    expected = np.argsort(store.embeddings @ query)[::-1][:5]
+    assert [r["id"] for r in results] == expected.tolist()
+
+
+def test_search_batch_matches_single_searches(store):
+    queries = ["policy clause 3", "policy clause 99", "unrelated question"]
+    batched = asyncio.run(store.search_batch(queries, top_k=4))
+    single = [asyncio.run(store.search(q, top_k=4)) for q in queries]
+    for batch_results, single_results in zip(batched, single):
+        assert [r["id"] for r in batch_results] == [r["id"] for r in single_results]
+        assert [r["score"] for r in batch_results] == pytest.approx([r["score"] for r in single_results], abs=1e-5)
+
+
+def test_top_k_larger_than_store(make_store):
+    store = make_store(CONTENTS[:3])
+    assert len(asyncio.run(store.search("policy clause 1", top_k=10))) == 3
+    assert asyncio.run(make_store().search("anything")) == []
+    assert asyncio.run(make_store().search_batch(["a", "b"])) == [[], []]
+
+
+def test_top_k_indices_matches_full_sort():
+    scores = np.random.default_rng(0).standard_normal(500).astype(np.float32)
+    for top_k in (0, 1, 7, 500, 600):
+        expected = np.argsort(scores)[::-1][:top_k]
+        np.testing.assert_array_equal(VectorStore._top_k_indices(scores, top_k), expected)
+
+
+def test_matrix_grows_past_initial_capacity(make_store):
+    store = make_store()
+    for start in range(0, len(CONTENTS), 40):
+        batch = CONTENTS[start:start + 40]
+        store.extend_embedded(batch, None, store.encode_batch(batch))
+
+    assert len(store) == len(CONTENTS)
+    np.testing.assert_allclose(store.embeddings, store.encode_batch(CONTENTS), rtol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(store.embeddings, axis=1), 1.0, rtol=1e-5)
+    assert not store.embeddings.flags.writeable
+
+
+def test_frozen_store_rejects_writes(store):
+    store.freeze()
+    with pytest.raises(RuntimeError):
+        store.extend_embedded(["new"], None, store.encode_batch(["new"]))
+    with pytest.raises(RuntimeError):
+        asyncio.run(store.add_document("new"))